@@ -0,0 +1,154 @@
+"""
+Cost of appending a message to a long conversation, with the previous
+`add_message_to_conversation` (load the chat with all its messages, insert,
+reload the whole history) and with the keyed check plus INSERT ... RETURNING.
+
+Seeds one conversation with `--messages` messages, then appends `--appends`
+messages with each implementation. Queries are the statements sent to the
+database per append.
+
+Run from the backend directory, with migrations applied:
+    python -m benchmarks.bench_chat_append
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, event, insert, select
+from sqlalchemy.orm import joinedload
+from src.db.session import async_session, engine
+from src.models import ChatConversation, ChatMessage, User
+from src.repositories.chat import chat_repo
+from src.repositories.user import user_repo
+from src.schemas.api.chat.dto import ChatDetailsDTO
+from src.schemas.api.chat.schemas import CreateChatMessage, GetChatMessage
+from src.schemas.api.user.schemas import UserCreate
+from src.utils.enums import SenderType
+
+
+async def legacy_add_message(db, user_model, session_id, request_id, message_in):
+    def load_chat():
+        return db.execute(
+            select(ChatConversation)
+            .options(joinedload(ChatConversation.messages))
+            .where(
+                and_(
+                    ChatConversation.session_id == session_id,
+                    ChatConversation.creator_id == user_model.id,
+                )
+            )
+        )
+
+    chat = (await load_chat()).unique().scalars().first()
+    new_message = ChatMessage(
+        sender_type=message_in.sender_type,
+        content=message_in.content,
+        conversation_id=session_id,
+        request_id=request_id,
+    )
+    db.add(new_message)
+    await db.commit()
+    await db.refresh(new_message)
+
+    chat = (await load_chat()).unique().scalars().first()
+    return ChatDetailsDTO(
+        title=chat.title,
+        created_at=chat.created_at,
+        updated_at=chat.updated_at,
+        session_id=chat.session_id,
+        messages=[GetChatMessage(**msg.__dict__) for msg in chat.messages],
+    )
+
+
+async def seed(messages: int) -> tuple[User, uuid.UUID]:
+    async with async_session() as db:
+        user = await user_repo.register(
+            db,
+            obj_in=UserCreate(
+                username=f"Bench{uuid.uuid4().hex[:8]}", password="Bench-pass-1!"
+            ),
+        )
+        session_id = uuid.uuid4()
+        started = datetime.now() - timedelta(days=1)
+        await db.execute(
+            insert(ChatConversation).values(
+                session_id=session_id, title="bench", creator_id=user.id
+            )
+        )
+        for start in range(0, messages, 1000):
+            await db.execute(
+                insert(ChatMessage).values(
+                    [
+                        {
+                            "sender_type": "user",
+                            "content": f"message {i}",
+                            "request_id": uuid.uuid4(),
+                            "conversation_id": session_id,
+                            "created_at": started + timedelta(milliseconds=i),
+                        }
+                        for i in range(start, min(start + 1000, messages))
+                    ]
+                )
+            )
+        await db.commit()
+        await db.refresh(user)
+        db.expunge(user)
+    return user, session_id
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self.on_execute)
+
+    def on_execute(self, *args) -> None:
+        self.count += 1
+
+
+async def measure(append, user, session_id, appends: int, queries: QueryCounter):
+    message = CreateChatMessage(sender_type=SenderType.user, content="hello")
+    latencies = []
+    queries.count = 0
+    for _ in range(appends):
+        async with async_session() as db:
+            started = time.perf_counter()
+            await append(db, user, session_id, str(uuid.uuid4()), message)
+            latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return latencies[len(latencies) // 2], queries.count / appends
+
+
+async def run(args: argparse.Namespace) -> None:
+    user, session_id = await seed(args.messages)
+    queries = QueryCounter()
+    implementations = {
+        "reload history": legacy_add_message,
+        "RETURNING": lambda db, *a: chat_repo.add_message_to_conversation(db, *a),
+    }
+
+    print(f"{'append':>15} {'p50, ms':>8} {'queries':>8}")
+    try:
+        for label, append in implementations.items():
+            p50, per_append = await measure(
+                append, user, session_id, args.appends, queries
+            )
+            print(f"{label:>15} {p50 * 1e3:>8.2f} {per_append:>8.1f}")
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(User).where(User.id == user.id))
+            await db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--appends", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Throughput of `GET /api/agents/active` with the pooled engine and with a new
+database connection per session (`DB_POOL_ENABLED=false`).
+
+Every mode starts its own backend with uvicorn against the database configured
+in the environment, registers a user and runs `--concurrency` clients that call
+the endpoint for `--seconds`. The router does not have to run.
+
+Run from the backend directory, with migrations applied:
+    python -m benchmarks.bench_db_pool
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.get("/api/metrics/db-pool")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Backend did not start")
+
+
+async def login(client: httpx.AsyncClient) -> str:
+    creds = {"username": f"Bench{uuid.uuid4().hex[:8]}", "password": "Bench-pass-1!"}
+    await client.post("/api/register", json=creds)
+    response = await client.post("/api/login/access-token", data=creds)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def measure(url: str, concurrency: int, seconds: float) -> tuple:
+    async with httpx.AsyncClient(
+        base_url=url,
+        limits=httpx.Limits(max_connections=concurrency),
+        timeout=60,
+    ) as client:
+        await wait_until_up(client)
+        headers = {"Authorization": f"Bearer {await login(client)}"}
+        latencies = []
+        failures = 0
+
+        async def worker(deadline: float) -> None:
+            nonlocal failures
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.get(
+                    "/api/agents/active", params={"agent_type": "all"}, headers=headers
+                )
+                if response.status_code != 200:
+                    failures += 1
+                latencies.append(time.perf_counter() - started)
+
+        # warm up, the pooled mode opens its connections here
+        await asyncio.gather(
+            *(worker(time.perf_counter() + 1) for _ in range(concurrency))
+        )
+        latencies.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(started + seconds) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        pool = (await client.get("/api/metrics/db-pool", headers=headers)).json()
+
+    latencies.sort()
+    return (
+        len(latencies) / elapsed,
+        latencies[len(latencies) // 2],
+        latencies[int(len(latencies) * 0.99)],
+        failures,
+        pool,
+    )
+
+
+def run(pooled: bool, port: int, args: argparse.Namespace) -> tuple:
+    env = dict(os.environ, DB_POOL_ENABLED=str(pooled).lower())
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        return asyncio.run(
+            measure(f"http://127.0.0.1:{port}", args.concurrency, args.seconds)
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(
+        f"{'engine':>8} {'req/s':>8} {'p50, ms':>8} {'p99, ms':>8} {'failed':>7} "
+        f"{'checkout p99, ms':>17}"
+    )
+    for label, pooled in (("NullPool", False), ("pooled", True)):
+        rps, p50, p99, failures, pool = run(pooled, args.port, args)
+        print(
+            f"{label:>8} {rps:>8.0f} {p50 * 1e3:>8.1f} {p99 * 1e3:>8.1f} "
+            f"{failures:>7} {pool['checkout_ms_p99']:>17.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
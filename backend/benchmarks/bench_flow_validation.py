@@ -0,0 +1,164 @@
+"""
+Cost of re-validating the flows after an agent changes state, with the
+previous `trigger_flow_validation_on_agent_state_change` (load every flow of
+every user, one query and one commit per flow) and with the single
+UPDATE ... FROM scoped to the flows referencing the changed agent.
+
+Seeds `--users` users with `--agents` genai agents and `--flows` flows each,
+every flow referencing a few agents of its user. Then one agent is set
+inactive and the flows are re-validated with each implementation. Queries are
+the statements sent to the database.
+
+Run from the backend directory, with migrations applied:
+    python -m benchmarks.bench_flow_validation
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from sqlalchemy import and_, delete, event, func, insert, select, update
+from src.db.session import async_session, engine
+from src.models import Agent, AgentWorkflow, User
+from src.utils.enums import AgentType
+from src.utils.helpers import FlowValidator
+
+USER_PREFIX = "BenchFlow"
+BENCH_FLOWS = AgentWorkflow.creator_id.in_(
+    select(User.id).where(User.username.like(f"{USER_PREFIX}%"))
+)
+
+
+async def legacy_validation(db, agent_type: AgentType, agent_ids) -> None:
+    active_flows = await db.scalars(
+        select(AgentWorkflow).order_by(AgentWorkflow.created_at.desc())
+    )
+    agentflows = active_flows.all()
+    for flow_id, flow in [(f.id, f.flow) for f in agentflows]:
+        flow_agent_ids = [a["id"] for a in flow if a["type"] == agent_type.value]
+        active_agents = await db.scalars(
+            select(Agent).where(
+                and_(Agent.id.in_(flow_agent_ids), Agent.is_active.is_(True))
+            )
+        )
+        is_active = len(active_agents.all()) == len(flow_agent_ids)
+        await db.execute(
+            update(AgentWorkflow)
+            .where(AgentWorkflow.id == flow_id)
+            .values({"is_active": is_active})
+        )
+        await db.commit()
+
+
+async def set_based_validation(db, agent_type: AgentType, agent_ids) -> None:
+    await FlowValidator().trigger_flow_validation_on_agent_state_change(
+        db=db, agent_ids=agent_ids
+    )
+
+
+async def seed(args: argparse.Namespace) -> uuid.UUID:
+    rng = random.Random(42)
+    users, agents, flows = [], [], []
+    for i in range(args.users):
+        user_id = uuid.uuid4()
+        users.append({"id": user_id, "username": f"{USER_PREFIX}{i}", "password": "-"})
+        agent_ids = [uuid.uuid4() for _ in range(args.agents)]
+        agents.extend(
+            {
+                "id": agent_id,
+                "name": "agent",
+                "description": "agent",
+                "alias": agent_id.hex,
+                "jwt": agent_id.hex,
+                "creator_id": user_id,
+                "input_parameters": {},
+                "is_active": True,
+            }
+            for agent_id in agent_ids
+        )
+        for _ in range(args.flows):
+            flow_id = uuid.uuid4()
+            flows.append(
+                {
+                    "id": flow_id,
+                    "alias": flow_id.hex,
+                    "name": "flow",
+                    "description": "flow",
+                    "flow": [
+                        {"id": str(agent_id), "type": AgentType.genai.value}
+                        for agent_id in rng.sample(agent_ids, k=3)
+                    ],
+                    "creator_id": user_id,
+                    "is_active": True,
+                }
+            )
+
+    async with async_session() as db:
+        for model, rows in ((User, users), (Agent, agents), (AgentWorkflow, flows)):
+            await db.execute(insert(model), rows)
+        await db.commit()
+    return agents[0]["id"]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self.on_execute)
+
+    def on_execute(self, *args) -> None:
+        self.count += 1
+
+
+async def run(args: argparse.Namespace) -> None:
+    implementations = {
+        "per flow": legacy_validation,
+        "UPDATE ... FROM": set_based_validation,
+    }
+    print(f"{'validation':>16} {'ms':>10} {'queries':>8} {'inactive flows':>15}")
+    try:
+        changed_agent_id = await seed(args)
+        queries = QueryCounter()
+        for label, validate in implementations.items():
+            async with async_session() as db:
+                await db.execute(
+                    update(Agent)
+                    .where(Agent.id == changed_agent_id)
+                    .values(is_active=False)
+                )
+                await db.execute(
+                    update(AgentWorkflow).where(BENCH_FLOWS).values(is_active=True)
+                )
+                await db.commit()
+
+                queries.count = 0
+                started = time.perf_counter()
+                await validate(db, AgentType.genai, [changed_agent_id])
+                elapsed = time.perf_counter() - started
+                count = queries.count
+                inactive = await db.scalar(
+                    select(func.count()).where(
+                        BENCH_FLOWS, AgentWorkflow.is_active.is_(False)
+                    )
+                )
+            print(f"{label:>16} {elapsed * 1e3:>10.2f} {count:>8} {inactive:>15}")
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(User).where(User.username.like(f"{USER_PREFIX}%")))
+            await db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--agents", type=int, default=10, help="per user")
+    parser.add_argument("--flows", type=int, default=20, help="per user")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
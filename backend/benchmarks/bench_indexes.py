@@ -0,0 +1,319 @@
+"""
+Query plans of the hot repository methods with the single column indexes of
+the initial schema and with the composite indexes added next to them.
+
+Seeds `--users` users with agents, chats, logs, files, MCP servers and A2A
+cards, then calls every repository method and records the SQL it sends. Each
+statement is run with EXPLAIN ANALYZE twice:
+  - before: in a transaction that drops the composite indexes and recreates
+    the single column ones they replaced, rolled back afterwards
+  - after: on the schema as migrated
+Prints the execution time and the scan Postgres picked for each method.
+
+Run from the backend directory, with migrations applied:
+    python -m benchmarks.bench_indexes
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, insert, text
+from src.db.session import async_session, engine
+from src.models import (
+    A2ACard,
+    Agent,
+    ChatConversation,
+    ChatMessage,
+    File,
+    Log,
+    MCPServer,
+    User,
+)
+from src.repositories.a2a import a2a_repo
+from src.repositories.agent import agent_repo
+from src.repositories.chat import chat_repo
+from src.repositories.files import files_repo
+from src.repositories.log import log_repo
+from src.repositories.mcp import mcp_repo
+
+USER_PREFIX = "BenchIdx"
+
+# composite index -> the single column index it replaced, if any
+INDEXES = {
+    "ix_agents_creator_id_is_active_created_at": None,
+    "ix_agents_creator_id_created_at_id": "ix_agents_creator_id ON agents (creator_id)",
+    "ix_chatconversations_creator_id_created_at": (
+        "ix_chatconversations_creator_id ON chatconversations (creator_id)"
+    ),
+    "ix_chatmessages_conversation_id_created_at_id": (
+        "ix_chatmessages_conversation_id ON chatmessages (conversation_id)"
+    ),
+    "ix_logs_session_id_created_at_id": "ix_logs_session_id ON logs (session_id)",
+    "ix_logs_request_id_created_at_id": "ix_logs_request_id ON logs (request_id)",
+    "ix_files_creator_id_created_at_id": "ix_files_creator_id ON files (creator_id)",
+    "ix_mcpservers_server_url": None,
+    "ix_a2acards_server_url": None,
+}
+
+
+async def seed(args: argparse.Namespace) -> dict:
+    rng = random.Random(42)
+    started = datetime.now() - timedelta(days=30)
+
+    def moment() -> datetime:
+        return started + timedelta(seconds=rng.randrange(30 * 24 * 3600))
+
+    users = [
+        {"id": uuid.uuid4(), "username": f"{USER_PREFIX}{i}", "password": "-"}
+        for i in range(args.users)
+    ]
+    agents, conversations, messages, logs, files, servers, cards = (
+        [] for _ in "1234567"
+    )
+    for user in users:
+        for i in range(args.agents):
+            agents.append(
+                {
+                    "name": f"agent_{i}",
+                    "description": f"Agent number {i}",
+                    "alias": uuid.uuid4().hex,
+                    "jwt": uuid.uuid4().hex,
+                    "creator_id": user["id"],
+                    "input_parameters": {},
+                    "is_active": rng.random() < 0.2,
+                    "created_at": moment(),
+                }
+            )
+        for _ in range(args.chats):
+            session_id = uuid.uuid4()
+            conversations.append(
+                {
+                    "session_id": session_id,
+                    "title": "bench",
+                    "creator_id": user["id"],
+                    "created_at": moment(),
+                }
+            )
+            for i in range(args.messages):
+                request_id = uuid.uuid4()
+                messages.append(
+                    {
+                        "sender_type": "user" if i % 2 else "master_agent",
+                        "content": f"message {i}",
+                        "request_id": request_id,
+                        "conversation_id": session_id,
+                        "created_at": moment(),
+                    }
+                )
+                for j in range(args.logs):
+                    logs.append(
+                        {
+                            "session_id": session_id,
+                            "request_id": request_id,
+                            "agent_id": USER_PREFIX,
+                            "message": f"log {j}",
+                            "log_level": "info",
+                            "created_at": moment(),
+                        }
+                    )
+        for i in range(args.files):
+            files.append(
+                {
+                    "request_id": uuid.uuid4(),
+                    "creator_id": user["id"],
+                    "mimetype": "text/plain",
+                    "original_name": f"file_{i}.txt",
+                    "internal_name": uuid.uuid4().hex,
+                    "internal_id": uuid.uuid4(),
+                    "from_agent": False,
+                    "created_at": moment(),
+                }
+            )
+        for i in range(args.servers):
+            url = f"http://{user['username']}-{i}.local/mcp"
+            servers.append(
+                {"server_url": url, "creator_id": user["id"], "is_active": True}
+            )
+            cards.append(
+                {
+                    "server_url": url.replace("/mcp", "/a2a"),
+                    "card_content": {"name": f"card_{i}"},
+                    "creator_id": user["id"],
+                    "is_active": True,
+                }
+            )
+
+    async with async_session() as db:
+        for model, rows in (
+            (User, users),
+            (Agent, agents),
+            (ChatConversation, conversations),
+            (ChatMessage, messages),
+            (Log, logs),
+            (File, files),
+            (MCPServer, servers),
+            (A2ACard, cards),
+        ):
+            await db.execute(insert(model), rows)
+        await db.commit()
+        await db.execute(text("ANALYZE"))
+        await db.commit()
+
+    user = users[len(users) // 2]
+    message = messages[len(messages) // 2]
+    return {
+        "user_id": user["id"],
+        "session_id": message["conversation_id"],
+        "request_id": message["request_id"],
+        "file_request_id": files[len(files) // 2]["request_id"],
+        "server_url": servers[len(servers) // 2]["server_url"],
+        "card_url": cards[len(cards) // 2]["server_url"],
+    }
+
+
+class StatementRecorder:
+    def __init__(self):
+        self.statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self.on_execute)
+
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+
+async def record(seeded: dict) -> dict[str, tuple]:
+    """Runs every repository method and keeps the first statement it sends."""
+    recorder = StatementRecorder()
+    async with async_session() as db:
+        user = await db.get(User, seeded["user_id"])
+        calls = {
+            "agent_repo.query_active_agents": lambda: agent_repo.query_active_agents(
+                db, user_id=user.id, limit=20, offset=0
+            ),
+            "agent_repo.filter_out_empty_agents": (
+                lambda: agent_repo.filter_out_empty_agents(
+                    db, user_model=user, limit=20, offset=0
+                )
+            ),
+            "chat_repo.list_chats": lambda: chat_repo.list_chats(
+                db, user_model=user, limit=20
+            ),
+            "chat_repo.get_paginated_chat_history": (
+                lambda: chat_repo.get_paginated_chat_history(
+                    db, user.id, seeded["session_id"], per_page=20
+                )
+            ),
+            "log_repo.list_by_session_id": lambda: log_repo.list_by_session_id(
+                db, seeded["session_id"], limit=50
+            ),
+            "log_repo.list_by_request_id": lambda: log_repo.list_by_request_id(
+                db, seeded["request_id"], limit=50
+            ),
+            "files_repo.get_files_metadata_by_user": (
+                lambda: files_repo.get_files_metadata_by_user(
+                    db, user_model=user, limit=20
+                )
+            ),
+            "files_repo.list_files_by_request_id": (
+                lambda: files_repo.list_files_by_request_id(
+                    db, request_id=seeded["file_request_id"]
+                )
+            ),
+            "mcp_repo.get_mcp_server_by_url": lambda: mcp_repo.get_mcp_server_by_url(
+                db, mcp_server_url=seeded["server_url"]
+            ),
+            "a2a_repo.get_card_by_server_url": lambda: a2a_repo.get_card_by_server_url(
+                db, server_url=seeded["card_url"]
+            ),
+        }
+        recorded = {}
+        for label, call in calls.items():
+            recorder.statements.clear()
+            await call()
+            recorded[label] = recorder.statements[0]
+    event.remove(engine.sync_engine, "before_cursor_execute", recorder.on_execute)
+    return recorded
+
+
+def top_scan(node: dict) -> str:
+    """The first node in the plan reading a table or an index."""
+    # the index of a Bitmap Heap Scan is on the Bitmap Index Scan below it
+    if "Scan" in node["Node Type"] and node["Node Type"] != "Bitmap Heap Scan":
+        target = node.get("Index Name") or node.get("Relation Name")
+        return f"{node['Node Type']} ({target})"
+    for child in node.get("Plans", []):
+        found = top_scan(child)
+        if found:
+            return found
+    return ""
+
+
+async def explain(conn, statement: str, parameters) -> tuple[float, str]:
+    best, scan = float("inf"), ""
+    for _ in range(3):
+        result = await conn.exec_driver_sql(
+            f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", parameters
+        )
+        plan = result.scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        best = min(best, plan[0]["Execution Time"])
+        scan = top_scan(plan[0]["Plan"])
+    return best, scan
+
+
+async def run_plans(recorded: dict[str, tuple], before: bool) -> dict:
+    plans = {}
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            if before:
+                for index, replaced in INDEXES.items():
+                    await conn.exec_driver_sql(f"DROP INDEX {index}")
+                    if replaced:
+                        await conn.exec_driver_sql(f"CREATE INDEX {replaced}")
+            for label, (statement, parameters) in recorded.items():
+                plans[label] = await explain(conn, statement, parameters)
+        finally:
+            await transaction.rollback()
+    return plans
+
+
+async def run(args: argparse.Namespace) -> None:
+    try:
+        seeded = await seed(args)
+        recorded = await record(seeded)
+        before = await run_plans(recorded, before=True)
+        after = await run_plans(recorded, before=False)
+
+        for label in recorded:
+            print(label)
+            for stage, plans in (("before", before), ("after", after)):
+                ms, scan = plans[label]
+                print(f"{stage:>10} {ms:>9.3f} ms  {scan}")
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(Log).where(Log.agent_id == USER_PREFIX))
+            await db.execute(delete(User).where(User.username.like(f"{USER_PREFIX}%")))
+            await db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--agents", type=int, default=100, help="per user")
+    parser.add_argument("--chats", type=int, default=20, help="per user")
+    parser.add_argument("--messages", type=int, default=50, help="per chat")
+    parser.add_argument("--logs", type=int, default=3, help="per message")
+    parser.add_argument("--files", type=int, default=100, help="per user")
+    parser.add_argument("--servers", type=int, default=25, help="per user")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
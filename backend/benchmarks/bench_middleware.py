@@ -0,0 +1,157 @@
+"""
+Per-request cost of the middleware stack on an authenticated GET, with the
+previous `BaseHTTPMiddleware` stack and with the pure ASGI middlewares.
+
+Requests go through httpx's ASGI transport, so no server or network is
+involved. The route only loads the current user. Both stacks run the same
+default-provider lookup, the difference is the middleware machinery and the
+database session opened for every request. The overhead is the time per
+request over the same app without middlewares, queries are the statements
+sent to the database per request.
+
+Run from the backend directory, with migrations applied:
+    python -m benchmarks.bench_middleware
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event
+from src.auth.dependencies import CurrentUserDependency
+from src.auth.jwt import create_access_token
+from src.db.session import async_session, engine
+from src.middleware.db_session import DBSessionMiddleware
+from src.middleware.pagination import PaginationMiddleware, request_object
+from src.middleware.provider import (
+    ProviderLookupMiddleware,
+    lookup_provider_per_current_user,
+)
+from src.repositories.user import user_repo
+from src.schemas.api.user.schemas import UserCreate
+from starlette.middleware.base import BaseHTTPMiddleware
+
+
+class LegacyDBSessionMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        async with async_session() as db:
+            request.state.db = db
+            return await call_next(request)
+
+
+class LegacyProviderLookupMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        await lookup_provider_per_current_user(request.headers.get("Authorization"))
+        return await call_next(request)
+
+
+class LegacyPaginationMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        request_object.set(request)
+        return await call_next(request)
+
+
+def build_app(middlewares: tuple) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(user: CurrentUserDependency) -> dict:
+        return {"id": str(user.id)}
+
+    for middleware in middlewares:
+        app.add_middleware(middleware)
+    return app
+
+
+STACKS = {
+    "none": (),
+    "BaseHTTPMiddleware": (
+        LegacyPaginationMiddleware,
+        LegacyProviderLookupMiddleware,
+        LegacyDBSessionMiddleware,
+    ),
+    "pure ASGI": (
+        PaginationMiddleware,
+        ProviderLookupMiddleware,
+        DBSessionMiddleware,
+    ),
+}
+
+
+async def create_token() -> str:
+    async with async_session() as db:
+        user = await user_repo.register(
+            db,
+            obj_in=UserCreate(
+                username=f"Bench{uuid.uuid4().hex[:8]}", password="Bench-pass-1!"
+            ),
+        )
+    return create_access_token(subject=str(user.id))
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self.on_execute)
+
+    def on_execute(self, *args) -> None:
+        self.count += 1
+
+
+async def measure(
+    app: FastAPI, token: str, requests: int, queries: QueryCounter
+) -> tuple[float, float]:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for _ in range(requests // 10):
+            (await client.get("/me", headers=headers)).raise_for_status()
+        queries.count = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/me", headers=headers)
+        elapsed = time.perf_counter() - started
+    return elapsed / requests, queries.count / requests
+
+
+async def run(requests: int, rounds: int) -> None:
+    token = await create_token()
+    # the lookup provisions the default provider on the first request
+    await lookup_provider_per_current_user(f"Bearer {token}")
+
+    queries = QueryCounter()
+    apps = {label: build_app(stack) for label, stack in STACKS.items()}
+    best = {label: float("inf") for label in STACKS}
+    per_request = {}
+    for _ in range(rounds):
+        for label, app in apps.items():
+            seconds, per_request[label] = await measure(app, token, requests, queries)
+            best[label] = min(best[label], seconds)
+
+    print(
+        f"{'middlewares':>20} {'per request, ms':>16} {'overhead, ms':>13} "
+        f"{'queries':>8}"
+    )
+    for label, seconds in best.items():
+        overhead = seconds - best["none"]
+        print(
+            f"{label:>20} {seconds * 1e3:>16.3f} {overhead * 1e3:>13.3f} "
+            f"{per_request[label]:>8.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
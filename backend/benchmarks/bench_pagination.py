@@ -0,0 +1,140 @@
+"""
+Cost of a chat history page at increasing depth, with LIMIT/OFFSET and with
+the (created_at, id) cursors of `KeysetPaginator`.
+
+Seeds one conversation with `--messages` messages, then fetches a page of
+`--per-page` messages at several depths. The offset mode runs the query the
+previous paginator ran: LIMIT/OFFSET plus a count(*) over the whole history.
+The cursor mode starts from the cursor of the row right before the page.
+
+Run from the backend directory, with migrations applied:
+    python -m benchmarks.bench_pagination
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, func, insert, select
+from src.db.session import async_session
+from src.models import ChatConversation, ChatMessage, User
+from src.repositories.user import user_repo
+from src.schemas.api.user.schemas import UserCreate
+from src.utils.pagination import KeysetPaginator, encode_cursor
+
+
+async def seed(messages: int) -> tuple[uuid.UUID, uuid.UUID]:
+    async with async_session() as db:
+        user = await user_repo.register(
+            db,
+            obj_in=UserCreate(
+                username=f"Bench{uuid.uuid4().hex[:8]}", password="Bench-pass-1!"
+            ),
+        )
+        user_id, session_id = user.id, uuid.uuid4()
+        started = datetime.now()
+        await db.execute(
+            insert(ChatConversation).values(
+                session_id=session_id, title="bench", creator_id=user_id
+            )
+        )
+        for start in range(0, messages, 1000):
+            await db.execute(
+                insert(ChatMessage).values(
+                    [
+                        {
+                            "sender_type": "user",
+                            "content": f"message {i}",
+                            "request_id": uuid.uuid4(),
+                            "conversation_id": session_id,
+                            "created_at": started + timedelta(milliseconds=i),
+                        }
+                        for i in range(start, min(start + 1000, messages))
+                    ]
+                )
+            )
+        await db.commit()
+    return user_id, session_id
+
+
+def history_query(user_id: uuid.UUID, session_id: uuid.UUID):
+    return (
+        select(ChatMessage)
+        .join(ChatConversation.messages)
+        .where(
+            and_(
+                ChatConversation.session_id == session_id,
+                ChatConversation.creator_id == user_id,
+            )
+        )
+    )
+
+
+async def offset_page(db, query, depth: int, per_page: int) -> None:
+    ordered = query.order_by(ChatMessage.created_at.desc())
+    (await db.scalars(ordered.limit(per_page).offset(depth))).all()
+    await db.scalar(select(func.count()).select_from(query.subquery()))
+
+
+async def cursor_page(db, query, cursor, per_page: int) -> None:
+    await KeysetPaginator(db, query, ChatMessage, per_page, cursor=cursor).get_page()
+
+
+async def best_of(repeat: int, coro_factory) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coro_factory()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+async def run(args: argparse.Namespace) -> None:
+    user_id, session_id = await seed(args.messages)
+    query = history_query(user_id, session_id)
+    depths = [d for d in (0, 1000, 5000, 10000, 50000) if d < args.messages]
+
+    print(f"{'depth':>8} {'offset, ms':>11} {'cursor, ms':>11}")
+    try:
+        async with async_session() as db:
+            for depth in depths:
+                cursor = None
+                if depth:
+                    row = (
+                        await db.execute(
+                            query.with_only_columns(
+                                ChatMessage.created_at, ChatMessage.id
+                            )
+                            .order_by(ChatMessage.created_at.desc())
+                            .offset(depth - 1)
+                            .limit(1)
+                        )
+                    ).first()
+                    cursor = encode_cursor(*row, backwards=False)
+
+                by_offset = await best_of(
+                    args.repeat, lambda: offset_page(db, query, depth, args.per_page)
+                )
+                by_cursor = await best_of(
+                    args.repeat, lambda: cursor_page(db, query, cursor, args.per_page)
+                )
+                print(f"{depth:>8} {by_offset * 1e3:>11.2f} {by_cursor * 1e3:>11.2f}")
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
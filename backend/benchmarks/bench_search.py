@@ -0,0 +1,140 @@
+"""
+Agent search with `description ILIKE '%query%'` and with the ranked full-text
+search backed by the `ix_agents_search` GIN index.
+
+Seeds `--agents` agents with generated names and descriptions for one user,
+then runs every query `--repeat` times with both modes. Prints the best time,
+the number of matches and whether Postgres used the index.
+
+Run from the backend directory, with migrations applied:
+    python -m benchmarks.bench_search
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from sqlalchemy import delete, insert, text
+from src.db.session import async_session
+from src.models import Agent, User
+from src.repositories.agent import agent_repo
+from src.repositories.user import user_repo
+from src.schemas.api.user.schemas import UserCreate
+
+WORDS = (
+    "weather forecast translate invoice summarize email calendar schedule "
+    "search web crawl scrape image resize convert currency exchange stock "
+    "price news report analyze sentiment classify extract entities table "
+    "database query sql chart plot payment refund order shipping track "
+    "flight hotel booking recipe nutrition fitness music playlist lyrics "
+    "code review test deploy monitor alert incident ticket support chat"
+).split()
+QUERIES = ("weather", "invoice payment", "sentiment", "flight hotel")
+
+
+def describe(rng: random.Random) -> str:
+    return " ".join(rng.choices(WORDS, k=12)).capitalize()
+
+
+async def seed(agents: int) -> User:
+    rng = random.Random(42)
+    async with async_session() as db:
+        user = await user_repo.register(
+            db,
+            obj_in=UserCreate(
+                username=f"Bench{uuid.uuid4().hex[:8]}", password="Bench-pass-1!"
+            ),
+        )
+        for start in range(0, agents, 1000):
+            await db.execute(
+                insert(Agent).values(
+                    [
+                        {
+                            "name": f"{rng.choice(WORDS)}_agent_{i}",
+                            "description": describe(rng),
+                            "alias": uuid.uuid4().hex,
+                            "jwt": uuid.uuid4().hex,
+                            "creator_id": user.id,
+                            "input_parameters": {},
+                            "is_active": False,
+                        }
+                        for i in range(start, min(start + 1000, agents))
+                    ]
+                )
+            )
+        await db.execute(text("ANALYZE agents"))
+        await db.commit()
+        await db.refresh(user)
+    return user
+
+
+async def uses_index(db, method, **kwargs) -> bool:
+    statements = []
+
+    async def capture(q, *args, **kw):
+        statements.append(q)
+        return await original(q, *args, **kw)
+
+    original = db.scalars
+    db.scalars = capture
+    try:
+        await method(db=db, **kwargs)
+    finally:
+        db.scalars = original
+
+    compiled = statements[0].compile(
+        dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = await db.execute(text(f"EXPLAIN {compiled}"))
+    return any("ix_agents_search" in line for (line,) in plan)
+
+
+async def measure(db, method, repeat: int, **kwargs) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await method(db=db, **kwargs)
+        best = min(best, time.perf_counter() - started)
+    return best, len(result.items)
+
+
+async def run(args: argparse.Namespace) -> None:
+    user = await seed(args.agents)
+    print(f"{'query':>18} {'mode':>10} {'ms':>8} {'matches':>8} {'index':>6}")
+    try:
+        async with async_session() as db:
+            for query in QUERIES:
+                modes = {
+                    "ILIKE": (
+                        agent_repo.search_agents_by_description,
+                        {"description_query": query},
+                    ),
+                    "full-text": (agent_repo.search_agents, {"search": query}),
+                }
+                for label, (method, kwargs) in modes.items():
+                    kwargs = {**kwargs, "user_model": user, "limit": args.limit}
+                    seconds, matches = await measure(db, method, args.repeat, **kwargs)
+                    indexed = await uses_index(db, method, **kwargs)
+                    print(
+                        f"{query:>18} {label:>10} {seconds * 1e3:>8.2f} "
+                        f"{matches:>8} {'yes' if indexed else 'no':>6}"
+                    )
+    finally:
+        async with async_session() as db:
+            await db.execute(delete(User).where(User.id == user.id))
+            await db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
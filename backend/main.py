@@ -22,6 +22,11 @@ from src.routes.files.routes import files_router
 from src.routes.websocket import ws_router
 from src.utils.jobs import run_startup_jobs
 from src.utils.message_handler_validator import message_handler_validator
+from src.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    PREVIOUS_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+)
 from src.utils.setup_logger import init_logging
 
 init_logging()
@@ -66,6 +71,7 @@ async def lifespan(app: FastAPI):
             agent_description: Optional[str] = "",
             agent_input_schema: Optional[dict] = None,
             agent_jwt: Optional[str] = None,
+            logs: Optional[list[dict]] = None,
         ):
             await message_handler_validator(
                 session=session,
@@ -80,6 +86,7 @@ async def lifespan(app: FastAPI):
                 message_type=message_type,
                 state=app.state,
                 jwt_token=agent_jwt,
+                logs=logs,
             )
 
         logger.info("GenAI Session started")
@@ -129,6 +136,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, PREVIOUS_CURSOR_HEADER, TOTAL_COUNT_HEADER],
 )
 app.add_middleware(PaginationMiddleware)
 app.add_middleware(ProviderLookupMiddleware)
@@ -0,0 +1,85 @@
+import hashlib
+import time
+from typing import Optional, Union
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import ORMExecuteState, Session, make_transient_to_detached
+from src.auth.jwt import decode_token
+from src.core.settings import get_settings
+from src.models import User
+from src.schemas.api.agent.schemas import AgentJWTTokenPayload
+from src.schemas.api.auth.jwt import TokenPayload
+from src.utils.cache import TTLCache
+
+settings = get_settings()
+
+# keyed by the token hash, so the cache does not hold usable tokens
+token_payloads: TTLCache[str, Union[AgentJWTTokenPayload, TokenPayload]] = TTLCache(
+    maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL
+)
+# column values of users by id
+users: TTLCache[str, dict] = TTLCache(
+    maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL
+)
+
+
+def get_token_payload(
+    token: str,
+) -> Optional[Union[AgentJWTTokenPayload, TokenPayload]]:
+    """
+    Decodes a token, a token decoded before is not decoded again until it expires.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = token_payloads.get(key)
+    if payload is None:
+        payload = decode_token(token)
+        if payload:
+            token_payloads.set(key, payload)
+        return payload
+
+    if payload.exp is not None and payload.exp <= time.time():
+        token_payloads.pop(key)
+        return None
+    return payload
+
+
+def get_cached_user(user_id: str) -> Optional[User]:
+    """
+    Returns a detached copy of a cached user, every caller gets its own instance.
+    Only column attributes are loaded.
+    """
+    columns = users.get(str(user_id))
+    if columns is None:
+        return None
+    user = User(**columns)
+    make_transient_to_detached(user)
+    return user
+
+
+def cache_user(user: User) -> None:
+    users.set(
+        str(user.id),
+        {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs},
+    )
+
+
+def invalidate_user(user_id: str) -> None:
+    users.pop(str(user_id))
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User) -> None:
+    invalidate_user(target.id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_bulk_changed_users(orm_execute_state: ORMExecuteState):
+    # bulk update() and delete() skip the per-object events and don't tell which rows
+    # they changed, so every cached user is dropped once the statement ran
+    if (
+        orm_execute_state.is_update or orm_execute_state.is_delete
+    ) and orm_execute_state.bind_mapper is inspect(User):
+        result = orm_execute_state.invoke_statement()
+        users.clear()
+        return result
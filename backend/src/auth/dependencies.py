@@ -1,11 +1,10 @@
-from typing import Annotated
-
-from pydantic import ValidationError
+from typing import Annotated, Optional
 
 from src.schemas.api.agent.schemas import AgentJWTTokenPayload
 from src.models import User
 from src.db.session import AsyncDBSession
-from src.auth.jwt import validate_token, TokenLifespanType
+from src.auth.cache import cache_user, get_cached_user, get_token_payload
+from src.auth.jwt import TokenLifespanType, get_token_lifespan_type
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from src.repositories.user import user_repo
@@ -20,24 +19,32 @@ CREDENTIALS_EXCEPTION = HTTPException(
 
 
 async def _get_user_by_token(
-    token: str, db: AsyncDBSession, lifespan_type: TokenLifespanType
-):
-    try:
-        payload = validate_token(token, lifespan_type=lifespan_type)
-        if not payload:
-            raise CREDENTIALS_EXCEPTION
+    token: str, db: AsyncDBSession, lifespan_type: Optional[TokenLifespanType]
+) -> Optional[User]:
+    """
+    Resolves the user of a token, `lifespan_type` None accepts both token types.
+    Decoded tokens and users are cached, so a repeated token does not query the database.
+    """
+    payload = get_token_payload(token)
+    if not payload:
+        raise CREDENTIALS_EXCEPTION
+
+    if lifespan_type and get_token_lifespan_type(payload) != lifespan_type:
+        return None
 
-        if isinstance(payload, AgentJWTTokenPayload):
-            id_ = payload.user_id
-        else:
-            id_ = payload.sub
+    if isinstance(payload, AgentJWTTokenPayload):
+        id_ = payload.user_id
+    else:
+        id_ = payload.sub
 
-        user = await user_repo.get(db=db, id_=id_)
-        if not user:
-            return None
+    if user := get_cached_user(id_):
         return user
-    except ValidationError:
+
+    user = await user_repo.get(db=db, id_=id_)
+    if not user:
         return None
+    cache_user(user)
+    return user
 
 
 async def get_current_user(
@@ -54,28 +61,11 @@ async def get_current_user(
 async def get_user_by_user_or_agent_token(
     token: Annotated[str, Depends(oauth2_scheme)], db: AsyncDBSession
 ):
-    try:
-        user_by_jwt = await _get_user_by_token(
-            token=token, db=db, lifespan_type=TokenLifespanType.api
-        )
-        user_by_agent_jwt = await _get_user_by_token(
-            token=token, db=db, lifespan_type=TokenLifespanType.cli
-        )
-
-        if not any([user_by_jwt, user_by_agent_jwt]):
-            raise CREDENTIALS_EXCEPTION
-
-        if user_by_jwt:
-            return user_by_jwt
-
-        if user_by_agent_jwt:
-            return user_by_agent_jwt
-
-    except ValidationError:
-        raise HTTPException(
-            status_code=400,
-            detail="Expected either genai user JWT token or agent JWT token. Please verify your 'Authorization' header",  # noqa: E501
-        )
+    # the token type is known from its claims, so only one lookup is needed
+    user = await _get_user_by_token(token=token, db=db, lifespan_type=None)
+    if not user:
+        raise CREDENTIALS_EXCEPTION
+    return user
 
 
 CurrentUserDependency = Annotated[User, Depends(get_current_user)]
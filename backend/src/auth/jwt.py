@@ -3,12 +3,12 @@ import jwt
 
 from typing import Optional, Union
 from datetime import timedelta, datetime
+from pydantic import ValidationError
 from src.core.settings import get_settings
 
 from src.schemas.api.agent.schemas import AgentJWTTokenPayload
 from src.schemas.api.auth.jwt import TokenPayload
 
-
 settings = get_settings()
 SECRET_KEY = settings.SECRET_KEY
 HASH_ALGORITHM = settings.HASH_ALGORITHM
@@ -69,3 +69,35 @@ def validate_token(
         return None
     except jwt.DecodeError:
         return None
+
+
+def decode_token(token: str) -> Optional[Union[AgentJWTTokenPayload, TokenPayload]]:
+    """
+    Validates a token of either lifespan type with a single decode.
+
+    Agent (`cli`) tokens are told apart from user (`api`) tokens by their `user_id` claim.
+
+    Args:
+        token (str): The encoded JWT token.
+
+    Returns:
+        Optional[Union[AgentJWTTokenPayload, TokenPayload]]: The payload, None if the
+    token is invalid or expired.
+    """
+    try:
+        payload: dict = jwt.decode(
+            jwt=token, key=SECRET_KEY, algorithms=[HASH_ALGORITHM]
+        )
+        if "user_id" in payload:
+            return AgentJWTTokenPayload(**payload)
+        return TokenPayload(**payload)
+    except (jwt.ExpiredSignatureError, jwt.DecodeError, ValidationError):
+        return None
+
+
+def get_token_lifespan_type(
+    payload: Union[AgentJWTTokenPayload, TokenPayload],
+) -> TokenLifespanType:
+    if isinstance(payload, AgentJWTTokenPayload):
+        return TokenLifespanType.cli
+    return TokenLifespanType.api
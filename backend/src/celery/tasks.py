@@ -3,6 +3,7 @@ import logging
 
 from celery_singleton import Singleton
 from src.celery.celery_app import celery_app
+from src.db.session import engine
 from src.utils.lookup_a2a_agent import lookup_a2a_agents
 from src.utils.lookup_mcp_server import lookup_mcp_servers
 
@@ -14,7 +15,11 @@ async def refresh_mcp_a2a_data():
         asyncio.create_task(lookup_mcp_servers()),
         asyncio.create_task(lookup_a2a_agents()),
     ]
-    await asyncio.gather(*tasks)
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # pooled connections belong to this event loop, every task run gets a new one
+        await engine.dispose()
 
 
 @celery_app.task(base=Singleton, bind=True)
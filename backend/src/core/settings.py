@@ -28,6 +28,18 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = Field(default="5432")
     SQLALCHEMY_ASYNC_DATABASE_URI: Optional[str] = None
 
+    # connection pool of the async engine, disabled means a new connection per session
+    DB_POOL_ENABLED: bool = Field(default=True)
+    DB_POOL_SIZE: int = Field(default=10)
+    DB_MAX_OVERFLOW: int = Field(default=20)
+    # seconds to wait for a free connection before giving up
+    DB_POOL_TIMEOUT: float = Field(default=30)
+    # seconds after which a connection is replaced, -1 keeps connections forever
+    DB_POOL_RECYCLE: int = Field(default=1800)
+    DB_POOL_PRE_PING: bool = Field(default=True)
+    # asyncpg prepared statements cached per connection, 0 for pgbouncer in transaction mode
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100)
+
     ROUTER_WS_URL: str = Field(default="ws://genai-router:8080/ws")
     MASTER_BE_API_KEY: str = Field(
         default="7a3fd399-3e48-46a0-ab7c-0eaf38020283::master_server_be"
@@ -44,6 +56,16 @@ class Settings(BaseSettings):
 
     CELERY_BEAT_INTERVAL_MINUTES: int = Field(default=1)
 
+    # optional redis shared by the backend processes for their caches, e.g. redis://genai-redis:6379/2
+    CACHE_REDIS_URI: Optional[str] = Field(default=None)
+    # users known to have the default `genai` provider, skips its lookup on every request
+    DEFAULT_PROVIDER_CACHE_TTL: int = Field(default=3600)
+    DEFAULT_PROVIDER_CACHE_SIZE: int = Field(default=10000)
+    # decoded tokens and the users they belong to, changes of a user are seen after the TTL
+    # by the other backend processes
+    AUTH_CACHE_TTL: int = Field(default=60)
+    AUTH_CACHE_SIZE: int = Field(default=10000)
+
     GENAI_PROVIDER_URL: str = Field(default="https://proxy-openai.chi-6ec.workers.dev")
 
     @model_validator(mode="after")
@@ -0,0 +1,80 @@
+import time
+from collections import deque
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from src.schemas.api.metrics.dto import DBPoolStatsDTO
+
+
+class PoolMetrics:
+    """
+    Checkout latency of the engine pool. Percentiles are computed over the most
+    recent checkouts only.
+    """
+
+    def __init__(self, window: int = 1024):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.checkout_seconds = 0.0
+        self.max_checkout_seconds = 0.0
+        self.recent: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.checkout_seconds += seconds
+        self.max_checkout_seconds = max(self.max_checkout_seconds, seconds)
+        self.recent.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(int(len(ordered) * q / 100), len(ordered) - 1)]
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long every checkout waited for a connection,
+    including the time to open a new one.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.timeouts += 1
+            raise
+        pool_metrics.record(time.perf_counter() - started)
+        return connection
+
+
+def get_pool_stats(engine: AsyncEngine) -> DBPoolStatsDTO:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return DBPoolStatsDTO(pooled=False)
+
+    return DBPoolStatsDTO(
+        pooled=True,
+        size=pool.size(),
+        checked_in=pool.checkedin(),
+        # overflow() is negative while the pool is not filled up yet
+        in_use=pool.checkedout(),
+        overflow=max(pool.overflow(), 0),
+        max_overflow=pool._max_overflow,
+        checkouts=pool_metrics.checkouts,
+        checkout_timeouts=pool_metrics.timeouts,
+        checkout_ms_avg=(
+            pool_metrics.checkout_seconds / pool_metrics.checkouts * 1e3
+            if pool_metrics.checkouts
+            else 0.0
+        ),
+        checkout_ms_p50=pool_metrics.percentile(50) * 1e3,
+        checkout_ms_p95=pool_metrics.percentile(95) * 1e3,
+        checkout_ms_p99=pool_metrics.percentile(99) * 1e3,
+        checkout_ms_max=pool_metrics.max_checkout_seconds * 1e3,
+    )
@@ -0,0 +1,33 @@
+from sqlalchemy import Computed, ColumnElement, Select, func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import mapped_column
+
+SEARCH_CONFIG = "english"
+WEIGHTS = ("A", "B", "C", "D")
+
+
+def search_vector_column(*columns: str):
+    """
+    Stored tsvector generated from the text columns, the first one weighs the most.
+    It is deferred, so the rows loaded through the ORM do not carry it around.
+    """
+    document = " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce({column}, '')), "
+        f"'{weight}')"
+        for weight, column in zip(WEIGHTS, columns)
+    )
+    return mapped_column(
+        TSVECTOR, Computed(document, persisted=True), nullable=True, deferred=True
+    )
+
+
+def ranked_search(query: Select, vector: ColumnElement, search: str) -> Select:
+    """
+    Filters the query to the rows matching the search terms, best matches first.
+
+    The terms follow the web search syntax: quoted phrases, `or` and `-excluded`.
+    """
+    ts_query = func.websearch_to_tsquery(text(f"'{SEARCH_CONFIG}'::regconfig"), search)
+    return query.where(vector.op("@@")(ts_query)).order_by(
+        func.ts_rank_cd(vector, ts_query).desc()
+    )
@@ -4,15 +4,32 @@ from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import NullPool
 from src.core.settings import get_settings
+from src.db.pool import TimedAsyncAdaptedQueuePool
 
 settings = get_settings()
 
+if settings.DB_POOL_ENABLED:
+    pool_params = {
+        "poolclass": TimedAsyncAdaptedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+else:
+    pool_params = {"poolclass": NullPool, "pool_pre_ping": True}
+
 engine = create_async_engine(
     settings.SQLALCHEMY_ASYNC_DATABASE_URI,
-    poolclass=NullPool,
     future=True,
     # echo=settings.DEBUG,
-    pool_pre_ping=True,
+    connect_args={
+        # statements prepared by sqlalchemy and by asyncpg itself
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    },
+    **pool_params,
 )
 async_session = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -23,7 +40,8 @@ async def get_db() -> AsyncGenerator:
 
 
 def get_middleware_db(request: Request) -> AsyncSession:
-    return request.state.db
+    # the session is opened by DBSessionMiddleware on first access
+    return request.state.db.session
 
 
 AsyncDBSession = Annotated[AsyncSession, Depends(get_db)]
@@ -1,10 +1,48 @@
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.db.session import async_session
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class LazyDBSession:
+    """
+    Database session of a request, it's created on first access so requests that
+    never use it don't pay for it.
+    """
+
+    def __init__(self):
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = async_session()
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class DBSessionMiddleware:
+    """
+    Pure ASGI middleware that exposes a lazy session as `request.state.db` and
+    closes it once the response is sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class DBSessionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        async with async_session() as db:
-            request.state.db = db
-            return await call_next(request)
-        return await super().dispatch(request, call_next)
+        db = LazyDBSession()
+        scope.setdefault("state", {})["db"] = db
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await db.close()
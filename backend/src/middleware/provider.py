@@ -1,75 +1,90 @@
 from contextvars import ContextVar
+from logging import getLogger
+from typing import Optional
 
-from sqlalchemy import and_, select
-from sqlalchemy.exc import IntegrityError
-from src.auth.jwt import TokenLifespanType, validate_token
+from redis.exceptions import RedisError
+from src.auth.cache import get_token_payload
+from src.auth.jwt import TokenLifespanType, get_token_lifespan_type
 from src.core.settings import get_settings
 from src.db.session import async_session
-from src.models import ModelConfig, ModelProvider, User
-from src.utils.constants import DEFAULT_SYSTEM_PROMPT
-from starlette.middleware.base import BaseHTTPMiddleware
+from src.repositories.model_config import model_config_repo
+from src.utils.cache import TTLCache, get_shared_cache
+from starlette.datastructures import Headers
 from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 settings = get_settings()
+logger = getLogger(__name__)
 request_object: ContextVar[Request] = ContextVar("request")
 
+SHARED_CACHE_KEY = "genai:default-provider:{user_id}"
 
-async def lookup_provider_per_current_user(request: Request, call_next):
-    auth_header = request.headers.get("Authorization")
+# ids of the users that are known to have the default provider
+default_provider_users: TTLCache[str, bool] = TTLCache(
+    maxsize=settings.DEFAULT_PROVIDER_CACHE_SIZE,
+    ttl=settings.DEFAULT_PROVIDER_CACHE_TTL,
+)
+
+
+async def _is_provisioned(user_id: str) -> bool:
+    if default_provider_users.get(user_id):
+        return True
+
+    shared_cache = get_shared_cache()
+    if not shared_cache:
+        return False
+    try:
+        if await shared_cache.exists(SHARED_CACHE_KEY.format(user_id=user_id)):
+            default_provider_users.set(user_id, True)
+            return True
+    except RedisError:
+        logger.warning("Shared cache is not available, looking up the provider")
+    return False
+
+
+async def _mark_provisioned(user_id: str) -> None:
+    default_provider_users.set(user_id, True)
+
+    shared_cache = get_shared_cache()
+    if not shared_cache:
+        return
+    try:
+        await shared_cache.set(
+            SHARED_CACHE_KEY.format(user_id=user_id),
+            1,
+            ex=settings.DEFAULT_PROVIDER_CACHE_TTL,
+        )
+    except RedisError:
+        logger.warning("Shared cache is not available, provider is cached locally")
+
+
+async def lookup_provider_per_current_user(auth_header: Optional[str]) -> None:
     if not auth_header or not auth_header.startswith("Bearer "):
-        response = await call_next(request)
-        return response
+        return
 
-    token = validate_token(
-        token=auth_header.rsplit(" ")[-1], lifespan_type=TokenLifespanType.api
-    )
-    if not token:
-        return await call_next(request)
+    token = get_token_payload(auth_header.rsplit(" ")[-1])
+    if not token or get_token_lifespan_type(token) != TokenLifespanType.api:
+        return
 
-    user_id = token.sub
+    user_id = str(token.sub)
+    if await _is_provisioned(user_id):
+        return
 
     async with async_session() as db:
-        existing_user = await db.scalar(select(User).where(User.id == user_id))
-        if not existing_user:
-            return await call_next(request)
+        provisioned = await model_config_repo.provision_default_provider(
+            db=db, user_id=user_id, base_url=settings.GENAI_PROVIDER_URL
+        )
+    if provisioned:
+        await _mark_provisioned(user_id)
+
 
-        existing_provider = await db.scalar(
-            select(ModelProvider).where(
-                and_(ModelProvider.name == "genai", ModelProvider.creator_id == user_id)
+class ProviderLookupMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            await lookup_provider_per_current_user(
+                auth_header=Headers(scope=scope).get("Authorization")
             )
-        )
-        if not existing_provider:
-            try:
-                default_provider = ModelProvider(
-                    name="genai",
-                    provider_metadata={"base_url": settings.GENAI_PROVIDER_URL},
-                    creator_id=user_id,
-                )
-                db.add(default_provider)
-                await db.commit()
-                await db.refresh(default_provider)
-
-                default_config = ModelConfig(
-                    name="default",
-                    model="gpt-4o",
-                    provider_id=default_provider.id,
-                    creator_id=user_id,
-                    temperature=0.7,
-                    credentials={},
-                    system_prompt=DEFAULT_SYSTEM_PROMPT,
-                )
-                db.add(default_config)
-                await db.commit()
-                await db.refresh(default_config)
-                return await call_next(request)
-            except IntegrityError:
-                pass
-
-    return await call_next(request)
-
-
-class ProviderLookupMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        return await lookup_provider_per_current_user(
-            request=request, call_next=call_next
-        )
+        await self.app(scope, receive, send)
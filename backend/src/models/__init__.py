@@ -1,7 +1,7 @@
 import uuid
 from typing import List
 
-from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy import ForeignKey, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -16,6 +16,7 @@ from src.db.annotations import (
     uuid_pk,
 )
 from src.db.base import Base
+from src.db.search import search_vector_column
 from src.utils.enums import SenderType
 
 
@@ -129,7 +130,7 @@ class Agent(Base):
 
     jwt: Mapped[str] = mapped_column(unique=True)
     creator_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=True
     )
     creator: Mapped["User"] = relationship(back_populates="agents")  # noqa: F821
 
@@ -140,10 +141,27 @@ class Agent(Base):
     last_invoked_at: Mapped[last_invoked_at]
     is_active: Mapped[bool] = mapped_column(nullable=False)
 
+    search_vector: Mapped[str] = search_vector_column("name", "description")
+
     projects: Mapped[List["Project"]] = relationship(
         secondary="agent_project_associations", back_populates="agents"
     )
 
+    __table_args__ = (
+        # active agents of a user, newest first
+        Index(
+            "ix_agents_creator_id_is_active_created_at",
+            "creator_id",
+            "is_active",
+            "created_at",
+        ),
+        # cursor pagination of the agents of a user
+        Index("ix_agents_creator_id_created_at_id", "creator_id", "created_at", "id"),
+    )
+
+
+Index("ix_agents_search", Agent.search_vector, postgresql_using="gin")
+
 
 class AgentWorkflow(Base):
     id: Mapped[uuid_pk]
@@ -198,12 +216,8 @@ class Team(Base):
 class Log(Base):
     id: Mapped[int_pk]
 
-    session_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), index=True, nullable=False
-    )
-    request_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), index=True, nullable=False
-    )
+    session_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    request_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
     agent_id: Mapped[str] = mapped_column(index=True, nullable=True)
     creator_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True
@@ -216,6 +230,12 @@ class Log(Base):
     message: Mapped[str] = mapped_column(nullable=False)
     log_level: Mapped[str] = mapped_column(nullable=False)  # TODO: enum
 
+    # logs of a session/request in cursor pagination order
+    __table_args__ = (
+        Index("ix_logs_session_id_created_at_id", "session_id", "created_at", "id"),
+        Index("ix_logs_request_id_created_at_id", "request_id", "created_at", "id"),
+    )
+
 
 class File(Base):
     id: Mapped[uuid_pk]
@@ -227,7 +247,7 @@ class File(Base):
         UUID(as_uuid=True), index=True, nullable=True
     )
     creator_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=True
     )
     creator: Mapped["User"] = relationship(back_populates="files")
     mimetype: Mapped[str]
@@ -238,6 +258,13 @@ class File(Base):
     )
     from_agent: Mapped[bool]
 
+    created_at: Mapped[created_at]
+
+    # cursor pagination of the files of a user
+    __table_args__ = (
+        Index("ix_files_creator_id_created_at_id", "creator_id", "created_at", "id"),
+    )
+
 
 class ModelProvider(Base):
     id: Mapped[uuid_pk]
@@ -314,6 +341,8 @@ class MCPServer(Base):
 
     __table_args__ = (
         UniqueConstraint("creator_id", "server_url", name="uq_mcp_server_url"),
+        # lookups by url of the lookup job, across users
+        Index("ix_mcpservers_server_url", "server_url"),
     )
 
     def __repr__(self) -> str:
@@ -338,6 +367,11 @@ class MCPTool(Base):
     created_at: Mapped[created_at]
     updated_at: Mapped[updated_at]
 
+    search_vector: Mapped[str] = search_vector_column("name", "description")
+
+
+Index("ix_mcptools_search", MCPTool.search_vector, postgresql_using="gin")
+
 
 class A2ACard(Base):
     id: Mapped[uuid_pk]
@@ -359,11 +393,19 @@ class A2ACard(Base):
     creator_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True
     )
+
+    search_vector: Mapped[str] = search_vector_column("name", "description")
+
     __table_args__ = (
         UniqueConstraint("creator_id", "server_url", name="uq_a2a_card_server_url"),
+        # lookups by url of the lookup job, across users
+        Index("ix_a2acards_server_url", "server_url"),
     )
 
 
+Index("ix_a2acards_search", A2ACard.search_vector, postgresql_using="gin")
+
+
 class ChatMessage(Base):
     id: Mapped[uuid_pk]
 
@@ -381,10 +423,19 @@ class ChatMessage(Base):
     conversation_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("chatconversations.session_id", ondelete="CASCADE"),
         nullable=True,
-        index=True,
     )
     conversation: Mapped["ChatConversation"] = relationship(back_populates="messages")
 
+    # history of a conversation in cursor pagination order
+    __table_args__ = (
+        Index(
+            "ix_chatmessages_conversation_id_created_at_id",
+            "conversation_id",
+            "created_at",
+            "id",
+        ),
+    )
+
 
 class ChatConversation(Base):
     """Chat history"""
@@ -396,7 +447,7 @@ class ChatConversation(Base):
     updated_at: Mapped[updated_at]
 
     creator_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=True
     )
     creator: Mapped["User"] = relationship(back_populates="conversations")
 
@@ -404,6 +455,11 @@ class ChatConversation(Base):
         back_populates="conversation", cascade="all, delete"
     )
 
+    # chats of a user, newest first
+    __table_args__ = (
+        Index("ix_chatconversations_creator_id_created_at", "creator_id", "created_at"),
+    )
+
 
 class UserProfile(Base):
     id: Mapped[uuid.UUID] = mapped_column(
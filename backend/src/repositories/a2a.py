@@ -10,6 +10,7 @@ from pydantic import AnyHttpUrl
 from sqlalchemy import and_, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.search import ranked_search
 from src.models import A2ACard, User
 from src.repositories.base import CRUDBase
 from src.schemas.a2a.dto import A2ACardDTO
@@ -63,6 +64,23 @@ class A2ARepository(CRUDBase[A2ACard, A2AAgentCard, A2AAgentCard]):
         )
         return q.first()
 
+    async def list_inactive_card_ids(
+        self, db: AsyncSession, server_url: str
+    ) -> list[UUID]:
+        """
+        Returns: ids of the inactive cards on the url, read before the cards are
+        updated as active again
+        """
+        q = await db.scalars(
+            select(self.model.id).where(
+                and_(
+                    self.model.server_url == server_url,
+                    self.model.is_active.is_(False),
+                )
+            )
+        )
+        return q.all()
+
     async def update_card(
         self, db: AsyncSession, server_url: str, card_in: A2AAgentCardSchema
     ):
@@ -189,6 +207,22 @@ class A2ARepository(CRUDBase[A2ACard, A2AAgentCard, A2AAgentCard]):
         cards = [A2ACardDTO(**c.__dict__) for c in q.all()]
         return await self._orm_cards_to_dto(cards=cards)
 
+    async def search_cards(
+        self, db: AsyncSession, user_id: UUID, search: str, limit: int, offset: int
+    ):
+        """
+        Full-text search of the cards by name and description, ranked by relevance.
+        """
+        q = ranked_search(
+            select(self.model).where(self.model.creator_id == user_id),
+            vector=self.model.search_vector,
+            search=search,
+        )
+        cards = await db.scalars(q.limit(limit).offset(offset))
+        return await self._orm_cards_to_dto(
+            cards=[A2ACardDTO(**c.__dict__) for c in cards.all()]
+        )
+
     async def get_one_card(
         self, db: AsyncSession, user_model: User, id_: UUID
     ) -> AgentDTOPayload:
@@ -230,14 +264,25 @@ class A2ARepository(CRUDBase[A2ACard, A2AAgentCard, A2AAgentCard]):
             is_active=True,
         )
 
-    async def set_as_inactive(self, db: AsyncSession, server_url: str):
-        await db.execute(
+    async def set_as_inactive(self, db: AsyncSession, server_url: str) -> list[UUID]:
+        """
+        Returns: ids of the cards that were active until now
+        """
+        q = await db.scalars(
             update(self.model)
-            .where(self.model.server_url == server_url)
+            .where(
+                and_(
+                    self.model.server_url == server_url,
+                    self.model.is_active.is_(True),
+                )
+            )
             .values({"is_active": False})
+            .returning(self.model.id)
         )
+        card_ids = q.all()
         await db.commit()
         logger.info(f"Set {server_url} as inactive")
+        return card_ids
 
 
 a2a_repo = A2ARepository(A2ACard)
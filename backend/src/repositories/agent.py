@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from sqlalchemy import and_, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.auth.jwt import TokenLifespanType, create_access_token, validate_token
+from src.db.search import ranked_search
 from src.models import A2ACard, Agent, AgentWorkflow, MCPTool, User
 from src.repositories.a2a import a2a_repo
 from src.repositories.base import CRUDBase
@@ -33,6 +34,7 @@ from src.utils.helpers import (
     map_genai_agent_to_unified_dto,
     mcp_tool_to_json_schema,
 )
+from src.utils.pagination import KeysetPaginator, Page
 
 
 class AgentRepository(CRUDBase[Agent, AgentCreate, AgentUpdate]):
@@ -209,25 +211,22 @@ class AgentRepository(CRUDBase[Agent, AgentCreate, AgentUpdate]):
             ],
         )
 
-    async def set_all_agents_inactive(self, db: AsyncSession) -> None:
+    async def set_all_agents_inactive(self, db: AsyncSession) -> int:
         """
         Set is_active=False for all agents in the database on startup of the backend
 
         Args:
             db: The database session.
 
-        Returns: None
+        Returns: number of agents that were active
         """
-        q = await db.execute(select(self.model))
-        agents = q.scalars().all()
-        if not agents:
-            return
-
-        for agent in agents:
-            agent.is_active = False
-
+        q = await db.execute(
+            update(self.model)
+            .where(self.model.is_active.is_(True))
+            .values(is_active=False)
+        )
         await db.commit()
-        return
+        return q.rowcount
 
     async def set_agent_as_inactive(
         self, db: AsyncSession, id_: str, user_id: str
@@ -289,20 +288,17 @@ class AgentRepository(CRUDBase[Agent, AgentCreate, AgentUpdate]):
         user_model: User,
         limit: int = 100,
         offset: int = 0,
-    ) -> list[Optional[Agent]]:
-        q = await db.execute(
-            select(self.model)
-            .where(
-                and_(
-                    self.model.name == agent_name,
-                    self.model.creator_id == str(user_model.id),
-                )
+        cursor: Optional[str] = None,
+    ) -> Page:
+        q = select(self.model).where(
+            and_(
+                self.model.name == agent_name,
+                self.model.creator_id == str(user_model.id),
             )
-            .limit(limit=limit)
-            .offset(offset=offset)
-            .order_by(self.model.created_at.desc())
         )
-        return q.scalars().all()
+        return await KeysetPaginator(
+            db, q, self.model, limit, cursor=cursor, offset=offset
+        ).get_page()
 
     async def find_agent_by_description(
         self, db: AsyncSession, description_query: str, user_model: User
@@ -324,38 +320,55 @@ class AgentRepository(CRUDBase[Agent, AgentCreate, AgentUpdate]):
         user_model: User,
         limit: int = 100,
         offset: int = 0,
-    ):
-        q = await db.execute(
-            select(self.model)
-            .where(
-                and_(
-                    self.model.description.ilike(f"%{description_query}%"),
-                    self.model.creator_id == str(user_model.id),
-                )
+        cursor: Optional[str] = None,
+    ) -> Page:
+        q = select(self.model).where(
+            and_(
+                self.model.description.ilike(f"%{description_query}%"),
+                self.model.creator_id == str(user_model.id),
             )
-            .limit(limit=limit)
-            .offset(offset=offset)
-            .order_by(self.model.created_at.desc())
         )
-        return q.scalars().all()
+        return await KeysetPaginator(
+            db, q, self.model, limit, cursor=cursor, offset=offset
+        ).get_page()
+
+    async def search_agents(
+        self,
+        db: AsyncSession,
+        search: str,
+        user_model: User,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> Page:
+        """
+        Full-text search of the agents by name and description, ranked by relevance.
+        """
+        q = ranked_search(
+            select(self.model).where(self.model.creator_id == user_model.id),
+            vector=self.model.search_vector,
+            search=search,
+        )
+        agents = await db.scalars(q.limit(limit).offset(offset))
+        return Page(items=agents.all())
 
     async def filter_out_empty_agents(
-        self, db: AsyncSession, user_model: User, limit: int, offset: int
-    ):
-        q = await db.scalars(
-            select(self.model)
-            .where(
-                and_(
-                    self.model.name != "",
-                    self.model.description != "",
-                    self.model.creator_id == user_model.id,
-                )
+        self,
+        db: AsyncSession,
+        user_model: User,
+        limit: int,
+        offset: int,
+        cursor: Optional[str] = None,
+    ) -> Page:
+        q = select(self.model).where(
+            and_(
+                self.model.name != "",
+                self.model.description != "",
+                self.model.creator_id == user_model.id,
             )
-            .order_by(self.model.created_at)
-            .limit(limit=limit)
-            .offset(offset=offset)
         )
-        return q.all()
+        return await KeysetPaginator(
+            db, q, self.model, limit, cursor=cursor, descending=False, offset=offset
+        ).get_page()
 
     async def query_by_filter(
         self,
@@ -364,7 +377,8 @@ class AgentRepository(CRUDBase[Agent, AgentCreate, AgentUpdate]):
         filter_field: AgentFilter,
         limit: int = 0,
         offset: int = 0,
-    ):
+        cursor: Optional[str] = None,
+    ) -> Page:
         if filter_field.name:
             agents = await self.list_agents_by_name(
                 db=db,
@@ -372,6 +386,7 @@ class AgentRepository(CRUDBase[Agent, AgentCreate, AgentUpdate]):
                 user_model=user_model,
                 limit=limit,
                 offset=offset,
+                cursor=cursor,
             )
             return agents
 
@@ -382,11 +397,21 @@ class AgentRepository(CRUDBase[Agent, AgentCreate, AgentUpdate]):
                 user_model=user_model,
                 limit=limit,
                 offset=offset,
+                cursor=cursor,
             )
             return agents
 
+        if filter_field.search:
+            return await self.search_agents(
+                db=db,
+                search=filter_field.search,
+                user_model=user_model,
+                limit=limit,
+                offset=offset,
+            )
+
         return await self.filter_out_empty_agents(
-            db=db, user_model=user_model, limit=limit, offset=offset
+            db=db, user_model=user_model, limit=limit, offset=offset, cursor=cursor
         )
 
     async def query_all_platform_agents(
@@ -1,8 +1,8 @@
-import copy
+from typing import Optional
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import and_, select
+from sqlalchemy import and_, insert, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
@@ -60,8 +60,9 @@ class ChatRepository(
         db: AsyncSession,
         user_id: UUID,
         session_id: UUID,
-        page: int,
         per_page: int,
+        cursor: Optional[str] = None,
+        with_count: bool = False,
     ):
         q = (
             select(ChatMessage)
@@ -72,10 +73,15 @@ class ChatRepository(
                     self.model.creator_id == user_id,
                 )
             )
-            .order_by(ChatMessage.created_at.desc())
         )
         return await paginate(
-            db=db, query=q, cast_to=GetChatMessage, page=page, per_page=per_page
+            db=db,
+            query=q,
+            model=ChatMessage,
+            cast_to=GetChatMessage,
+            per_page=per_page,
+            cursor=cursor,
+            with_count=with_count,
         )
 
     async def get_chat_by_session_id(
@@ -195,31 +201,42 @@ class ChatRepository(
         session_id: str,
         request_id: str,
         message_in: BaseChatMessage,
-    ):
-        user = copy.deepcopy(user_model)
-
-        chat = await self.get_chat_history_by_session_id(
-            db=db, user_model=user_model, session_id=session_id
+    ) -> GetChatMessage:
+        """
+        Appends a message to the chat and returns only the new message.
+        """
+        chat_exists = await db.scalar(
+            select(self.model.session_id).where(
+                and_(
+                    self.model.session_id == session_id,
+                    self.model.creator_id == user_model.id,
+                )
+            )
         )
-        if not chat:
+        if not chat_exists:
             raise HTTPException(
                 detail=f"Chat with session_id: '{session_id}' does not exist",
                 status_code=400,
             )
 
-        new_message = ChatMessage(
-            sender_type=message_in.sender_type,
-            content=message_in.content,
-            conversation_id=session_id,
-            request_id=request_id,
+        q = await db.execute(
+            insert(ChatMessage)
+            .values(
+                sender_type=message_in.sender_type,
+                content=message_in.content,
+                conversation_id=session_id,
+                request_id=request_id,
+            )
+            .returning(
+                ChatMessage.sender_type,
+                ChatMessage.content,
+                ChatMessage.request_id,
+                ChatMessage.created_at,
+            )
         )
-        db.add(new_message)
+        new_message = GetChatMessage(**q.mappings().one())
         await db.commit()
-        await db.refresh(new_message)
-
-        return await self.get_chat_history(
-            db=db, user_model=user, session_id=session_id
-        )
+        return new_message
 
 
 chat_repo = ChatRepository(ChatConversation)
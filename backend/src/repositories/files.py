@@ -11,6 +11,7 @@ from src.schemas.api.files.dto import FileDTO, FilePathDTO, ShortFileDTO
 from src.schemas.api.files.schemas import FileCreate, FileUpdate
 from src.utils.constants import FILES_DIR
 from src.utils.enums import FileValidationOutputChoice
+from src.utils.pagination import KeysetPaginator, Page
 
 
 class FilesRepository(CRUDBase[File, FileCreate, FileUpdate]):
@@ -166,13 +167,23 @@ class FilesRepository(CRUDBase[File, FileCreate, FileUpdate]):
         return updated_files
 
     async def get_files_metadata_by_user(
-        self, db: AsyncSession, user_model: User, limit: int = 100, offset: int = 0
-    ) -> list[Optional[FileDTO]]:
-        results = await self.get_multiple_by_user(
-            db=db, user_model=user_model, offset=offset, limit=limit
-        )
-
-        return [FileDTO(**file.__dict__) for file in results]
+        self,
+        db: AsyncSession,
+        user_model: User,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> Page:
+        page = await KeysetPaginator(
+            db,
+            select(self.model).where(self.model.creator_id == user_model.id),
+            self.model,
+            limit,
+            cursor=cursor,
+            offset=offset,
+        ).get_page()
+        page.items = [FileDTO(**file.__dict__) for file in page.items]
+        return page
 
     async def get_files_by_session_id(
         self, db: AsyncSession, session_id: UUID, user_id: UUID
@@ -2,7 +2,8 @@ from typing import List, Optional, Union
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import and_, delete, select, update
+from sqlalchemy import and_, cast, delete, select, update
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.models import Agent, AgentWorkflow, User
 from src.repositories.base import CRUDBase
@@ -12,6 +13,7 @@ from src.schemas.api.flow.schemas import (
     AgentFlowUpdate,
     FlowAgentId,
 )
+from src.utils.enums import AgentType
 from src.utils.helpers import FlowValidator, generate_alias
 
 
@@ -177,6 +179,31 @@ class AgentWorkflowRepository(
         )
         return q.all()
 
+    async def set_flows_with_genai_agents_inactive(self, db: AsyncSession) -> int:
+        """
+        Set is_active=False for the flows that contain a genai agent. Used on startup
+        of the backend, when no genai agent is connected yet.
+
+        Args:
+            db: The database session.
+
+        Returns: number of flows that were active
+        """
+        q = await db.execute(
+            update(self.model)
+            .where(
+                and_(
+                    self.model.is_active.is_(True),
+                    cast(self.model.flow, JSONB).contains(
+                        [{"type": AgentType.genai.value}]
+                    ),
+                )
+            )
+            .values(is_active=False)
+        )
+        await db.commit()
+        return q.rowcount
+
     async def validate_all_agents_in_flow_are_active(
         self,
         obj_in: Union[AgentFlowCreate, AgentFlowUpdate],
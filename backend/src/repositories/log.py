@@ -1,23 +1,75 @@
-from typing import Optional
+from typing import Any, Optional
 from src.schemas.ws.log import LogCreate, LogUpdate, LogEntryDTO
 from src.repositories.base import CRUDBase
 from src.models import Log
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
+from src.utils.pagination import KeysetPaginator, Page
+
+# keeps a multi-row insert well below the 32767 bind parameters asyncpg allows
+MAX_ROWS_PER_INSERT = 1000
 
 
 class LogRepository(CRUDBase[Log, LogCreate, LogUpdate]):
+    async def _list_by(
+        self,
+        db: AsyncSession,
+        condition: Any,
+        limit: Optional[int],
+        cursor: Optional[str],
+    ) -> Page:
+        q = select(self.model).where(condition)
+        if limit is None:
+            q = await db.execute(q.order_by(self.model.created_at, self.model.id))
+            page = Page(items=q.scalars().all())
+        else:
+            page = await KeysetPaginator(
+                db, q, self.model, limit, cursor=cursor, descending=False
+            ).get_page()
+        page.items = [LogEntryDTO(**log.__dict__) for log in page.items]
+        return page
+
     async def list_by_session_id(
-        self, db: AsyncSession, id_: str
-    ) -> list[Optional[Log]]:
-        q = await db.execute(select(self.model).where(self.model.session_id == id_))
-        return [LogEntryDTO(**log.__dict__) for log in q.scalars().all()]
+        self,
+        db: AsyncSession,
+        id_: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Page:
+        return await self._list_by(
+            db, self.model.session_id == id_, limit=limit, cursor=cursor
+        )
 
     async def list_by_request_id(
-        self, db: AsyncSession, id_: str
-    ) -> list[Optional[Log]]:
-        q = await db.execute(select(self.model).where(self.model.request_id == id_))
-        return [LogEntryDTO(**log.__dict__) for log in q.scalars().all()]
+        self,
+        db: AsyncSession,
+        id_: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Page:
+        return await self._list_by(
+            db, self.model.request_id == id_, limit=limit, cursor=cursor
+        )
+
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: list[LogCreate]
+    ) -> list[dict[str, Any]]:
+        """
+        Inserts logs with one multi-row INSERT ... RETURNING per chunk and a single commit.
+
+        Returns the inserted rows as mappings, so nothing is loaded again after the commit.
+        """
+        rows = []
+        for start in range(0, len(objs_in), MAX_ROWS_PER_INSERT):
+            chunk = objs_in[start : start + MAX_ROWS_PER_INSERT]
+            result = await db.execute(
+                insert(self.model)
+                .values([obj.model_dump() for obj in chunk])
+                .returning(*self.model.__table__.columns)
+            )
+            rows.extend(dict(row) for row in result.mappings().all())
+        await db.commit()
+        return rows
 
 
 log_repo = LogRepository(Log)
@@ -15,6 +15,7 @@ from sqlalchemy import and_, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from src.db.search import ranked_search
 from src.models import MCPServer, MCPTool, User
 from src.repositories.base import CRUDBase
 from src.schemas.base import AgentDTOPayload
@@ -144,14 +145,48 @@ class MCPRepository(CRUDBase[MCPServer, MCPToolSchema, MCPToolSchema]):
             db=db, db_obj=mcp_server, obj_in=obj_in
         )
 
-    async def set_as_inactive(self, db: AsyncSession, server_url: str):
-        await db.execute(
+    async def list_tool_ids_of_inactive_servers(
+        self, db: AsyncSession, server_url: str
+    ) -> list[UUID]:
+        """
+        Returns: ids of the tools of the inactive servers on the url, read before the
+        servers are updated as active again
+        """
+        q = await db.scalars(
+            select(MCPTool.id)
+            .join(self.model, MCPTool.mcp_server_id == self.model.id)
+            .where(
+                and_(
+                    self.model.server_url == server_url,
+                    self.model.is_active.is_(False),
+                )
+            )
+        )
+        return q.all()
+
+    async def set_as_inactive(self, db: AsyncSession, server_url: str) -> list[UUID]:
+        """
+        Returns: ids of the tools of the servers that were active until now
+        """
+        servers = await db.scalars(
             update(self.model)
-            .where(self.model.server_url == server_url)
+            .where(
+                and_(
+                    self.model.server_url == server_url,
+                    self.model.is_active.is_(True),
+                )
+            )
             .values({"is_active": False})
+            .returning(self.model.id)
         )
+        server_ids = servers.all()
+        tools = await db.scalars(
+            select(MCPTool.id).where(MCPTool.mcp_server_id.in_(server_ids))
+        )
+        tool_ids = tools.all()
         await db.commit()
         logger.info(f"Set {server_url} as inactive")
+        return tool_ids
 
     async def list_active_mcp_servers(
         self, db: AsyncSession, user_id: UUID, limit: int, offset: int
@@ -338,6 +373,39 @@ class MCPRepository(CRUDBase[MCPServer, MCPToolSchema, MCPToolSchema]):
             )
         return s
 
+    async def search_tools(
+        self, db: AsyncSession, user_model: User, search: str, limit: int, offset: int
+    ) -> list[dict]:
+        """
+        Full-text search of the tools of all servers by name and description,
+        ranked by relevance.
+        """
+        q = ranked_search(
+            select(MCPTool, self.model)
+            .join(self.model, self.model.id == MCPTool.mcp_server_id)
+            .where(self.model.creator_id == user_model.id),
+            vector=MCPTool.search_vector,
+            search=search,
+        )
+        rows = await db.execute(q.limit(limit).offset(offset))
+
+        tools = []
+        for tool, server in rows.all():
+            agent_schema = mcp_tool_to_json_schema(MCPToolDTO(**tool.__dict__))
+            tools.append(
+                AgentDTOPayload(
+                    id=tool.id,
+                    name=agent_schema["title"],
+                    type=AgentType.mcp,
+                    url=server.server_url,
+                    agent_schema=agent_schema,
+                    created_at=server.created_at,
+                    updated_at=server.updated_at,
+                    is_active=server.is_active,
+                ).model_dump(mode="json", exclude_none=True)
+            )
+        return tools
+
     async def get_tool_by_id(self, db: AsyncSession, id_: UUID):
         q = await db.scalar(select(MCPTool).where(MCPTool.id == id_))
         return q
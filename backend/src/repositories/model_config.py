@@ -3,6 +3,8 @@ from uuid import UUID
 
 from fastapi import HTTPException
 from sqlalchemy import and_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from src.auth.encrypt import decrypt_secret
@@ -19,6 +21,7 @@ from src.schemas.api.model_config.schemas import (
     ProviderCRUDCreate,
     ProviderCRUDUpdate,
 )
+from src.utils.constants import DEFAULT_SYSTEM_PROMPT
 from src.utils.helpers import validate_and_encrypt_provider_api_key
 
 
@@ -335,5 +338,46 @@ class ModelConfigRepository(
         base_url = provider.provider_metadata.get("base_url")
         return GenAIProviderDTO(**provider.__dict__, base_url=base_url)
 
+    async def provision_default_provider(
+        self, db: AsyncSession, user_id: str, base_url: str
+    ) -> bool:
+        """
+        Creates the default `genai` provider with its `default` config unless the user
+        already has it. Both inserts skip existing rows, so concurrent calls are safe.
+
+        Returns False if the user does not exist.
+        """
+        try:
+            provider_id = await db.scalar(
+                insert(ModelProvider)
+                .values(
+                    name="genai",
+                    provider_metadata={"base_url": base_url},
+                    creator_id=user_id,
+                )
+                .on_conflict_do_nothing(constraint="uq_user_provider_name")
+                .returning(ModelProvider.id)
+            )
+            if provider_id:
+                await db.execute(
+                    insert(ModelConfig)
+                    .values(
+                        name="default",
+                        model="gpt-4o",
+                        provider_id=provider_id,
+                        creator_id=user_id,
+                        temperature=0.7,
+                        credentials={},
+                        system_prompt=DEFAULT_SYSTEM_PROMPT,
+                    )
+                    .on_conflict_do_nothing(constraint="uq_user_config_name")
+                )
+            await db.commit()
+        except IntegrityError:
+            # the user does not exist (anymore)
+            await db.rollback()
+            return False
+        return True
+
 
 model_config_repo = ModelConfigRepository(ModelConfig)
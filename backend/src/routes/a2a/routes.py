@@ -1,7 +1,7 @@
 import json
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Query, Response
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 from src.auth.dependencies import CurrentUserDependency
@@ -30,6 +30,19 @@ async def list_all_agent_cards(db: AsyncDBSession, user_model: CurrentUserDepend
     return cards
 
 
+@a2a_router.get("/agents/search")
+async def search_agent_cards(
+    db: AsyncDBSession,
+    user_model: CurrentUserDependency,
+    query: str = Query(min_length=1),
+    limit: int = 100,
+    offset: int = 0,
+):
+    return await a2a_repo.search_cards(
+        db=db, user_id=user_model.id, search=query, limit=limit, offset=offset
+    )
+
+
 @a2a_router.get("/agents/{agent_id}")
 async def get_agent_card(
     db: AsyncDBSession, user_model: CurrentUserDependency, agent_id: UUID
@@ -77,16 +77,24 @@ async def get_active_connections(
 async def list_all_agents(
     db: AsyncDBSession,
     user: CurrentUserByAgentOrUserTokenDependency,
+    http_response: Response,
     offset: Optional[int] = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     filter: AgentFilter = Depends(),
 ):
-    result = await agent_repo.query_by_filter(
-        db=db, user_model=user, filter_field=filter, offset=offset, limit=limit
+    page = await agent_repo.query_by_filter(
+        db=db,
+        user_model=user,
+        filter_field=filter,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
     )
+    http_response.headers.update(page.headers)
 
     response = []
-    for agent in result:
+    for agent in page.items:
         if func := agent.input_parameters.get("function"):
             func["name"] = agent.name
         agent_dto = MLAgentJWTDTO(
@@ -7,6 +7,7 @@ from src.routes.flows.routes import flow_router
 from src.routes.llms.routes import llm_router
 from src.routes.logs.routes import log_router
 from src.routes.mcp.routes import mcp_router
+from src.routes.metrics.routes import metrics_router
 from src.routes.user.routes import user_router
 
 api_router = APIRouter(prefix="/api")
@@ -19,3 +20,4 @@ api_router.include_router(llm_router)
 api_router.include_router(chat_router)
 api_router.include_router(mcp_router)
 api_router.include_router(a2a_router)
+api_router.include_router(metrics_router)
@@ -32,8 +32,9 @@ async def get_chat_history(
     x_api_key: Annotated[Optional[str], Header(convert_underscores=True)] = None,
     user_id: Optional[UUID] = Query(None),
     authorization: Annotated[Optional[str], Header()] = None,
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None),
     per_page: int = Query(100, ge=0),
+    with_count: bool = Query(False),
 ):
     if not any((user_id, authorization)):
         raise HTTPException(
@@ -68,8 +69,9 @@ async def get_chat_history(
         db=db,
         user_id=user_id,
         session_id=session_id,
-        page=page,
         per_page=per_page,
+        cursor=cursor,
+        with_count=with_count,
     )
     if not history:
         return []
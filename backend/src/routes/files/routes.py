@@ -11,6 +11,7 @@ from fastapi import (
     Header,
     HTTPException,
     Query,
+    Response,
     UploadFile,
     status,
 )
@@ -170,10 +171,13 @@ async def list_all_files_by_session_id(
 async def get_files_metadata_by_user(
     db: AsyncDBSession,
     user: CurrentUserByAgentOrUserTokenDependency,
+    response: Response,
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
 ):
-    files = await files_repo.get_files_metadata_by_user(
-        db=db, user_model=user, limit=limit, offset=offset
+    page = await files_repo.get_files_metadata_by_user(
+        db=db, user_model=user, limit=limit, offset=offset, cursor=cursor
     )
-    return files
+    response.headers.update(page.headers)
+    return page.items
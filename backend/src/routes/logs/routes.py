@@ -1,6 +1,6 @@
 from typing import Optional, Union, Annotated
 from uuid import UUID
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Response
 from src.auth.dependencies import CurrentUserDependency
 from src.schemas.ws.log import LogEntryDTO
 from src.db.session import AsyncDBSession
@@ -13,8 +13,11 @@ log_router = APIRouter(tags=["Logs"], prefix="/logs")
 async def get_logs_by_session_id(
     db: AsyncDBSession,
     user: CurrentUserDependency,
+    response: Response,
     request_id: Annotated[Union[UUID, None], Query] = None,
     session_id: Annotated[Union[UUID, None], Query] = None,
+    limit: Annotated[Optional[int], Query(ge=1)] = None,
+    cursor: Annotated[Optional[str], Query] = None,
 ) -> list[Optional[LogEntryDTO]]:
     params = (request_id, session_id)
     if all(params):
@@ -31,9 +34,16 @@ async def get_logs_by_session_id(
     if session_id:
         session_id = str(session_id)
         # TODO: lookup by user
-        return await log_repo.list_by_session_id(db=db, id_=session_id)
+        page = await log_repo.list_by_session_id(
+            db=db, id_=session_id, limit=limit, cursor=cursor
+        )
 
     if request_id:
         request_id = str(request_id)
         # TODO: lookup by user
-        return await log_repo.list_by_request_id(db=db, id_=request_id)
+        page = await log_repo.list_by_request_id(
+            db=db, id_=request_id, limit=limit, cursor=cursor
+        )
+
+    response.headers.update(page.headers)
+    return page.items
@@ -1,7 +1,7 @@
 import json
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Query, Response
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 from src.auth.dependencies import CurrentUserDependency
@@ -34,6 +34,19 @@ async def list_all_mcp_servers(
     )
 
 
+@mcp_router.get("/tools/search")
+async def search_mcp_tools(
+    db: AsyncDBSession,
+    user_model: CurrentUserDependency,
+    query: str = Query(min_length=1),
+    limit: int = 100,
+    offset: int = 0,
+):
+    return await mcp_repo.search_tools(
+        db=db, user_model=user_model, search=query, limit=limit, offset=offset
+    )
+
+
 @mcp_router.get("/servers/{server_id}")
 async def get_mcp_server(
     db: AsyncDBSession, user_model: CurrentUserDependency, server_id: UUID
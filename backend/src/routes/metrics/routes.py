@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+
+from src.auth.dependencies import CurrentUserDependency
+from src.db.pool import get_pool_stats
+from src.db.session import engine
+from src.schemas.api.metrics.dto import DBPoolStatsDTO
+
+metrics_router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@metrics_router.get("/db-pool")
+async def db_pool_stats(user: CurrentUserDependency) -> DBPoolStatsDTO:
+    return get_pool_stats(engine)
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+
+class DBPoolStatsDTO(BaseModel):
+    pooled: bool
+    size: int = 0
+    checked_in: int = 0
+    in_use: int = 0
+    overflow: int = 0
+    max_overflow: int = 0
+    checkouts: int = 0
+    checkout_timeouts: int = 0
+    checkout_ms_avg: float = 0.0
+    checkout_ms_p50: float = 0.0
+    checkout_ms_p95: float = 0.0
+    checkout_ms_p99: float = 0.0
+    checkout_ms_max: float = 0.0
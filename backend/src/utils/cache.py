@@ -0,0 +1,72 @@
+import time
+from collections import OrderedDict
+from logging import getLogger
+from typing import Generic, Hashable, Optional, TypeVar
+
+from src.core.settings import get_settings
+
+settings = get_settings()
+logger = getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_redis = None
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Bounded process-local cache. Entries expire `ttl` seconds after they were set,
+    the least recently used entry is evicted when the cache is full.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> Optional[V]:
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def get_shared_cache():
+    """
+    Redis client shared by the backend processes for their caches.
+
+    Returns:
+        Optional[redis.asyncio.Redis]: The client, None if `CACHE_REDIS_URI` is not set.
+    """
+    global _redis
+    if not settings.CACHE_REDIS_URI:
+        return None
+    if _redis is None:
+        from redis import asyncio as aioredis
+
+        _redis = aioredis.from_url(settings.CACHE_REDIS_URI)
+    return _redis
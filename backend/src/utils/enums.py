@@ -6,6 +6,11 @@ class AgentPlanType(Enum):
     flow = "flow"
 
 
+class RouterMessageType(Enum):
+    # agent logs coalesced by the router, not part of the genai_session protocol
+    agent_log_batch = "agent_log_batch"
+
+
 class AgentType(Enum):
     genai = "genai"
     flow = "flow"
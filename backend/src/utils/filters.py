@@ -6,3 +6,5 @@ from pydantic import BaseModel
 class AgentFilter(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
+    # full-text search by name and description, best matches first
+    search: Optional[str] = None
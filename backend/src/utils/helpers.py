@@ -9,8 +9,11 @@ from uuid import UUID
 from fastapi import HTTPException
 from mcp.types import Tool
 from pydantic import AnyHttpUrl
-from sqlalchemy import and_, select, update
+from sqlalchemy import and_, case, cast, column, func, select, true, update
+from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from src.auth.encrypt import encrypt_secret
 from src.auth.jwt import TokenLifespanType, validate_token
 from src.db.session import async_session
@@ -166,6 +169,11 @@ def strip_endpoints_from_url(url: AnyHttpUrl | str) -> str:
     )
 
 
+def flow_elements(flow: Any):
+    """The {"id", "type"} entries of the flow, to join laterally with the flow."""
+    return func.json_array_elements(flow.flow).table_valued(column("value", JSON))
+
+
 class FlowValidator:
     async def _validate_genai_ids(self, genai_ids: list[Optional[str]], user_id: UUID):
         async with async_session() as db:
@@ -261,117 +269,82 @@ class FlowValidator:
         )
 
     async def trigger_flow_validation_on_agent_state_change(
-        self, db: AsyncSession, agent_type: AgentType
-    ):
+        self, db: AsyncSession, agent_ids: list[UUID | str]
+    ) -> int:
         """
-        Unified helper method to run during mcp/a2a lookups to set flows with inactive tools/cards as inactive
+        Re-validates the flows that reference any of the agents/tools/cards whose
+        state changed, in a single UPDATE ... FROM.
+        A flow is active only if every agent, tool and card in it is active and
+        belongs to the flow creator. Returns the number of flows updated.
         """
-        active_flows = await db.scalars(
-            select(AgentWorkflow)
-            .order_by(AgentWorkflow.created_at)
-            .order_by(AgentWorkflow.created_at.desc())
-        )
-        agentflows: list[AgentWorkflow] = active_flows.all()
-        flow_ids = [f.id for f in agentflows]
-        flows = [f.flow for f in agentflows]
-        for flow_id, flow in zip(flow_ids, flows):
-            flow_agent_ids = []  # either mcp/a2a ids
-            for tool in flow:
-                if tool["type"] == agent_type.value:
-                    flow_agent_ids.append(tool)
-
-            if AgentType.mcp == agent_type:
-                active_tools = await db.scalars(
-                    select(MCPTool)
-                    .join(MCPServer, MCPServer.id == MCPTool.mcp_server_id)
-                    .where(
-                        and_(
-                            MCPTool.id.in_([a["id"] for a in flow_agent_ids]),
-                            MCPServer.is_active.is_(True),
-                        )
-                    )
+        if not agent_ids:
+            return 0
+
+        flow = aliased(AgentWorkflow)
+        element = flow_elements(flow)
+        element_id = cast(element.c.value["id"].astext, PG_UUID)
+        element_type = element.c.value["type"].astext
+        referenced = flow_elements(flow)
+
+        is_element_active = case(
+            (
+                element_type == AgentType.genai.value,
+                select(Agent.id)
+                .where(
+                    Agent.id == element_id,
+                    Agent.is_active.is_(True),
+                    Agent.creator_id == flow.creator_id,
                 )
-
-                if len(active_tools.all()) != len(
-                    [
-                        f["id"]
-                        for f in flow_agent_ids
-                        if f["type"] == AgentType.mcp.value
-                    ]
-                ):
-                    await db.execute(
-                        update(AgentWorkflow)
-                        .where(AgentWorkflow.id == flow_id)
-                        .values({"is_active": False})
-                    )
-                    await db.commit()
-                else:
-                    await db.execute(
-                        update(AgentWorkflow)
-                        .where(AgentWorkflow.id == flow_id)
-                        .values({"is_active": True})
-                    )
-                    await db.commit()
-
-            if AgentType.a2a == agent_type:
-                active_cards = await db.scalars(
-                    select(A2ACard).where(
-                        and_(
-                            A2ACard.id.in_([a["id"] for a in flow_agent_ids]),
-                            A2ACard.is_active.is_(True),
-                        )
-                    )
+                .exists(),
+            ),
+            (
+                element_type == AgentType.mcp.value,
+                select(MCPTool.id)
+                .join(MCPServer, MCPTool.mcp_server_id == MCPServer.id)
+                .where(
+                    MCPTool.id == element_id,
+                    MCPServer.is_active.is_(True),
+                    MCPServer.creator_id == flow.creator_id,
                 )
-                if len(active_cards.all()) != len(
-                    [
-                        f["id"]
-                        for f in flow_agent_ids
-                        if f["type"] == AgentType.a2a.value
-                    ]
-                ):
-                    await db.execute(
-                        update(AgentWorkflow)
-                        .where(AgentWorkflow.id == flow_id)
-                        .values({"is_active": False})
-                    )
-                    await db.commit()
-                else:
-                    await db.execute(
-                        update(AgentWorkflow)
-                        .where(AgentWorkflow.id == flow_id)
-                        .values({"is_active": True})
-                    )
-                    await db.commit()
-
-            if AgentType.genai == agent_type:
-                active_agents = await db.scalars(
-                    select(Agent).where(
-                        and_(
-                            Agent.id.in_([a["id"] for a in flow_agent_ids]),
-                            Agent.is_active.is_(True),
-                        )
-                    )
+                .exists(),
+            ),
+            (
+                element_type == AgentType.a2a.value,
+                select(A2ACard.id)
+                .where(
+                    A2ACard.id == element_id,
+                    A2ACard.is_active.is_(True),
+                    A2ACard.creator_id == flow.creator_id,
                 )
-                if len(active_agents.all()) != len(
-                    [
-                        f["id"]
-                        for f in flow_agent_ids
-                        if f["type"] == AgentType.genai.value
-                    ]
-                ):
-                    await db.execute(
-                        update(AgentWorkflow)
-                        .where(AgentWorkflow.id == flow_id)
-                        .values({"is_active": False})
-                    )
-                    await db.commit()
-                else:
-                    await db.execute(
-                        update(AgentWorkflow)
-                        .where(AgentWorkflow.id == flow_id)
-                        .values({"is_active": True})
-                    )
-                    await db.commit()
+                .exists(),
+            ),
+            else_=False,
+        )
+        # only the flows referencing the changed ids are re-checked
+        references_changed = (
+            select(referenced.c.value)
+            .where(referenced.c.value["id"].astext.in_([str(i) for i in agent_ids]))
+            .exists()
+        )
+        validated = (
+            select(flow.id, func.bool_and(is_element_active).label("is_active"))
+            .select_from(flow)
+            .join(element, true())
+            .where(references_changed)
+            .group_by(flow.id)
+            .subquery()
+        )
+
+        result = await db.execute(
+            update(AgentWorkflow)
+            .where(
+                AgentWorkflow.id == validated.c.id,
+                AgentWorkflow.is_active.is_distinct_from(validated.c.is_active),
+            )
+            .values(is_active=validated.c.is_active)
+        )
+        await db.commit()
+        return result.rowcount
 
     async def trigger_flow_state_lookup_of_all_agents(
         self,
@@ -1,17 +1,36 @@
+import time
+from contextlib import contextmanager
+
 from src.repositories.agent import agent_repo
+from src.repositories.flow import agentflow_repo
 
 from src.db.session import async_session
 from logging import getLogger
 from src.utils.db_initial_healthcheck import preflight_db_availability_check
 
-
 logger = getLogger(__name__)
 
 
+@contextmanager
+def startup_phase(name: str):
+    started = time.perf_counter()
+    yield
+    logger.info(f"Startup phase '{name}' took {time.perf_counter() - started:.3f}s")
+
+
 async def run_startup_jobs():
-    await preflight_db_availability_check()
+    started = time.perf_counter()
+    with startup_phase("db availability check"):
+        await preflight_db_availability_check()
+
     async with async_session() as db:
-        await agent_repo.set_all_agents_inactive(db=db)
+        with startup_phase("agents reset"):
+            agents = await agent_repo.set_all_agents_inactive(db=db)
+        with startup_phase("flows reset"):
+            flows = await agentflow_repo.set_flows_with_genai_agents_inactive(db=db)
 
-    logger.debug("Initial startup jobs complete")
+    logger.info(
+        f"Initial startup jobs complete in {time.perf_counter() - started:.3f}s, "
+        f"set {agents} agents and {flows} flows as inactive"
+    )
     return
@@ -3,7 +3,6 @@ import logging
 
 from src.db.session import async_session
 from src.repositories.a2a import a2a_repo, lookup_agent_well_known
-from src.utils.enums import AgentType
 from src.utils.helpers import FlowValidator
 
 logger = logging.getLogger(__name__)
@@ -13,18 +12,23 @@ async def lookup_and_update_agent_card(server_url: str, headers: dict = {}):
     async with async_session() as db:
         card_info = await lookup_agent_well_known(url=server_url, headers=headers)
         if not card_info.is_active:
-            async with async_session() as db:
-                await a2a_repo.set_as_inactive(db=db, server_url=server_url)
-
-            validator = FlowValidator()
-            async with async_session() as db:
-                await validator.trigger_flow_validation_on_agent_state_change(
-                    db=db, agent_type=AgentType.a2a
-                )
+            card_ids = await a2a_repo.set_as_inactive(db=db, server_url=server_url)
+        else:
+            # cards that are back up may re-activate their flows
+            card_ids = await a2a_repo.list_inactive_card_ids(
+                db=db, server_url=server_url
+            )
         card = await a2a_repo.update_card(
             db=db, server_url=server_url, card_in=card_info
         )
-        return card
+
+    if card_ids:
+        validator = FlowValidator()
+        async with async_session() as db:
+            await validator.trigger_flow_validation_on_agent_state_change(
+                db=db, agent_ids=card_ids
+            )
+    return card
 
 
 async def lookup_a2a_agents(headers: dict = {}):
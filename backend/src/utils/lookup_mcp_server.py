@@ -3,7 +3,6 @@ import logging
 
 from src.db.session import async_session
 from src.repositories.mcp import lookup_mcp_server, mcp_repo
-from src.utils.enums import AgentType
 from src.utils.helpers import FlowValidator
 
 logger = logging.getLogger(__name__)
@@ -12,21 +11,28 @@ logger = logging.getLogger(__name__)
 async def lookup_and_update_mcp_server(url: str, headers={}, cursor=None):
     data = await lookup_mcp_server(url=url, headers=headers, cursor=cursor)
 
+    server = None
     if data.is_active:
         async with async_session() as db:
-            return await mcp_repo.update_mcp_server_resources(
+            # tools of a server that is back up may re-activate their flows
+            tool_ids = await mcp_repo.list_tool_ids_of_inactive_servers(
+                db=db, server_url=url
+            )
+            server = await mcp_repo.update_mcp_server_resources(
                 db=db, mcp_server_url=url, obj_in=data
             )
 
     else:
         async with async_session() as db:
-            await mcp_repo.set_as_inactive(db=db, server_url=url)
+            tool_ids = await mcp_repo.set_as_inactive(db=db, server_url=url)
 
-    validator = FlowValidator()
-    async with async_session() as db:
-        await validator.trigger_flow_validation_on_agent_state_change(
-            db=db, agent_type=AgentType.mcp
-        )
+    if tool_ids:
+        validator = FlowValidator()
+        async with async_session() as db:
+            await validator.trigger_flow_validation_on_agent_state_change(
+                db=db, agent_ids=tool_ids
+            )
+    return server
 
 
 async def lookup_mcp_servers():
@@ -1,7 +1,7 @@
 import traceback
 from logging import getLogger
 from traceback import format_exc
-from typing import Optional
+from typing import Any, Optional
 
 from fastapi import WebSocket
 from genai_session.session import GenAISession
@@ -14,7 +14,7 @@ from src.repositories.log import log_repo
 from src.repositories.user import user_repo
 from src.schemas.api.agent.schemas import AgentUpdate
 from src.schemas.ws.log import FrontendLogEntryDTO, LogCreate, LogEntry
-from src.utils.enums import AgentType
+from src.utils.enums import RouterMessageType
 from src.utils.helpers import FlowValidator, generate_alias
 from src.utils.validate_uuid import validate_agent_or_send_err
 from src.utils.validation_error_handler import validation_exception_handler
@@ -36,6 +36,7 @@ async def message_handler_validator(
     session_id: str = "",
     request_id: str = "",
     jwt_token: Optional[str] = None,
+    logs: Optional[list[dict[str, Any]]] = None,
 ):
     # NOTE: websocket connection must be initialized by the frontend before it will be accessible here
     # if websocket is not initialized it won't dump logs to the frontend
@@ -84,7 +85,7 @@ async def message_handler_validator(
                     )
                     flow_validator = FlowValidator()
                     await flow_validator.trigger_flow_validation_on_agent_state_change(
-                        db=db, agent_type=AgentType.genai
+                        db=db, agent_ids=[updated_agent.id]
                     )
                     await db.refresh(updated_agent)
                     logger.debug(f"Agent updated: {str(updated_agent.id)}")
@@ -165,7 +166,55 @@ async def message_handler_validator(
 
                 return
 
+        if message_type == RouterMessageType.agent_log_batch.value:
+            try:
+                await ingest_log_batch(logs=logs or [], websocket=websocket)
+            except Exception:
+                logger.error(f"Unexpected error occured: {traceback.format_exc()}")
+            return
+
     except KeyError:
         msg = "KeyError: Invalid payload structure - missing 'message_type' field"  # TODO: session_id?
         logger.error(msg)
         return
+
+
+async def ingest_log_batch(logs: list[dict[str, Any]], websocket: Optional[WebSocket]):
+    """
+    Stores a batch of agent logs coalesced by the router with a single multi-row insert
+    and forwards them to the frontend one by one, as single logs are.
+    """
+    logs_in = []
+    for log in logs:
+        if not (
+            log.get("session_id") and log.get("request_id") and log.get("log_level")
+        ):
+            continue
+        try:
+            logs_in.append(
+                LogCreate(
+                    session_id=log["session_id"],
+                    request_id=log["request_id"],
+                    message=log.get("log_message"),
+                    log_level=log["log_level"],
+                    agent_id=log.get("agent_uuid"),
+                )
+            )
+        except ValidationError as e:
+            logger.error(
+                f"Invalid agent_log entry in batch. Details: {validation_exception_handler(e)}"
+            )
+
+    if not logs_in:
+        return
+
+    async with async_session() as db:
+        log_entries = await log_repo.create_many(db, objs_in=logs_in)
+    logger.debug(f"Inserted {len(log_entries)} logs from a batch of {len(logs)}")
+
+    if websocket:
+        for log_entry in log_entries:
+            response = FrontendLogEntryDTO(
+                type=WSMessageType.AGENT_LOG.value, log=LogEntry(**log_entry)
+            )
+            await websocket.send_text(response.model_dump_json())
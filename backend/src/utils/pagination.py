@@ -1,69 +1,179 @@
+import base64
+import binascii
+import json
 import typing
+from dataclasses import dataclass, field
+from datetime import datetime
 
+from fastapi import HTTPException
 from pydantic import BaseModel
-from sqlalchemy import Select, func, select
+from sqlalchemy import Select, func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.middleware.pagination import request_object
 
 M = typing.TypeVar("M", bound=BaseModel)
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREVIOUS_CURSOR_HEADER = "X-Previous-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+@dataclass
+class Page:
+    items: list = field(default_factory=list)
+    next_cursor: typing.Optional[str] = None
+    previous_cursor: typing.Optional[str] = None
+    total_count: typing.Optional[int] = None
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {}
+        if self.next_cursor:
+            headers[NEXT_CURSOR_HEADER] = self.next_cursor
+        if self.previous_cursor:
+            headers[PREVIOUS_CURSOR_HEADER] = self.previous_cursor
+        if self.total_count is not None:
+            headers[TOTAL_COUNT_HEADER] = str(self.total_count)
+        return headers
+
+
+def encode_cursor(created_at: datetime, id_: typing.Any, backwards: bool) -> str:
+    payload = json.dumps(
+        {"c": created_at.isoformat(), "i": str(id_), "b": backwards},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str, bool]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at, id_ = datetime.fromisoformat(payload["c"]), payload["i"]
+        backwards = bool(payload["b"])
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    # created_at columns are naive, a tz-aware bound cannot be compared with them
+    if not isinstance(id_, str) or created_at.tzinfo is not None:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return created_at, id_, backwards
+
+
+class KeysetPaginator:
+    """
+    Cursor based pagination ordered by (created_at, id) of the model.
+
+    Every page is fetched with a range condition on (created_at, id) and LIMIT,
+    so its cost does not depend on how deep the page is. Cursors are opaque
+    strings pointing to the first/last row of the current page.
+    """
 
-class Paginator:
     def __init__(
         self,
         session: AsyncSession,
         query: Select,
-        page: int,
+        model: typing.Any,
         per_page: int,
+        cursor: typing.Optional[str] = None,
+        descending: bool = True,
+        with_count: bool = False,
+        offset: int = 0,
     ):
         self.session = session
-        self.query = query
-        self.page = page
+        self.query = query.order_by(None)
+        self.model = model
         self.per_page = per_page
-        self.limit = per_page * page
-        self.offset = (page - 1) * per_page
-        self.request = request_object.get()
-        # computed later
-        self.number_of_pages = 0
-        self.next_page = ""
-        self.previous_page = ""
-
-    def _get_next_page(self) -> typing.Optional[str]:
-        if self.page >= self.number_of_pages:
-            return
-        url = self.request.url.include_query_params(page=self.page + 1)
-        return str(url)
+        self.cursor = cursor
+        self.descending = descending
+        self.with_count = with_count
+        # offset is only kept for the clients that do not use cursors yet
+        self.offset = offset
 
-    def _get_previous_page(self) -> typing.Optional[str]:
-        if self.page == 1 or self.page > self.number_of_pages + 1:
-            return
-        url = self.request.url.include_query_params(page=self.page - 1)
-        return str(url)
+    def _key(self, row) -> tuple[datetime, typing.Any]:
+        return row.created_at, row.id
+
+    def _build_query(self, backwards: bool) -> Select:
+        key = tuple_(self.model.created_at, self.model.id)
+        # walking backwards means reading in the opposite order
+        ascending = self.descending == backwards
+        q = self.query
+
+        if self.cursor:
+            created_at, id_, _ = decode_cursor(self.cursor)
+            try:
+                id_ = self.model.id.type.python_type(id_)
+            except (ValueError, TypeError, AttributeError):
+                raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+            bound = tuple_(created_at, id_)
+            q = q.where(key > bound if ascending else key < bound)
+        elif self.offset:
+            q = q.offset(self.offset)
+
+        if ascending:
+            q = q.order_by(self.model.created_at, self.model.id)
+        else:
+            q = q.order_by(self.model.created_at.desc(), self.model.id.desc())
+        # one more row tells whether there is a page after this one
+        return q.limit(self.per_page + 1)
+
+    async def get_page(self) -> Page:
+        backwards = decode_cursor(self.cursor)[2] if self.cursor else False
+        rows = (await self.session.scalars(self._build_query(backwards))).all()
+        has_more = len(rows) > self.per_page
+        rows = list(rows[: self.per_page])
+        if backwards:
+            rows.reverse()
+
+        if backwards:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(self.cursor or self.offset)
+
+        page = Page(items=rows)
+        if rows:
+            if has_next:
+                page.next_cursor = encode_cursor(*self._key(rows[-1]), backwards=False)
+            if has_previous:
+                page.previous_cursor = encode_cursor(
+                    *self._key(rows[0]), backwards=True
+                )
+        if self.with_count:
+            page.total_count = await self._get_total_count()
+        return page
 
     async def get_response(self, cast_to: typing.Type[M]) -> dict:
-        q = await self.session.scalars(self.query.limit(self.limit).offset(self.offset))
+        page = await self.get_page()
         return {
-            "total_count": await self._get_total_count(),
-            "next_page": self._get_next_page(),
-            "previous_page": self._get_previous_page(),
-            "items": [cast_to(**item.__dict__) for item in q],
+            "total_count": page.total_count,
+            "next_cursor": page.next_cursor,
+            "previous_cursor": page.previous_cursor,
+            "next_page": self._get_page_url(page.next_cursor),
+            "previous_page": self._get_page_url(page.previous_cursor),
+            "items": [cast_to(**item.__dict__) for item in page.items],
         }
 
-    def _get_number_of_pages(self, count: int) -> int:
-        rest = count % self.per_page
-        quotient = count // self.per_page
-        return quotient if not rest else quotient + 1
+    def _get_page_url(self, cursor: typing.Optional[str]) -> typing.Optional[str]:
+        request = request_object.get(None)
+        if not cursor or not request:
+            return
+        return str(request.url.include_query_params(cursor=cursor))
 
     async def _get_total_count(self) -> int:
-        count = await self.session.scalar(
+        return await self.session.scalar(
             select(func.count()).select_from(self.query.subquery())
         )
-        self.number_of_pages = self._get_number_of_pages(count)
-        return count
 
 
 async def paginate(
-    db: AsyncSession, query: Select, cast_to: typing.Type[M], page: int, per_page: int
+    db: AsyncSession,
+    query: Select,
+    model: typing.Any,
+    cast_to: typing.Type[M],
+    per_page: int,
+    cursor: typing.Optional[str] = None,
+    with_count: bool = False,
 ) -> dict:
-    paginator = Paginator(db, query, page, per_page)
+    paginator = KeysetPaginator(
+        db, query, model, per_page, cursor=cursor, with_count=with_count
+    )
     return await paginator.get_response(cast_to=cast_to)
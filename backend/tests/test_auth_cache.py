@@ -0,0 +1,72 @@
+from typing import Iterator
+
+import pytest
+from sqlalchemy import create_engine, delete, select, update
+from sqlalchemy.orm import Session
+from src.auth import cache
+from src.models import User
+
+
+@pytest.fixture
+def session() -> Iterator[Session]:
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    cache.users.clear()
+    with Session(engine) as session:
+        yield session
+    cache.users.clear()
+    engine.dispose()
+
+
+def add_users(session: Session, *usernames: str) -> list[User]:
+    users = [User(username=username, password="hash") for username in usernames]
+    session.add_all(users)
+    session.commit()
+    for user in users:
+        cache.cache_user(user)
+    return users
+
+
+def test_cached_user_is_a_detached_copy(session: Session):
+    (user,) = add_users(session, "alice")
+
+    cached = cache.get_cached_user(user.id)
+
+    assert cached is not user
+    assert (cached.id, cached.username) == (user.id, "alice")
+    assert cache.get_cached_user(user.id) is not cached
+
+
+def test_update_of_a_loaded_user_invalidates_it(session: Session):
+    alice, bob = add_users(session, "alice", "bob")
+
+    alice.username = "alice2"
+    session.commit()
+
+    assert cache.get_cached_user(alice.id) is None
+    assert cache.get_cached_user(bob.id) is not None
+
+
+def test_bulk_update_invalidates_users(session: Session):
+    (user,) = add_users(session, "alice")
+
+    session.execute(update(User).where(User.id == user.id).values(username="alice2"))
+
+    assert cache.get_cached_user(user.id) is None
+
+
+def test_bulk_delete_invalidates_users(session: Session):
+    alice, bob = add_users(session, "alice", "bob")
+
+    session.execute(delete(User).where(User.id == alice.id))
+
+    assert cache.get_cached_user(alice.id) is None
+    assert cache.get_cached_user(bob.id) is None
+
+
+def test_reads_keep_cached_users(session: Session):
+    (user,) = add_users(session, "alice")
+
+    session.execute(select(User)).all()
+
+    assert cache.get_cached_user(user.id) is not None
@@ -0,0 +1,173 @@
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from src.models import User
+from src.utils.pagination import KeysetPaginator, decode_cursor, encode_cursor
+
+START = datetime(2025, 1, 1)
+# several rows share created_at, so their order only depends on the id
+MINUTES = [0, 1, 1, 1, 2, 3, 3]
+
+
+class AsyncSessionAdapter:
+    """Exposes the part of AsyncSession used by the paginator over a sync one."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def scalars(self, statement):
+        return self.session.scalars(statement)
+
+    async def scalar(self, statement):
+        return self.session.scalar(statement)
+
+
+@pytest.fixture
+def session() -> Iterator[Session]:
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    with Session(engine) as session:
+        session.add_all(
+            User(
+                username=f"user{i}",
+                password="hash",
+                created_at=START + timedelta(minutes=minutes),
+            )
+            for i, minutes in enumerate(MINUTES)
+        )
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def ordered(session: Session, descending: bool = True) -> list[User]:
+    users = session.scalars(select(User)).all()
+    return sorted(
+        users, key=lambda user: (user.created_at, user.id), reverse=descending
+    )
+
+
+def make_cursor(payload: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+async def get_page(session: Session, cursor: Optional[str] = None, **kwargs):
+    paginator = KeysetPaginator(
+        AsyncSessionAdapter(session), select(User), User, 2, cursor=cursor, **kwargs
+    )
+    return await paginator.get_page()
+
+
+def test_cursor_round_trip():
+    id_ = uuid.uuid4()
+    cursor = encode_cursor(START, id_, backwards=True)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (START, str(id_), True)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("descending", [True, False])
+async def test_next_cursors_walk_every_row_once(session: Session, descending: bool):
+    items, cursor = [], None
+    while True:
+        page = await get_page(session, cursor, descending=descending)
+        items += page.items
+        assert (page.previous_cursor is None) == (cursor is None)
+        if not page.next_cursor:
+            break
+        cursor = page.next_cursor
+
+    assert items == ordered(session, descending)
+
+
+@pytest.mark.asyncio
+async def test_equal_created_at_is_broken_by_id(session: Session):
+    tied = [
+        user
+        for user in ordered(session)
+        if user.created_at == START + timedelta(minutes=1)
+    ]
+    last = ordered(session)[1]
+
+    page = await get_page(session, encode_cursor(last.created_at, last.id, False))
+
+    assert page.items == ordered(session)[2:4]
+    assert page.items[-1] == tied[0]
+    page = await get_page(session, page.next_cursor)
+    assert page.items == tied[1:]
+
+
+@pytest.mark.asyncio
+async def test_previous_cursors_walk_back(session: Session):
+    pages = [await get_page(session)]
+    while pages[-1].next_cursor:
+        pages.append(await get_page(session, pages[-1].next_cursor))
+
+    cursor, previous_pages = pages[-1].previous_cursor, []
+    while cursor:
+        assert decode_cursor(cursor)[2]
+        page = await get_page(session, cursor)
+        assert not decode_cursor(page.next_cursor)[2]
+        previous_pages.insert(0, page)
+        cursor = page.previous_cursor
+
+    assert [page.items for page in previous_pages] == [
+        page.items for page in pages[:-1]
+    ]
+    # the first page has nothing before it
+    assert previous_pages[0].previous_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_legacy_offset(session: Session):
+    users = ordered(session)
+
+    page = await get_page(session, offset=2, with_count=True)
+
+    assert page.items == users[2:4]
+    assert page.total_count == len(users)
+    assert decode_cursor(page.previous_cursor) == (
+        users[2].created_at,
+        str(users[2].id),
+        True,
+    )
+    assert (await get_page(session, page.next_cursor)).items == users[4:6]
+    assert (await get_page(session, page.previous_cursor)).items == users[:2]
+
+
+@pytest.mark.asyncio
+async def test_offset_is_ignored_with_a_cursor(session: Session):
+    users = ordered(session)
+    cursor = encode_cursor(users[0].created_at, users[0].id, False)
+
+    page = await get_page(session, cursor, offset=4)
+
+    assert page.items == users[1:3]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor!",
+        make_cursor([1, 2]),
+        make_cursor({"c": START.isoformat(), "b": False}),
+        make_cursor({"c": "yesterday", "i": str(uuid.uuid4()), "b": False}),
+        make_cursor({"c": START.isoformat(), "i": 1, "b": False}),
+        make_cursor({"c": START.isoformat(), "i": "not-a-uuid", "b": False}),
+        encode_cursor(START.replace(tzinfo=timezone.utc), uuid.uuid4(), False),
+    ],
+)
+async def test_invalid_cursor(session: Session, cursor: str):
+    with pytest.raises(HTTPException) as error:
+        await get_page(session, cursor)
+
+    assert error.value.status_code == 400
@@ -11,7 +11,7 @@ export const chatService = {
 
   async getChatHistory(params: {
     session_id: string;
-    page?: string;
+    cursor?: string;
     per_page?: string;
     user_id?: string;
   }) {
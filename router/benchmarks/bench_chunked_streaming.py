@@ -0,0 +1,111 @@
+"""
+Time to first byte and peak router memory for a multi-megabyte agent response
+sent as one `agent_response` frame and as `agent_response_chunk` frames.
+
+Frames arrive at the router as fast as a link of `--link-mb-per-s` delivers
+them, a frame is routed once its last byte has arrived. Memory is the peak of
+the allocations made while routing, measured with tracemalloc in a separate run.
+
+Run from the router directory:
+    python -m benchmarks.bench_chunked_streaming
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import List
+
+from benchmarks.sockets import BenchWebSocket
+from connectors.ws_connector_manager import WSConnectionManager
+from utils.chunks import split_response
+from utils.enums import WSMessageType
+
+AGENT_ID = "0b8e6f2a-6a4e-4c84-9d43-1f7f1c9a2e01"
+CALLER_ID = "4f0c2b7e-1d9a-4a43-9a51-6c3f0e2d8b11"
+
+
+def build_response(size: int) -> dict:
+    text = "Bonjour le monde, ceci est une traduction. " * (size // 44)
+    return {"response": {"translation": text}, "execution_time": 12.5}
+
+
+def build_frames(response: dict, chunk_size: int) -> List[str]:
+    if not chunk_size:
+        return [
+            json.dumps(
+                {
+                    "message_type": WSMessageType.AGENT_RESPONSE.value,
+                    "invoked_by": CALLER_ID,
+                    **response,
+                }
+            )
+        ]
+    return [
+        json.dumps(chunk)
+        for chunk in split_response(response, CALLER_ID, chunk_size=chunk_size)
+    ]
+
+
+async def run(
+    frames: List[str], link_rate: float, trace: bool
+) -> tuple[float, float, int]:
+    manager = WSConnectionManager()
+    agent = await manager.connect(BenchWebSocket({"x-custom-authorization": AGENT_ID}))
+    caller_socket = BenchWebSocket({"x-custom-authorization": CALLER_ID})
+    caller = await manager.connect(caller_socket)
+
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    arrived = 0
+    for frame in frames:
+        arrived += len(frame)
+        # the frame can be routed once all of it went over the link
+        delay = started + arrived / link_rate - time.perf_counter()
+        if delay > 0 and not trace:
+            await asyncio.sleep(delay)
+        await manager.process_message(agent, frame)
+        await asyncio.sleep(0)
+    while caller.queue.qsize():
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    await agent.close()
+    await caller.close()
+    return caller_socket.first_received_at - started, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=5)
+    parser.add_argument("--chunk-kb", type=int, default=64)
+    parser.add_argument("--link-mb-per-s", type=float, default=100)
+    args = parser.parse_args()
+
+    response = build_response(int(args.size_mb * 1024 * 1024))
+    link_rate = args.link_mb_per_s * 1024 * 1024
+    print(
+        f"{'frames':>16} {'count':>6} {'first byte, ms':>15} {'total, ms':>10} "
+        f"{'peak, MB':>9}"
+    )
+    for label, chunk_size in (
+        ("agent_response", 0),
+        (f"{args.chunk_kb}KB chunks", args.chunk_kb * 1024),
+    ):
+        frames = build_frames(response, chunk_size)
+        first_byte, elapsed, _ = asyncio.run(run(frames, link_rate, trace=False))
+        _, _, peak = asyncio.run(run(frames, link_rate, trace=True))
+        print(
+            f"{label:>16} {len(frames):>6} {first_byte * 1e3:>15.1f} "
+            f"{elapsed * 1e3:>10.1f} {peak / 1e6:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
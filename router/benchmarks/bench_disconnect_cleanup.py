@@ -0,0 +1,120 @@
+"""
+Cost of a disconnect storm: 50k connections (agents plus the session.send
+connections derived from them) with 5k agents disconnecting at once, using the
+previous substring scan over all connections and the session index.
+
+Run from the router directory:
+    python -m benchmarks.bench_disconnect_cleanup
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import List, Set
+
+from benchmarks.sockets import BenchWebSocket
+from connectors.ws_connector_manager import WSConnectionManager
+from utils.enums import WSMessageType
+
+
+class ScanningConnectionManager(WSConnectionManager):
+    """
+    Manager with the previous cleanup, a substring scan over every connection.
+    """
+
+    async def _cleanup_session_connections(
+        self, client_id: str, skip: Set[str] = frozenset()
+    ) -> None:
+        for connection_id in list(self.active_connections):
+            if client_id in connection_id and connection_id not in skip:
+                await self.send_message(
+                    client_id=connection_id,
+                    message={
+                        "message_type": WSMessageType.AGENT_ERROR.value,
+                        "error": {
+                            "error_message": "Agent has been unregistered",
+                            "agent_uuid": client_id,
+                        },
+                    },
+                )
+
+
+def build_population(connections: int, agents: int) -> tuple[List[str], List[str]]:
+    rng = random.Random(7)
+    agent_ids = [f"{rng.getrandbits(128):032x}" for _ in range(agents)]
+    session_ids = set()
+    while len(session_ids) < connections - agents:
+        session_ids.add(f"{rng.choice(agent_ids)}:{rng.choice(agent_ids)}")
+    return agent_ids, sorted(session_ids)
+
+
+async def run(
+    manager_cls: type, agent_ids: List[str], session_ids: List[str], leaving: int
+) -> tuple[float, int]:
+    manager = manager_cls()
+    sockets = {}
+    agents = [
+        await manager.connect(BenchWebSocket({"x-custom-authorization": agent_id}))
+        for agent_id in agent_ids
+    ]
+    for session_id in session_ids:
+        sockets[session_id] = BenchWebSocket({"x-custom-invoke-key": session_id})
+        await manager.connect(sockets[session_id])
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(manager.disconnect(connection) for connection in agents[:leaving])
+    )
+    elapsed = time.perf_counter() - started
+
+    # let the writer tasks flush the notifications
+    await asyncio.sleep(0)
+    connections = [
+        connection
+        for pool in manager.active_connections.values()
+        for connection in pool
+    ]
+    while any(connection.queue.qsize() for connection in connections):
+        await asyncio.sleep(0.01)
+    notified = sum(socket.received for socket in sockets.values())
+    for connection in connections:
+        await connection.close()
+    return elapsed, notified
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connections", type=int, default=50_000)
+    parser.add_argument("--agents", type=int, default=5_000)
+    parser.add_argument(
+        "--leaving", type=int, default=5_000, help="agents disconnecting at once"
+    )
+    args = parser.parse_args()
+
+    agent_ids, session_ids = build_population(args.connections, args.agents)
+    print(
+        f"{len(agent_ids)} agents, {len(session_ids)} session connections, "
+        f"{args.leaving} agents disconnecting"
+    )
+    print(f"{'cleanup':>8} {'total, s':>10} {'per disconnect, us':>19} {'notified':>9}")
+    results = {}
+    for label, manager_cls in (
+        ("scan", ScanningConnectionManager),
+        ("index", WSConnectionManager),
+    ):
+        elapsed, notified = asyncio.run(
+            run(manager_cls, agent_ids, session_ids, args.leaving)
+        )
+        results[label] = (elapsed, notified)
+        print(
+            f"{label:>8} {elapsed:>10.3f} {elapsed / args.leaving * 1e6:>19.1f} "
+            f"{notified:>9}"
+        )
+
+    assert results["scan"][1] == results["index"][1]
+    print(f"speedup: {results['scan'][0] / results['index'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
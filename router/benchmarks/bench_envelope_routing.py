@@ -0,0 +1,117 @@
+"""
+Per-message CPU cost of routing an AGENT_RESPONSE frame: the previous full
+json.loads / json.dumps path, the same path with the fast codec and the
+envelope-only path.
+
+Frames are built in two shapes, a response that is mostly text and one made of
+many small structured items, with the envelope keys written before or after it.
+
+Run from the router directory:
+    python -m benchmarks.bench_envelope_routing
+"""
+
+import argparse
+import json
+import time
+from typing import Callable
+
+from utils import json_codec
+from utils.envelope import Envelope
+
+ENVELOPE_KEYS = ("message_type", "agent_uuid", "invoked_by")
+SIZES = {"1KB": 1_024, "100KB": 100 * 1_024, "5MB": 5 * 1_024 * 1_024}
+SHAPES = {"text": False, "items": True}
+
+
+def make_item(i: int) -> dict:
+    return {"chunk": i, "lang": "fr", "score": 0.93, "text": f"segment {i}"}
+
+
+def build_frame(size: int, items: bool = True, response_first: bool = False) -> str:
+    """
+    Builds an agent response of roughly the given size: one long text field plus,
+    if `items` is set, a list of small structured items, like a translation with
+    per-chunk metadata.
+    """
+    items_budget = size // 4 if items else 0
+    item_size = len(json.dumps(make_item(0))) + 2
+    chunks = [make_item(i) for i in range(max(items_budget // item_size, 1))]
+    text = "Bonjour le monde, ceci est une traduction. " * (
+        max(size - items_budget, 0) // 44
+    )
+    envelope = {
+        "message_type": "agent_response",
+        "invoked_by": "4f0c2b7e-1d9a-4a43-9a51-6c3f0e2d8b11",
+    }
+    response = {"response": {"translation": text, "chunks": chunks}}
+    members = [response, envelope] if response_first else [envelope, response]
+    return json.dumps({**members[0], **members[1], "execution_time": 1.234})
+
+
+def legacy_route(frame: str) -> str:
+    data = json.loads(frame)
+    message_type = data.pop("message_type", None)
+    data.pop("agent_uuid", None)
+    data.pop("invoked_by", None)
+    data["message_type"] = message_type
+    return json.dumps(data)
+
+
+def decoded_route(frame: str) -> str:
+    # the same dict manipulation as the legacy path, with the fast codec
+    data = json_codec.loads(frame)
+    message_type = data.pop("message_type", None)
+    data.pop("agent_uuid", None)
+    data.pop("invoked_by", None)
+    data["message_type"] = message_type
+    return json_codec.dumps(data)
+
+
+def envelope_route(frame: str) -> str:
+    envelope = Envelope.parse(frame)
+    message_type = envelope.get("message_type")
+    envelope.get("invoked_by")
+    message = envelope.rewrite(drop=ENVELOPE_KEYS, extra={"message_type": message_type})
+    # decoded frames are serialized by the receiving connection
+    return json_codec.dumps(message) if isinstance(message, dict) else message
+
+
+def measure(route: Callable[[str], str], frame: str, min_seconds: float) -> float:
+    iterations = 0
+    started = time.process_time()
+    while (elapsed := time.process_time() - started) < min_seconds:
+        route(frame)
+        iterations += 1
+    return elapsed / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=1.0, help="CPU time per case")
+    args = parser.parse_args()
+
+    print(
+        f"{'payload':>8} {'shape':>6} {'order':>14} {'legacy, us':>12} "
+        f"{'fast codec, us':>15} {'envelope, us':>13} {'speedup':>8}"
+    )
+    for label, size in SIZES.items():
+        for shape, items in SHAPES.items():
+            for response_first in (False, True):
+                frame = build_frame(size, items, response_first)
+                expected = json.loads(legacy_route(frame))
+                assert json.loads(envelope_route(frame)) == expected
+                assert json.loads(decoded_route(frame)) == expected
+
+                legacy = measure(legacy_route, frame, args.seconds)
+                decoded = measure(decoded_route, frame, args.seconds)
+                envelope = measure(envelope_route, frame, args.seconds)
+                order = "response first" if response_first else "envelope first"
+                print(
+                    f"{label:>8} {shape:>6} {order:>14} {legacy * 1e6:>12.1f} "
+                    f"{decoded * 1e6:>15.1f} {envelope * 1e6:>13.1f} "
+                    f"{legacy / envelope:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
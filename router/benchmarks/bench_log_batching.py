@@ -0,0 +1,112 @@
+"""
+Frames and agent logs per second reaching master_server_be while many agents
+log at a steady rate, with every log sent as its own `agent_log` message and
+with logs coalesced into `agent_log_batch` messages.
+
+Every agent sends one log per `1 / --lines-per-s` seconds. The log lane of the
+backend connection keeps its default size and rate limit, so logs it can't
+take in time are dropped. Only the router side is measured: each frame the
+backend receives costs it one handler call and one database commit.
+
+Run from the router directory:
+    python -m benchmarks.bench_log_batching
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Dict
+
+from benchmarks.sockets import BenchWebSocket
+from connectors.ws_connector_manager import WSConnectionManager
+from settings import get_settings
+from utils.enums import WSMessageType
+
+app_settings = get_settings()
+
+
+class BackendWebSocket(BenchWebSocket):
+    """
+    Socket that counts the logs carried by the frames it receives.
+    """
+
+    def __init__(self, headers: Dict[str, str]):
+        super().__init__(headers)
+        self.logs = 0
+
+    async def send_text(self, message: str) -> None:
+        self.logs += message.count('"log_message"')
+        self._record()
+
+
+async def run(agents: int, lines_per_s: float, seconds: float, batching: bool):
+    manager = WSConnectionManager()
+    if not batching:
+        manager.log_batcher = None
+    manager.start()
+    backend_socket = BackendWebSocket({"api-key": app_settings.MASTER_BE_API_KEY})
+    backend = await manager.connect(backend_socket)
+    connections = [
+        await manager.connect(
+            BenchWebSocket({"x-custom-authorization": str(uuid.uuid4())})
+        )
+        for _ in range(agents)
+    ]
+    log = json.dumps(
+        {
+            "message_type": WSMessageType.AGENT_LOG.value,
+            "session_id": str(uuid.uuid4()),
+            "request_id": str(uuid.uuid4()),
+            "log_message": "Translated segment",
+            "log_level": "info",
+        }
+    )
+
+    tick = 1 / lines_per_s
+    started = time.perf_counter()
+    sent = 0
+    busy = 0.0
+    while time.perf_counter() - started < seconds:
+        tick_started = time.perf_counter()
+        for connection in connections:
+            await manager.process_message(connection, log)
+        sent += agents
+        busy += time.perf_counter() - tick_started
+        await asyncio.sleep(max(tick - (time.perf_counter() - tick_started), 0))
+    await manager.stop()
+    await asyncio.sleep(0.1)
+    elapsed = time.perf_counter() - started
+
+    for connection in connections:
+        await connection.close()
+    await backend.close()
+    return (
+        sent / elapsed,
+        backend_socket.received / elapsed,
+        backend_socket.logs / elapsed,
+        busy / elapsed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=500)
+    parser.add_argument("--lines-per-s", type=float, default=20)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'logs':>10} {'sent/s':>8} {'frames/s to BE':>15} "
+        f"{'logs/s to BE':>13} {'router busy':>12}"
+    )
+    for label, batching in (("single", False), ("batched", True)):
+        sent, frames, logs, busy = asyncio.run(
+            run(args.agents, args.lines_per_s, args.seconds, batching)
+        )
+        print(f"{label:>10} {sent:>8.0f} {frames:>15.0f} {logs:>13.0f} {busy:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
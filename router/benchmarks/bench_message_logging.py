@@ -0,0 +1,151 @@
+"""
+Router throughput with message logging left on: no logging, whole messages
+logged as the router did before, and the structured defaults (sampled
+`agent_log`, payloads truncated to 256 characters). Invocations, responses and
+agent logs are routed through the manager, records are written to a counting
+null stream so the formatting cost is measured without disk I/O.
+
+Run from the router directory:
+    python -m benchmarks.bench_message_logging
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+
+from benchmarks.sockets import BenchWebSocket
+from connectors.ws_connector_manager import WSConnectionManager
+from utils.enums import MessageLogMode, WSMessageType
+from utils.message_log import MessageLog
+
+SIZES = {"1KB": 1_024, "100KB": 100 * 1_024}
+AGENT_ID = "0b8e6f2a-6a4e-4c84-9d43-1f7f1c9a2e01"
+CALLER_ID = "4f0c2b7e-1d9a-4a43-9a51-6c3f0e2d8b11"
+
+
+class CountingStream:
+    """
+    Null stream that counts the characters written to it.
+    """
+
+    def __init__(self):
+        self.written = 0
+
+    def write(self, text: str) -> int:
+        self.written += len(text)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def build_logger(stream: CountingStream, enabled: bool) -> logging.Logger:
+    logger = logging.getLogger(f"bench.messages.{id(stream)}")
+    logger.handlers = [logging.StreamHandler(stream)]
+    logger.handlers[0].setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+    )
+    logger.setLevel(logging.INFO if enabled else logging.WARNING)
+    logger.propagate = False
+    return logger
+
+
+def build_frames(size: int) -> tuple[str, str, str]:
+    text = "Bonjour le monde, ceci est une traduction. " * (size // 44)
+    invoke = json.dumps(
+        {
+            "message_type": WSMessageType.AGENT_INVOKE.value,
+            "agent_uuid": AGENT_ID,
+            "request_payload": {"text": text},
+        }
+    )
+    response = json.dumps(
+        {
+            "message_type": WSMessageType.AGENT_RESPONSE.value,
+            "invoked_by": CALLER_ID,
+            "response": {"translation": text},
+            "execution_time": 1.234,
+        }
+    )
+    log = json.dumps(
+        {
+            "message_type": WSMessageType.AGENT_LOG.value,
+            "log_message": "Translated segment",
+            "log_level": "info",
+        }
+    )
+    return invoke, response, log
+
+
+async def run(
+    frames: tuple[str, str, str],
+    rounds: int,
+    logs_per_round: int,
+    mode: Optional[MessageLogMode],
+) -> tuple[float, int, int]:
+    manager = WSConnectionManager()
+    stream = CountingStream()
+    manager.message_log = MessageLog(
+        mode=mode or MessageLogMode.STRUCTURED,
+        sample_rates={"agent_log": 0.1},
+        logger=build_logger(stream, enabled=mode is not None),
+    )
+    if mode == MessageLogMode.FULL:
+        manager.message_log.sample_rates = {}
+
+    agent = await manager.connect(BenchWebSocket({"x-custom-authorization": AGENT_ID}))
+    caller = await manager.connect(
+        BenchWebSocket({"x-custom-authorization": CALLER_ID})
+    )
+    invoke, response, log = frames
+
+    messages = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await manager.process_message(caller, invoke)
+        await manager.process_message(agent, response)
+        for _ in range(logs_per_round):
+            await manager.process_message(agent, log)
+        messages += 2 + logs_per_round
+        # lets the writer tasks drain the outbound queues
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+
+    await agent.close()
+    await caller.close()
+    return elapsed, messages, stream.written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=5_000)
+    parser.add_argument(
+        "--logs-per-round", type=int, default=10, help="agent_log frames per invocation"
+    )
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'logging':>11} {'msg/s':>10} {'log MB':>9} {'vs off':>8}")
+    for label, size in SIZES.items():
+        frames = build_frames(size)
+        baseline = None
+        for name, mode in (
+            ("off", None),
+            ("full", MessageLogMode.FULL),
+            ("structured", MessageLogMode.STRUCTURED),
+        ):
+            elapsed, messages, written = asyncio.run(
+                run(frames, args.rounds, args.logs_per_round, mode)
+            )
+            rate = messages / elapsed
+            baseline = baseline or rate
+            print(
+                f"{label:>6} {name:>11} {rate:>10.0f} {written / 1e6:>9.1f} "
+                f"{rate / baseline:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Latency of an agent response to master_server_be while agents flood the
+backend socket with `agent_log` messages, with logs queued in front of the
+response (the previous single queue) and in the low-priority log lane.
+
+The backend socket writes one frame per `--write-ms`, so it can't keep up with
+the log flood and its queue fills up.
+
+Run from the router directory:
+    python -m benchmarks.bench_priority_lanes
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, Optional
+
+from benchmarks.sockets import BenchWebSocket
+from connectors.ws_connector_manager import WSConnectionManager
+from settings import get_settings
+from utils.enums import MessageLane, WSMessageType
+
+app_settings = get_settings()
+
+AGENT_ID = "0b8e6f2a-6a4e-4c84-9d43-1f7f1c9a2e01"
+
+
+class SlowWebSocket(BenchWebSocket):
+    """
+    Socket that takes a while to write every frame and notes when the response arrives.
+    """
+
+    def __init__(self, headers: Dict[str, str], write_seconds: float):
+        super().__init__(headers)
+        self.write_seconds = write_seconds
+        self.response_at: Optional[float] = None
+
+    async def send_text(self, message: str) -> None:
+        await asyncio.sleep(self.write_seconds)
+        if WSMessageType.AGENT_RESPONSE.value in message:
+            self.response_at = time.perf_counter()
+        self._record()
+
+
+class SingleLaneConnectionManager(WSConnectionManager):
+    """
+    Manager that queues agent logs with every other message, as before the log lane.
+    """
+
+    async def send_message(self, client_id, message, message_type=None, lane=None):
+        return await super().send_message(
+            client_id, message, message_type=message_type, lane=MessageLane.CONTROL
+        )
+
+
+async def run(manager_cls: type, logs: int, write_seconds: float) -> tuple[float, int]:
+    manager = manager_cls()
+    backend_socket = SlowWebSocket(
+        {"api-key": app_settings.MASTER_BE_API_KEY}, write_seconds
+    )
+    backend = await manager.connect(backend_socket)
+    agent = await manager.connect(BenchWebSocket({"x-custom-authorization": AGENT_ID}))
+
+    await manager.process_message(
+        backend,
+        json.dumps(
+            {
+                "message_type": WSMessageType.AGENT_INVOKE.value,
+                "agent_uuid": AGENT_ID,
+                "request_payload": {"text": "translate me"},
+            }
+        ),
+    )
+    log = json.dumps(
+        {
+            "message_type": WSMessageType.AGENT_LOG.value,
+            "log_message": "Translated segment",
+            "log_level": "info",
+        }
+    )
+    for _ in range(logs):
+        await manager.process_message(agent, log)
+
+    started = time.perf_counter()
+    await manager.process_message(
+        agent,
+        json.dumps(
+            {
+                "message_type": WSMessageType.AGENT_RESPONSE.value,
+                "invoked_by": backend.client_id,
+                "response": {"translation": "traduis-moi"},
+            }
+        ),
+    )
+    while backend_socket.response_at is None:
+        await asyncio.sleep(write_seconds)
+    latency = backend_socket.response_at - started
+    dropped = backend.stats().dropped + backend.stats().log_dropped
+
+    await agent.close()
+    await backend.close()
+    return latency, dropped
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logs", type=int, default=5_000)
+    parser.add_argument("--write-ms", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{'queues':>12} {'response latency, ms':>21} {'logs dropped':>13}")
+    for label, manager_cls in (
+        ("single", SingleLaneConnectionManager),
+        ("log lane", WSConnectionManager),
+    ):
+        latency, dropped = asyncio.run(run(manager_cls, args.logs, args.write_ms / 1e3))
+        print(f"{label:>12} {latency * 1e3:>21.1f} {dropped:>13}")
+
+
+if __name__ == "__main__":
+    main()
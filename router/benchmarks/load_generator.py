@@ -0,0 +1,427 @@
+"""
+Load generator for a running router: simulated agents and callers that speak the
+router protocol over real WebSocket connections.
+
+Agents connect, send `agent_register`, answer every invocation after a think
+time with a response of `--response-bytes` and `--logs-per-invoke` `agent_log`
+messages, and with `--churn` reconnect after a random lifetime. Callers keep
+one invocation in flight each, pick a random agent, wait for its response and
+think before the next one. A simulated master_server_be takes the register,
+unregister and log traffic, so no other service is needed.
+
+Routing latency is one hop through the router (caller to agent or agent to
+caller); both ends run in this process and share its clock, so it includes the
+time this process takes to read the frame. Run several generators if it is the
+bottleneck, the router runs with `ROUTER_MESSAGE_LOG_LEVEL=WARNING` for load
+tests.
+
+Run from the router directory against a local router:
+    uvicorn main:app --port 8080 &
+    python -m benchmarks.load_generator --url ws://localhost:8080/ws
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+import websockets
+
+from settings import get_settings
+from utils.enums import WSMessageType
+
+app_settings = get_settings()
+
+
+class LoadStats:
+    """
+    Counters and latency samples collected while the load runs.
+    """
+
+    def __init__(self):
+        self.recording = False
+        self.invokes = 0
+        self.responses = 0
+        self.timeouts = 0
+        self.errors: Counter = Counter()
+        self.logs_sent = 0
+        self.logs_received = 0
+        self.reconnects = 0
+        self.connect_failures = 0
+        self.hops: List[float] = []
+        self.round_trips: List[float] = []
+
+    def hop(self, sent_at: float) -> None:
+        if self.recording:
+            self.hops.append(time.perf_counter() - sent_at)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values (List[float]): The samples.
+        q (float): The percentile, 0 to 100.
+
+    Returns:
+        float: The sample at the percentile, 0 without samples.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q / 100), len(ordered) - 1)]
+
+
+def think(mean: float) -> float:
+    return random.expovariate(1 / mean) if mean > 0 else 0.0
+
+
+async def open_socket(
+    url: str, headers: Dict[str, str], limit: asyncio.Semaphore, stats: LoadStats
+):
+    # handshakes are throttled so thousands of clients don't hit the router at once
+    async with limit:
+        try:
+            return await websockets.connect(
+                url, additional_headers=headers, max_size=None, open_timeout=30
+            )
+        except (OSError, asyncio.TimeoutError, websockets.WebSocketException):
+            stats.connect_failures += 1
+            return None
+
+
+async def run_backend(
+    url: str, stats: LoadStats, limit: asyncio.Semaphore, stop: asyncio.Event
+) -> None:
+    """
+    Simulated master_server_be, it counts the agent logs it receives.
+    """
+    ws = await open_socket(
+        url, {"api-key": app_settings.MASTER_BE_API_KEY}, limit, stats
+    )
+    if ws is None:
+        return
+    async with ws:
+        while not stop.is_set():
+            try:
+                frame = await asyncio.wait_for(ws.recv(), 1)
+            except asyncio.TimeoutError:
+                continue
+            except websockets.ConnectionClosed:
+                return
+            if stats.recording:
+                stats.logs_received += frame.count('"log_message"')
+
+
+async def run_agent(
+    url: str,
+    agent_id: str,
+    args: argparse.Namespace,
+    stats: LoadStats,
+    limit: asyncio.Semaphore,
+    connected: asyncio.Semaphore,
+    stop: asyncio.Event,
+) -> None:
+    """
+    Simulated agent, it reconnects after a random lifetime when churn is enabled.
+    """
+    payload = "x" * args.response_bytes
+    first = True
+    while not stop.is_set():
+        ws = await open_socket(url, {"x-custom-authorization": agent_id}, limit, stats)
+        if ws is None:
+            await asyncio.sleep(1)
+            continue
+        if first:
+            connected.release()
+            first = False
+        else:
+            stats.reconnects += 1
+
+        lifetime = random.expovariate(args.churn) if args.churn > 0 else float("inf")
+        deadline = time.monotonic() + lifetime
+        handlers = set()
+        async with ws:
+            await ws.send(
+                json.dumps(
+                    {
+                        "message_type": WSMessageType.AGENT_REGISTER.value,
+                        "request_payload": {
+                            "agent_name": f"load-{agent_id[:8]}",
+                            "agent_description": "Synthetic agent of the load generator",
+                            "agent_input_schema": {},
+                        },
+                    }
+                )
+            )
+            while not stop.is_set() and time.monotonic() < deadline:
+                try:
+                    frame = await asyncio.wait_for(
+                        ws.recv(), min(deadline - time.monotonic(), 1)
+                    )
+                except asyncio.TimeoutError:
+                    continue
+                except websockets.ConnectionClosed:
+                    break
+                message = json.loads(frame)
+                if message.get("message_type") == WSMessageType.PING.value:
+                    await ws.send(
+                        json.dumps({"message_type": WSMessageType.PONG.value})
+                    )
+                    continue
+                if "invoked_by" not in message:
+                    continue
+                request = message.get("request_payload") or {}
+                stats.hop(request.get("sent_at", time.perf_counter()))
+                task = asyncio.create_task(
+                    answer(ws, agent_id, message, request, payload, args, stats)
+                )
+                handlers.add(task)
+                task.add_done_callback(handlers.discard)
+            for task in handlers:
+                task.cancel()
+        await asyncio.sleep(think(args.reconnect_delay))
+
+
+async def answer(
+    ws,
+    agent_id: str,
+    message: dict,
+    request: dict,
+    payload: str,
+    args: argparse.Namespace,
+    stats: LoadStats,
+) -> None:
+    started = time.perf_counter()
+    await asyncio.sleep(think(args.agent_think))
+    try:
+        for line in range(args.logs_per_invoke):
+            await ws.send(
+                json.dumps(
+                    {
+                        "message_type": WSMessageType.AGENT_LOG.value,
+                        "session_id": request.get("session_id"),
+                        "request_id": request.get("request_id"),
+                        "log_message": f"Step {line} of {agent_id}",
+                        "log_level": "info",
+                    }
+                )
+            )
+            stats.logs_sent += stats.recording
+        await ws.send(
+            json.dumps(
+                {
+                    "message_type": WSMessageType.AGENT_RESPONSE.value,
+                    "invoked_by": message["invoked_by"],
+                    "response": {
+                        "seq": request.get("seq"),
+                        "sent_at": time.perf_counter(),
+                        "data": payload,
+                    },
+                    "execution_time": time.perf_counter() - started,
+                }
+            )
+        )
+    except websockets.ConnectionClosed:
+        pass
+
+
+async def run_caller(
+    url: str,
+    caller_id: str,
+    agent_ids: List[str],
+    args: argparse.Namespace,
+    stats: LoadStats,
+    limit: asyncio.Semaphore,
+    connected: asyncio.Semaphore,
+    start: asyncio.Event,
+    stop: asyncio.Event,
+) -> None:
+    """
+    Simulated caller with one invocation in flight at a time.
+    """
+    ws = await open_socket(url, {"x-custom-invoke-key": caller_id}, limit, stats)
+    connected.release()
+    if ws is None:
+        return
+    payload = "x" * args.request_bytes
+    session_id = str(uuid.uuid4())
+    seq = 0
+    await start.wait()
+    async with ws:
+        while not stop.is_set():
+            seq += 1
+            sent_at = time.perf_counter()
+            try:
+                await ws.send(
+                    json.dumps(
+                        {
+                            "message_type": WSMessageType.AGENT_INVOKE.value,
+                            "agent_uuid": random.choice(agent_ids),
+                            "request_payload": {
+                                "seq": seq,
+                                "sent_at": sent_at,
+                                "session_id": session_id,
+                                "request_id": str(uuid.uuid4()),
+                                "data": payload,
+                            },
+                        }
+                    )
+                )
+                if stats.recording:
+                    stats.invokes += 1
+                await wait_for_answer(ws, seq, sent_at, args.timeout, stats)
+            except websockets.ConnectionClosed:
+                return
+            await asyncio.sleep(think(args.caller_think))
+
+
+async def wait_for_answer(
+    ws, seq: int, sent_at: float, timeout: float, stats: LoadStats
+) -> None:
+    deadline = sent_at + timeout
+    while (remaining := deadline - time.perf_counter()) > 0:
+        try:
+            frame = await asyncio.wait_for(ws.recv(), remaining)
+        except asyncio.TimeoutError:
+            break
+        message = json.loads(frame)
+        message_type = message.get("message_type")
+        if message_type == WSMessageType.AGENT_RESPONSE.value:
+            response = message.get("response") or {}
+            # a response to an invocation that timed out earlier
+            if response.get("seq") != seq:
+                continue
+            stats.hop(response["sent_at"])
+            if stats.recording:
+                stats.responses += 1
+                stats.round_trips.append(time.perf_counter() - sent_at)
+            return
+        if message_type == WSMessageType.AGENT_ERROR.value or "error" in message:
+            if stats.recording:
+                stats.errors[(message.get("error") or {}).get("error_type")] += 1
+            return
+    if stats.recording:
+        stats.timeouts += 1
+
+
+def report(stats: LoadStats, args: argparse.Namespace, elapsed: float) -> None:
+    def latencies(values: List[float]) -> str:
+        return "  ".join(
+            f"p{q} {percentile(values, q) * 1e3:8.2f} ms" for q in (50, 95, 99)
+        )
+
+    print(f"agents {args.agents}, callers {args.callers}, {elapsed:.1f} s measured")
+    print(f"{'invocations':>16} {stats.invokes}")
+    print(
+        f"{'responses':>16} {stats.responses} ({stats.responses / elapsed:.0f}/s), "
+        f"timeouts {stats.timeouts}"
+    )
+    if stats.errors:
+        errors = ", ".join(f"{kind}: {count}" for kind, count in stats.errors.items())
+        print(f"{'errors':>16} {errors}")
+    print(
+        f"{'logs':>16} {stats.logs_sent} sent, {stats.logs_received} received by "
+        f"master_server_be"
+    )
+    routed = 2 * stats.responses + stats.logs_received
+    print(f"{'routed':>16} {routed / elapsed:.0f} messages/s")
+    print(f"{'routing latency':>16} {latencies(stats.hops)}")
+    print(f"{'round trip':>16} {latencies(stats.round_trips)}")
+    print(
+        f"{'churn':>16} {stats.reconnects} reconnects, "
+        f"{stats.connect_failures} failed connects"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    stats = LoadStats()
+    limit = asyncio.Semaphore(args.connect_concurrency)
+    connected = asyncio.Semaphore(0)
+    start = asyncio.Event()
+    stop = asyncio.Event()
+    agent_ids = [str(uuid.uuid4()) for _ in range(args.agents)]
+
+    tasks = []
+    if not args.no_backend:
+        tasks.append(asyncio.create_task(run_backend(args.url, stats, limit, stop)))
+    tasks += [
+        asyncio.create_task(
+            run_agent(args.url, agent_id, args, stats, limit, connected, stop)
+        )
+        for agent_id in agent_ids
+    ]
+    tasks += [
+        asyncio.create_task(
+            run_caller(
+                args.url,
+                f"load-caller-{i}",
+                agent_ids,
+                args,
+                stats,
+                limit,
+                connected,
+                start,
+                stop,
+            )
+        )
+        for i in range(args.callers)
+    ]
+
+    for _ in range(args.agents + args.callers):
+        await connected.acquire()
+    print(f"connected {args.agents} agents and {args.callers} callers")
+
+    start.set()
+    await asyncio.sleep(args.warmup)
+    stats.recording = True
+    started = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    stats.recording = False
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    report(stats, args, elapsed)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", default="ws://localhost:8080/ws")
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--callers", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30, help="seconds measured")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds not measured")
+    parser.add_argument("--request-bytes", type=int, default=256)
+    parser.add_argument("--response-bytes", type=int, default=1024)
+    parser.add_argument("--logs-per-invoke", type=int, default=2)
+    parser.add_argument(
+        "--agent-think", type=float, default=0.01, help="mean seconds per invocation"
+    )
+    parser.add_argument(
+        "--caller-think", type=float, default=0.05, help="mean seconds between calls"
+    )
+    parser.add_argument(
+        "--churn",
+        type=float,
+        default=0,
+        help="reconnects per agent per second, e.g. 0.01 for a 100 s mean lifetime",
+    )
+    parser.add_argument("--reconnect-delay", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--connect-concurrency", type=int, default=100)
+    parser.add_argument(
+        "--no-backend", action="store_true", help="don't simulate master_server_be"
+    )
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import time
+from typing import Dict, Optional
+
+
+class BenchWebSocket:
+    """
+    In-process socket with the parts of the WebSocket API the manager uses.
+    """
+
+    def __init__(self, headers: Dict[str, str]):
+        self.headers = headers
+        self.received = 0
+        self.first_received_at: Optional[float] = None
+
+    async def accept(self, headers=None) -> None:
+        pass
+
+    async def send_text(self, message: str) -> None:
+        self._record()
+
+    async def send_bytes(self, message: bytes) -> None:
+        self._record()
+
+    def _record(self) -> None:
+        if self.first_received_at is None:
+            self.first_received_at = time.perf_counter()
+        self.received += 1
@@ -0,0 +1,298 @@
+import asyncio
+import contextlib
+import hmac
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from websockets.asyncio.client import ClientConnection, connect
+from websockets.exceptions import WebSocketException
+
+from connectors.registry import ConnectionRegistry
+from utils.enums import ClusterFrameType, MessageLane
+
+
+class ClusterLink:
+    """
+    Internal link between router nodes of a cluster.
+
+    Keeps one outgoing WebSocket per peer node and forwards frames for clients
+    that are connected to another node. A link frame is a JSON header line
+    followed by the untouched client message, so payloads are never re-encoded.
+
+    The node heartbeats into the registry and prunes the nodes that stopped doing
+    so. The clients of a pruned node are handed to `on_clients_lost`.
+    """
+
+    SECRET_HEADER = "x-cluster-secret"
+    NODE_HEADER = "x-cluster-node"
+
+    def __init__(
+        self,
+        node_id: str,
+        node_url: str,
+        registry: ConnectionRegistry,
+        secret: str,
+        heartbeat_interval: float,
+    ):
+        """
+        Initializes the cluster link of the current node.
+
+        Args:
+            node_id (str): Unique ID of the current router node.
+            node_url (str): Internal link URL of the current node, published to peers.
+            registry (ConnectionRegistry): Registry shared by all cluster nodes.
+            secret (str): Shared secret peers must present on the internal link.
+            heartbeat_interval (float): Seconds between heartbeats of the node, must be
+                well below the node TTL of the registry.
+        """
+        self.node_id = node_id
+        self.node_url = node_url
+        self.registry = registry
+        self.secret = secret
+        self.heartbeat_interval = heartbeat_interval
+        self._peers: Dict[str, ClientConnection] = {}
+        self._peer_locks: Dict[str, asyncio.Lock] = {}
+        self._local_clients: Callable[[], Iterable[str]] = tuple
+        self._on_clients_lost: Optional[Callable[[List[str]], Awaitable[None]]] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    def bind(
+        self,
+        local_clients: Callable[[], Iterable[str]],
+        on_clients_lost: Callable[[List[str]], Awaitable[None]],
+    ) -> None:
+        """
+        Connects the link to the connection manager of the node.
+
+        Args:
+            local_clients (Callable[[], Iterable[str]]): Returns the clients claimed by
+                the node, re-claimed when the node rejoins after its heartbeat expired.
+            on_clients_lost (Callable[[List[str]], Awaitable[None]]): Called with the
+                clients of the dead nodes pruned by this node.
+        """
+        self._local_clients = local_clients
+        self._on_clients_lost = on_clients_lost
+
+    async def start(self) -> None:
+        """
+        Publishes the current node in the registry and starts its heartbeat.
+        """
+        await self.registry.register_node(self.node_id, self.node_url)
+        self._heartbeat = asyncio.create_task(self._run_heartbeat())
+        logging.info(
+            f"Router node {self.node_id} joined the cluster at {self.node_url}"
+        )
+
+    async def stop(self) -> None:
+        """
+        Closes the peer links and removes the node with its clients from the registry.
+        """
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            # the registry is closed below, the heartbeat must not outlive it
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._heartbeat
+            self._heartbeat = None
+        for peer in self._peers.values():
+            await peer.close()
+        self._peers.clear()
+        await self.registry.unregister_node(self.node_id)
+        await self.registry.close()
+
+    def is_authorized(self, secret: Optional[str]) -> bool:
+        """
+        Checks the secret presented by a peer node on the internal link.
+
+        Args:
+            secret (Optional[str]): Value of the cluster secret header.
+
+        Returns:
+            bool: True if the peer is allowed to forward messages.
+        """
+        return bool(secret) and hmac.compare_digest(
+            secret.encode(), self.secret.encode()
+        )
+
+    @staticmethod
+    def encode_frame(
+        frame_type: ClusterFrameType,
+        client_id: str,
+        message: str = "",
+        invoked_by: Optional[str] = None,
+        lane: MessageLane = MessageLane.CONTROL,
+        request_id: Optional[str] = None,
+    ) -> str:
+        """
+        Builds an internal link frame.
+
+        Args:
+            frame_type (ClusterFrameType): The kind of the frame.
+            client_id (str): The ID of the client the frame refers to.
+            message (str): The serialized client message, empty for control frames.
+            invoked_by (Optional[str]): The caller if the message is an invocation, it is
+                tracked by the node the invoked agent is connected to.
+            lane (MessageLane): The outbound queue of the message on the receiving node.
+            request_id (Optional[str]): The request ID sent with an invocation.
+
+        Returns:
+            str: The raw frame.
+        """
+        header = {"type": frame_type.value, "client_id": client_id}
+        if invoked_by:
+            header["invoked_by"] = invoked_by
+        if request_id:
+            header["request_id"] = request_id
+        if lane != MessageLane.CONTROL:
+            header["lane"] = lane.value
+        return f"{json.dumps(header)}\n{message}"
+
+    @staticmethod
+    def decode_frame(
+        frame: str,
+    ) -> Tuple[str, str, str, Optional[str], Optional[str], MessageLane]:
+        """
+        Splits an internal link frame into its parts.
+
+        Args:
+            frame (str): The raw frame received from a peer node.
+
+        Returns:
+            Tuple[str, str, str, Optional[str], Optional[str], MessageLane]: The frame
+                type, target client ID, client message, the caller and the request ID
+                of an invocation and the lane.
+        """
+        header, _, message = frame.partition("\n")
+        header = json.loads(header)
+        return (
+            header["type"],
+            header["client_id"],
+            message,
+            header.get("invoked_by"),
+            header.get("request_id"),
+            MessageLane(header.get("lane", MessageLane.CONTROL.value)),
+        )
+
+    async def owner(self, client_id: str) -> Optional[str]:
+        """
+        Resolves the node holding the client's socket.
+
+        Args:
+            client_id (str): The ID of the client.
+
+        Returns:
+            Optional[str]: The owning node ID or None if the client is not connected.
+        """
+        return await self.registry.owner(client_id)
+
+    async def forward(
+        self,
+        node_id: str,
+        client_id: str,
+        message: str,
+        invoked_by: Optional[str] = None,
+        lane: MessageLane = MessageLane.CONTROL,
+        request_id: Optional[str] = None,
+    ) -> bool:
+        """
+        Forwards a client message to the node that holds the client's socket.
+
+        Args:
+            node_id (str): The ID of the owning node.
+            client_id (str): The ID of the target client.
+            message (str): The serialized message.
+            invoked_by (Optional[str]): The caller if the message is an invocation.
+            lane (MessageLane): The outbound queue of the message on the receiving node.
+            request_id (Optional[str]): The request ID sent with an invocation.
+
+        Returns:
+            bool: True if the frame was handed over to the peer link.
+        """
+        frame = self.encode_frame(
+            ClusterFrameType.DELIVER,
+            client_id,
+            message,
+            invoked_by=invoked_by,
+            lane=lane,
+            request_id=request_id,
+        )
+        return await self._send(node_id, frame)
+
+    async def broadcast_disconnect(self, client_id: str) -> None:
+        """
+        Notifies all peer nodes that a client has left the cluster.
+
+        Args:
+            client_id (str): The ID of the disconnected client.
+        """
+        frame = self.encode_frame(ClusterFrameType.CLIENT_DISCONNECTED, client_id)
+        for node_id in await self.registry.nodes():
+            if node_id != self.node_id:
+                await self._send(node_id, frame)
+
+    async def heartbeat(self) -> None:
+        """
+        Refreshes the node in the registry and prunes the dead nodes.
+        """
+        if not await self.registry.register_node(self.node_id, self.node_url):
+            # peers may have pruned the node and its claims in the meantime
+            logging.warning(
+                f"Heartbeat of router node {self.node_id} had expired, "
+                "re-claiming its clients"
+            )
+            for client_id in list(self._local_clients()):
+                await self.registry.claim(client_id, self.node_id)
+        if lost := await self.registry.prune():
+            logging.warning(
+                f"Router node {self.node_id} pruned the claims of {len(lost)} clients "
+                "of dead nodes"
+            )
+            if self._on_clients_lost:
+                await self._on_clients_lost(lost)
+
+    async def _run_heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.heartbeat()
+            except Exception:
+                logging.exception(f"Heartbeat of router node {self.node_id} failed")
+
+    async def _send(self, node_id: str, frame: str) -> bool:
+        try:
+            peer = await self._peer(node_id)
+            if not peer:
+                return False
+            await peer.send(frame)
+            return True
+        except (OSError, WebSocketException) as e:
+            logging.warning(f"Failed to forward message to router node {node_id}: {e}")
+            self._peers.pop(node_id, None)
+            return False
+
+    async def _peer(self, node_id: str) -> Optional[ClientConnection]:
+        if peer := self._peers.get(node_id):
+            return peer
+
+        lock = self._peer_locks.setdefault(node_id, asyncio.Lock())
+        async with lock:
+            if peer := self._peers.get(node_id):
+                return peer
+
+            node_url = await self.registry.node_url(node_id)
+            if not node_url:
+                logging.warning(
+                    f"Router node {node_id} is not registered in the cluster"
+                )
+                return None
+
+            peer = await connect(
+                node_url,
+                additional_headers={
+                    self.SECRET_HEADER: self.secret,
+                    self.NODE_HEADER: self.node_id,
+                },
+                max_size=None,
+            )
+            self._peers[node_id] = peer
+            return peer
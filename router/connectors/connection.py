@@ -0,0 +1,361 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+from uuid import uuid4
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from utils import json_codec, msgpack_codec
+from utils.enums import ClientType, MessageEncoding, MessageLane, OverflowPolicy
+from utils.metrics import RouterMetrics
+from utils.pydantic_models import QueueStats
+
+# WebSocket close code sent to clients that can't keep up with their outbound traffic
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+async def receive_frame(websocket: WebSocket) -> str | bytes:
+    """
+    Waits for the next text or binary frame from a client.
+
+    Args:
+        websocket (WebSocket): The accepted WebSocket connection.
+
+    Returns:
+        str | bytes: JSON text or a binary MessagePack frame.
+
+    Raises:
+        WebSocketDisconnect: If the client has disconnected.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message["code"], message.get("reason"))
+    if message.get("text") is not None:
+        return message["text"]
+    return message["bytes"]
+
+
+class _TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def wait_time(self) -> float:
+        """
+        Seconds until a token is available, 0 if one is.
+        """
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class WSConnection:
+    """
+    Router side of a client WebSocket.
+
+    Outgoing messages are put to a bounded queue that is drained by a dedicated
+    writer task, so a slow or stalled receiver never blocks the receive loop of
+    the client that triggered the message. The overflow policy decides what
+    happens when the queue is full.
+
+    Agent logs go to a second, lower-priority queue. The writer only takes a log
+    while the main queue is empty and at most at the log rate limit, so a chatty
+    agent can't delay invocations and responses. A full log queue drops logs
+    instead of blocking the sender.
+
+    Clients that negotiated MessagePack exchange binary frames, everyone else
+    exchanges JSON text frames. Messages are encoded for the receiver when they
+    are queued.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        client_id: str,
+        max_queue_size: int,
+        overflow_policy: OverflowPolicy,
+        encoding: MessageEncoding = MessageEncoding.JSON,
+        client_type: ClientType = ClientType.AGENT,
+        metrics: Optional[RouterMetrics] = None,
+        agent_jwt: Optional[str] = None,
+        heartbeat: bool = False,
+        log_queue_size: int = 0,
+        log_rate_limit: float = 0,
+        log_overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        on_failed: Optional[Callable[["WSConnection"], Awaitable[None]]] = None,
+        session: Optional[str] = None,
+    ):
+        """
+        Initializes the connection with an empty outbound queue.
+
+        Args:
+            websocket (WebSocket): The accepted WebSocket connection.
+            client_id (str): The resolved client ID.
+            max_queue_size (int): Maximum number of queued outgoing messages.
+            overflow_policy (OverflowPolicy): What to do when the queue is full.
+            encoding (MessageEncoding): Wire encoding negotiated with the client.
+            client_type (ClientType): How the client authenticated.
+            metrics (Optional[RouterMetrics]): Metrics the written frames are counted in.
+            agent_jwt (Optional[str]): The JWT the agent connected with.
+            heartbeat (bool): Whether the client answers the router's pings.
+            log_queue_size (int): Maximum number of queued logs, 0 for an unbounded queue.
+            log_rate_limit (float): Logs written per second at most, 0 for no limit.
+            log_overflow_policy (OverflowPolicy): Which log is dropped when the log
+                queue is full, the newest one unless DROP_OLDEST.
+            on_failed (Optional[Callable[[WSConnection], Awaitable[None]]]): Called
+                by the writer task once writing to the socket failed.
+            session (Optional[str]): ID of the agent process, the same across its
+                reconnects.
+        """
+        self.websocket = websocket
+        self.client_id = client_id
+        # several connections of one agent are told apart by their replica ID
+        self.replica_id = uuid4().hex
+        self.session = session
+        self.agent_jwt = agent_jwt
+        # a draining replica gets no new invocations and is closed once it is idle
+        self.draining = False
+        self.overflow_policy = overflow_policy
+        self.encoding = encoding
+        self.client_type = client_type
+        self.metrics = metrics
+        self.queue: asyncio.Queue[str | bytes] = asyncio.Queue(maxsize=max_queue_size)
+        self.log_queue: asyncio.Queue[str | bytes] = asyncio.Queue(
+            maxsize=log_queue_size
+        )
+        self.log_overflow_policy = log_overflow_policy
+        self._log_rate = _TokenBucket(log_rate_limit) if log_rate_limit > 0 else None
+        self.on_failed = on_failed
+        # set whenever a message is queued in any lane
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.heartbeat = heartbeat
+        # monotonic time of the connect and of the last frame from the client
+        self.connected_at = time.monotonic()
+        self.last_seen = self.connected_at
+
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.log_sent = 0
+        self.log_dropped = 0
+
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Starts the writer task draining the outbound queue.
+        """
+        self._writer = asyncio.create_task(self._drain())
+
+    async def close(self) -> None:
+        """
+        Stops the writer task. Messages left in the queue are discarded.
+        """
+        self.closed = True
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        self._discard_queue()
+
+    def is_alive(self, idle_timeout: float, now: Optional[float] = None) -> bool:
+        """
+        Checks whether the connection can still be written to and, if the client
+        answers heartbeats, sent a frame within the idle timeout.
+
+        Args:
+            idle_timeout (float): Seconds without a frame after which a connection is stale.
+            now (Optional[float]): Current monotonic time.
+
+        Returns:
+            bool: False for connections whose writer failed or that went stale.
+        """
+        if self.closed:
+            return False
+        if not self.heartbeat:
+            return True
+        now = time.monotonic() if now is None else now
+        return now - self.last_seen <= idle_timeout
+
+    def encode(self, message: str | dict) -> str | bytes:
+        """
+        Serializes a message in the encoding of the client.
+
+        Args:
+            message (str | dict): JSON text or a message that is not serialized yet.
+
+        Returns:
+            str | bytes: JSON text or a MessagePack frame.
+        """
+        if self.encoding == MessageEncoding.MSGPACK:
+            if isinstance(message, str):
+                message = json_codec.loads(message)
+            return msgpack_codec.dumps(message)
+        return json_codec.dumps(message) if isinstance(message, dict) else message
+
+    async def send(
+        self,
+        message: str | dict,
+        lane: MessageLane = MessageLane.CONTROL,
+        wait: bool = True,
+    ) -> bool:
+        """
+        Queues a message for delivery according to the overflow policy.
+
+        Args:
+            message (str | dict): JSON text or a message that is not serialized yet.
+            lane (MessageLane): The queue of the message, LOG for agent logs.
+            wait (bool): Whether the BLOCK policy waits for a free slot, the message
+                is dropped instead if not.
+
+        Returns:
+            bool: True if the message was queued.
+        """
+        if self.closed:
+            if lane == MessageLane.LOG:
+                self.log_dropped += 1
+            else:
+                self.dropped += 1
+            return False
+
+        message = self.encode(message)
+        if lane == MessageLane.LOG:
+            return self._queue_log(message)
+
+        if self.queue.full():
+            if self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+                self.queue.get_nowait()
+                self.dropped += 1
+
+            elif self.overflow_policy == OverflowPolicy.DROP_NEWEST:
+                self.dropped += 1
+                return False
+
+            elif self.overflow_policy == OverflowPolicy.DISCONNECT:
+                logging.warning(
+                    f"Outbound queue of {self.client_id} is full, closing the slow connection"
+                )
+                self.dropped += 1
+                await self._close_slow_consumer()
+                return False
+
+            elif not wait:
+                self.dropped += 1
+                return False
+
+        # with BLOCK policy waits until the writer frees a slot
+        await self.queue.put(message)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        self._ready.set()
+        return True
+
+    def _queue_log(self, message: str | bytes) -> bool:
+        if self.log_queue.full():
+            self.log_dropped += 1
+            if self.log_overflow_policy != OverflowPolicy.DROP_OLDEST:
+                return False
+            self.log_queue.get_nowait()
+        self.log_queue.put_nowait(message)
+        self._ready.set()
+        return True
+
+    def stats(self) -> QueueStats:
+        """
+        Returns the outbound queue statistics of the connection.
+
+        Returns:
+            QueueStats: Current and peak queue depth, sent and dropped counters.
+        """
+        return QueueStats(
+            depth=self.queue.qsize(),
+            max_depth=self.max_depth,
+            capacity=self.queue.maxsize,
+            sent=self.sent,
+            dropped=self.dropped,
+            overflow_policy=self.overflow_policy.value,
+            log_depth=self.log_queue.qsize(),
+            log_sent=self.log_sent,
+            log_dropped=self.log_dropped,
+        )
+
+    async def _next_message(self) -> tuple[str | bytes, MessageLane]:
+        while True:
+            if not self.queue.empty():
+                return self.queue.get_nowait(), MessageLane.CONTROL
+
+            wait = None
+            if not self.log_queue.empty():
+                wait = self._log_rate.wait_time() if self._log_rate else 0.0
+                if not wait:
+                    if self._log_rate:
+                        self._log_rate.take()
+                    return self.log_queue.get_nowait(), MessageLane.LOG
+
+            # wakes up on the next queued message or when the log rate allows a log
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _drain(self) -> None:
+        while True:
+            message, lane = await self._next_message()
+            try:
+                if isinstance(message, bytes):
+                    await self.websocket.send_bytes(message)
+                else:
+                    await self.websocket.send_text(message)
+                if lane == MessageLane.LOG:
+                    self.log_sent += 1
+                else:
+                    self.sent += 1
+                if self.metrics:
+                    self.metrics.record_sent(len(message))
+            except Exception as e:
+                logging.warning(f"Failed to send message to {self.client_id}: {e}")
+                self.closed = True
+                self._discard_queue()
+                if self.on_failed:
+                    await self.on_failed(self)
+                return
+
+    def _discard_queue(self) -> None:
+        # frees the slots so senders blocked on a dead connection can proceed
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.dropped += 1
+        while not self.log_queue.empty():
+            self.log_queue.get_nowait()
+            self.log_dropped += 1
+
+    async def close_socket(self, code: int, reason: str) -> None:
+        """
+        Stops the writer task and closes the client socket. The receive loop of the
+        client then runs the regular disconnect.
+
+        Args:
+            code (int): WebSocket close code.
+            reason (str): Close reason sent to the client.
+        """
+        await self.close()
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception:
+            # socket is already gone, receive loop will run the disconnect
+            pass
+
+    async def _close_slow_consumer(self) -> None:
+        await self.close_socket(
+            code=SLOW_CONSUMER_CLOSE_CODE, reason="Outbound queue overflow"
+        )
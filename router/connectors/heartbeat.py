@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from connectors.connection import WSConnection
+from utils.enums import WSMessageType
+
+PING_MESSAGE = {"message_type": WSMessageType.PING.value}
+
+
+class HeartbeatMonitor:
+    """
+    Liveness of the connections that opted in to heartbeats.
+
+    Every interval the watched connections get a `ping` message, any frame from a
+    client (its `pong` or regular traffic) counts as a sign of life. Connections
+    with no frame for longer than the idle timeout are handed to `on_stale`, which
+    catches half-open sockets the transport never reports as closed.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        idle_timeout: float,
+        on_stale: Callable[[List[WSConnection]], Awaitable[None]],
+    ):
+        """
+        Initializes a monitor without watched connections.
+
+        Args:
+            interval (float): Seconds between pings, 0 disables the monitor.
+            idle_timeout (float): Seconds without a frame after which a connection is stale.
+            on_stale (Callable[[List[WSConnection]], Awaitable[None]]): Called with the
+                connections that went stale.
+        """
+        self.interval = interval
+        self.idle_timeout = max(idle_timeout, interval)
+        self.on_stale = on_stale
+        self.watched: Dict[str, WSConnection] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether heartbeats are enabled.
+        """
+        return self.interval > 0
+
+    def start(self) -> None:
+        """
+        Starts the task that pings the watched connections.
+        """
+        if self.enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops the ping task.
+        """
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def watch(self, connection: WSConnection) -> None:
+        """
+        Starts checking the liveness of a connection.
+
+        Args:
+            connection (WSConnection): The connection, it must send a frame at least
+                once per idle timeout.
+        """
+        self.watched[connection.replica_id] = connection
+
+    def unwatch(self, connection: WSConnection) -> None:
+        """
+        Stops checking the liveness of a connection.
+
+        Args:
+            connection (WSConnection): The connection.
+        """
+        self.watched.pop(connection.replica_id, None)
+
+    def expire(self, now: Optional[float] = None) -> List[WSConnection]:
+        """
+        Stops watching the connections that were idle for longer than the timeout.
+
+        Args:
+            now (Optional[float]): Current monotonic time.
+
+        Returns:
+            List[WSConnection]: The stale connections.
+        """
+        now = time.monotonic() if now is None else now
+        stale = [
+            connection
+            for connection in self.watched.values()
+            if now - connection.last_seen > self.idle_timeout
+        ]
+        for connection in stale:
+            self.unwatch(connection)
+        return stale
+
+    async def ping(self) -> None:
+        """
+        Sends a ping to every watched connection.
+        """
+        for connection in list(self.watched.values()):
+            # a backed up queue is not waited on, the client is busy reading anyway
+            if not connection.queue.full():
+                await connection.send(PING_MESSAGE)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if stale := self.expire():
+                    await self.on_stale(stale)
+                await self.ping()
+            except Exception:
+                logging.exception("Failed to check the liveness of connections")
@@ -0,0 +1,321 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+
+@dataclass(slots=True)
+class Invocation:
+    """
+    An `AGENT_INVOKE` forwarded to an agent that hasn't been answered yet.
+    """
+
+    invocation_id: str
+    caller: str
+    target: str
+    started_at: float
+    deadline: Optional[float]
+    # replica of the target the invocation was delivered to
+    replica: Optional[str] = None
+    # request of the caller the invocation belongs to, sent by genai_session clients
+    request_id: Optional[str] = None
+
+
+class InvocationTable:
+    """
+    In-flight invocations delivered to the agents connected to a router node.
+
+    A response that carries the request ID of its invocation completes exactly
+    that invocation. Responses without one complete the oldest in-flight
+    invocation of the same caller and target replica, which matches the order
+    the replica receives its invocations in. Invocations are indexed by target,
+    replica and caller, so a disconnect resolves its invocations without
+    scanning the table. Expired invocations are reaped by a background task
+    that sleeps until the nearest deadline.
+    """
+
+    def __init__(
+        self,
+        on_expired: Callable[[List[Invocation]], Awaitable[None]],
+        default_timeout: float,
+    ):
+        """
+        Initializes an empty table.
+
+        Args:
+            on_expired (Callable[[List[Invocation]], Awaitable[None]]): Called with the
+                invocations whose deadline has passed.
+            default_timeout (float): Seconds an agent has to respond, 0 disables deadlines.
+        """
+        self.on_expired = on_expired
+        self.default_timeout = default_timeout
+        self._invocations: Dict[str, Invocation] = {}
+        self._by_pair: Dict[Tuple[str, str], OrderedDict[str, Invocation]] = {}
+        self._by_request: Dict[Tuple[str, str, str], OrderedDict[str, Invocation]] = {}
+        self._by_target: Dict[str, Dict[str, Invocation]] = {}
+        self._by_caller: Dict[str, Dict[str, Invocation]] = {}
+        self._by_replica: Dict[str, Dict[str, Invocation]] = {}
+        self._deadlines: List[Tuple[float, str]] = []
+        self._deadline_changed = asyncio.Event()
+        self._reaper: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Starts the task that expires invocations past their deadline.
+        """
+        self._reaper = asyncio.create_task(self._reap())
+
+    async def stop(self) -> None:
+        """
+        Stops the expiry task.
+        """
+        if self._reaper:
+            self._reaper.cancel()
+            self._reaper = None
+
+    def track(
+        self,
+        caller: str,
+        target: str,
+        replica: Optional[str] = None,
+        timeout: Optional[float] = None,
+        request_id: Optional[str] = None,
+    ) -> Invocation:
+        """
+        Records an invocation delivered to an agent.
+
+        Args:
+            caller (str): The client waiting for the response.
+            target (str): The invoked agent.
+            replica (Optional[str]): The replica of the agent the invocation went to.
+            timeout (Optional[float]): Seconds the agent has to respond, the default if None.
+            request_id (Optional[str]): The request ID sent with the invocation.
+
+        Returns:
+            Invocation: The recorded invocation.
+        """
+        now = time.monotonic()
+        timeout = self.default_timeout if timeout is None else timeout
+        invocation = Invocation(
+            invocation_id=uuid4().hex,
+            caller=caller,
+            target=target,
+            started_at=now,
+            deadline=now + timeout if timeout > 0 else None,
+            replica=replica,
+            request_id=request_id,
+        )
+        invocation_id = invocation.invocation_id
+        self._invocations[invocation_id] = invocation
+        self._by_pair.setdefault((target, caller), OrderedDict())[
+            invocation_id
+        ] = invocation
+        self._by_target.setdefault(target, {})[invocation_id] = invocation
+        self._by_caller.setdefault(caller, {})[invocation_id] = invocation
+        if replica:
+            self._by_replica.setdefault(replica, {})[invocation_id] = invocation
+        if request_id:
+            self._by_request.setdefault((target, caller, request_id), OrderedDict())[
+                invocation_id
+            ] = invocation
+
+        if invocation.deadline is not None:
+            if not self._deadlines or invocation.deadline < self._deadlines[0][0]:
+                self._deadline_changed.set()
+            heapq.heappush(self._deadlines, (invocation.deadline, invocation_id))
+            if len(self._deadlines) > 2 * len(self._invocations) + 1024:
+                self._compact_deadlines()
+        return invocation
+
+    def complete(
+        self,
+        target: str,
+        caller: str,
+        replica: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> Optional[Invocation]:
+        """
+        Resolves the in-flight invocation of the caller to the target with the given
+        request ID, the oldest one if the ID is missing or unknown.
+
+        Args:
+            target (str): The agent that responded.
+            caller (str): The client the response is routed to.
+            replica (Optional[str]): The replica that responded.
+            request_id (Optional[str]): The request ID the response carries.
+
+        Returns:
+            Optional[Invocation]: The resolved invocation or None if nothing was in flight.
+        """
+        for pending in (
+            self._by_request.get((target, caller, request_id)) if request_id else None,
+            self._by_pair.get((target, caller)),
+        ):
+            for invocation_id, invocation in (pending or {}).items():
+                if replica is None or invocation.replica == replica:
+                    return self._remove(invocation_id)
+        return None
+
+    def discard(self, invocation: Invocation) -> None:
+        """
+        Removes an invocation that was never delivered.
+
+        Args:
+            invocation (Invocation): The invocation returned by `track`.
+        """
+        if invocation.invocation_id in self._invocations:
+            self._remove(invocation.invocation_id)
+
+    def pop_target(self, target: str) -> List[Invocation]:
+        """
+        Removes all in-flight invocations of an agent.
+
+        Args:
+            target (str): The ID of the agent.
+
+        Returns:
+            List[Invocation]: The removed invocations.
+        """
+        return [
+            self._remove(invocation_id)
+            for invocation_id in list(self._by_target.get(target, ()))
+        ]
+
+    def pop_replica(self, replica: str) -> List[Invocation]:
+        """
+        Removes all in-flight invocations delivered to a replica.
+
+        Args:
+            replica (str): The replica ID.
+
+        Returns:
+            List[Invocation]: The removed invocations.
+        """
+        return [
+            self._remove(invocation_id)
+            for invocation_id in list(self._by_replica.get(replica, ()))
+        ]
+
+    def pop_caller(self, caller: str) -> List[Invocation]:
+        """
+        Removes all in-flight invocations made by a client.
+
+        Args:
+            caller (str): The ID of the client.
+
+        Returns:
+            List[Invocation]: The removed invocations.
+        """
+        return [
+            self._remove(invocation_id)
+            for invocation_id in list(self._by_caller.get(caller, ()))
+        ]
+
+    def in_flight(self, target: Optional[str] = None) -> int:
+        """
+        Counts the in-flight invocations.
+
+        Args:
+            target (Optional[str]): Only count the invocations of this agent.
+
+        Returns:
+            int: Number of in-flight invocations.
+        """
+        if target is None:
+            return len(self._invocations)
+        return len(self._by_target.get(target, ()))
+
+    def in_flight_replica(self, replica: str) -> int:
+        """
+        Counts the in-flight invocations delivered to a replica.
+
+        Args:
+            replica (str): The replica ID.
+
+        Returns:
+            int: Number of in-flight invocations.
+        """
+        return len(self._by_replica.get(replica, ()))
+
+    def in_flight_by_target(self) -> Dict[str, int]:
+        """
+        Counts the in-flight invocations per agent.
+
+        Returns:
+            Dict[str, int]: Number of in-flight invocations keyed by agent ID.
+        """
+        return {
+            target: len(invocations) for target, invocations in self._by_target.items()
+        }
+
+    def expire(self, now: Optional[float] = None) -> List[Invocation]:
+        """
+        Removes the invocations whose deadline has passed.
+
+        Args:
+            now (Optional[float]): Current monotonic time.
+
+        Returns:
+            List[Invocation]: The expired invocations.
+        """
+        now = time.monotonic() if now is None else now
+        expired = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, invocation_id = heapq.heappop(self._deadlines)
+            # completed invocations leave stale heap entries behind
+            if invocation_id in self._invocations:
+                expired.append(self._remove(invocation_id))
+        return expired
+
+    def _remove(self, invocation_id: str) -> Invocation:
+        invocation = self._invocations.pop(invocation_id)
+        pair = (invocation.target, invocation.caller)
+        for index, key in (
+            (self._by_pair, pair),
+            (self._by_target, invocation.target),
+            (self._by_caller, invocation.caller),
+            (self._by_replica, invocation.replica),
+            (
+                self._by_request,
+                (*pair, invocation.request_id) if invocation.request_id else None,
+            ),
+        ):
+            if key is None:
+                continue
+            invocations = index[key]
+            del invocations[invocation_id]
+            if not invocations:
+                del index[key]
+        return invocation
+
+    def _compact_deadlines(self) -> None:
+        # completed invocations leave their entries in the heap until the deadline
+        self._deadlines = [
+            (deadline, invocation_id)
+            for deadline, invocation_id in self._deadlines
+            if invocation_id in self._invocations
+        ]
+        heapq.heapify(self._deadlines)
+
+    async def _reap(self) -> None:
+        while True:
+            self._deadline_changed.clear()
+            timeout = (
+                max(self._deadlines[0][0] - time.monotonic(), 0)
+                if self._deadlines
+                else None
+            )
+            try:
+                await asyncio.wait_for(self._deadline_changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            if expired := self.expire():
+                try:
+                    await self.on_expired(expired)
+                except Exception:
+                    logging.exception("Failed to notify callers of expired invocations")
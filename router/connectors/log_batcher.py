@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from utils import json_codec
+from utils.enums import WSMessageType
+
+
+class LogBatcher:
+    """
+    Coalesces agent logs into `agent_log_batch` messages.
+
+    Logs are buffered for up to `window` seconds after the first one arrives, or
+    until `max_size` logs are buffered, and sent as one message. Logs kept as
+    JSON text by the envelope fast path are joined as they are, so a batch is
+    built without decoding them.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        window: float,
+        max_size: int,
+    ):
+        """
+        Initializes an empty batcher.
+
+        Args:
+            send (Callable[[str], Awaitable[None]]): Sends a serialized batch message.
+            window (float): Seconds a log waits for others before its batch is sent.
+            max_size (int): Logs per batch at most.
+        """
+        self.send = send
+        self.window = window
+        self.max_size = max(max_size, 1)
+        self.batches = 0
+        self.logs = 0
+        self._buffer: List[str] = []
+        self._pending = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Starts the task that sends batches when their window closes.
+        """
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Sends the buffered logs and stops the flush task.
+        """
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def add(self, log: str | dict) -> None:
+        """
+        Buffers a log, the batch is sent right away once it is full.
+
+        Args:
+            log (str | dict): The log as JSON text or a message that is not serialized yet.
+        """
+        self._buffer.append(json_codec.dumps(log) if isinstance(log, dict) else log)
+        if len(self._buffer) >= self.max_size:
+            await self.flush()
+        else:
+            self._pending.set()
+
+    async def flush(self) -> None:
+        """
+        Sends the buffered logs as one batch.
+        """
+        if not self._buffer:
+            return
+        logs, self._buffer = self._buffer, []
+        self.batches += 1
+        self.logs += len(logs)
+        await self.send(
+            '{"request_payload":{"message_type":"'
+            + WSMessageType.AGENT_LOG_BATCH.value
+            + '","agent_uuid":"","logs":['
+            + ",".join(logs)
+            + "]}}"
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await self._pending.wait()
+            await asyncio.sleep(self.window)
+            self._pending.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception("Failed to send a batch of agent logs")
@@ -0,0 +1,150 @@
+from typing import Callable, Dict, Iterator, List, Optional
+
+from connectors.connection import WSConnection
+from utils.pydantic_models import QueueStats
+
+
+class ReplicaPool:
+    """
+    Connections sharing one client ID.
+
+    Several processes of the same agent (same JWT) connect as replicas of one
+    pool. Invocations go to the replica with the fewest outstanding requests,
+    ties are broken round-robin. Draining replicas get no new invocations.
+    A process that reconnects with the same agent session replaces its previous
+    replica. Other clients (master servers, session.send connections) always have a
+    single replica.
+    """
+
+    def __init__(self, client_id: str):
+        """
+        Initializes an empty pool.
+
+        Args:
+            client_id (str): The client ID shared by the replicas.
+        """
+        self.client_id = client_id
+        self.replicas: Dict[str, WSConnection] = {}
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    def __iter__(self) -> Iterator[WSConnection]:
+        return iter(self.replicas.values())
+
+    def add(self, connection: WSConnection) -> None:
+        """
+        Adds a replica to the pool.
+
+        Args:
+            connection (WSConnection): The replica connection.
+        """
+        self.replicas[connection.replica_id] = connection
+
+    def replaced_by(
+        self, connection: WSConnection, idle_timeout: float
+    ) -> List[WSConnection]:
+        """
+        Finds the replicas a new connection of the client replaces: the previous
+        connection of the same agent session and the replicas that are not alive.
+
+        Args:
+            connection (WSConnection): The new connection.
+            idle_timeout (float): Seconds without a frame after which a replica that
+                answers heartbeats is stale.
+
+        Returns:
+            List[WSConnection]: The replaced replicas, oldest first.
+        """
+        return [
+            previous
+            for previous in self.replicas.values()
+            if (connection.session and previous.session == connection.session)
+            or not previous.is_alive(idle_timeout)
+        ]
+
+    def remove(self, connection: WSConnection) -> bool:
+        """
+        Removes a replica from the pool.
+
+        Args:
+            connection (WSConnection): The replica connection.
+
+        Returns:
+            bool: True if the replica was in the pool.
+        """
+        return self.replicas.pop(connection.replica_id, None) is not None
+
+    def get(self, replica_id: str) -> Optional[WSConnection]:
+        """
+        Looks up a replica by its ID.
+
+        Args:
+            replica_id (str): The replica ID.
+
+        Returns:
+            Optional[WSConnection]: The replica or None if it is not in the pool.
+        """
+        return self.replicas.get(replica_id)
+
+    def pick(self, load: Callable[[WSConnection], int]) -> Optional[WSConnection]:
+        """
+        Picks the least loaded replica that is not draining.
+
+        Args:
+            load (Callable[[WSConnection], int]): Outstanding requests of a replica.
+
+        Returns:
+            Optional[WSConnection]: The replica or None if all replicas are draining.
+        """
+        candidates = [
+            connection
+            for connection in self.replicas.values()
+            if not connection.draining
+        ]
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+
+        # rotating the start makes min() break ties round-robin
+        self._next = (self._next + 1) % len(candidates)
+        rotated = candidates[self._next :] + candidates[: self._next]
+        return min(rotated, key=load)
+
+    def primary(self) -> Optional[WSConnection]:
+        """
+        Returns the newest replica that is not draining, the newest one if all are.
+
+        Returns:
+            Optional[WSConnection]: The replica messages other than invocations go to.
+        """
+        newest = None
+        for connection in reversed(self.replicas.values()):
+            if not connection.draining:
+                return connection
+            newest = newest or connection
+        return newest
+
+    def stats(self) -> QueueStats:
+        """
+        Returns the outbound queue statistics of the pool, summed over its replicas.
+
+        Returns:
+            QueueStats: Queue depth and counters of all replicas.
+        """
+        replicas = [connection.stats() for connection in self.replicas.values()]
+        if len(replicas) == 1:
+            return replicas[0]
+        return QueueStats(
+            depth=sum(stats.depth for stats in replicas),
+            max_depth=max((stats.max_depth for stats in replicas), default=0),
+            capacity=sum(stats.capacity for stats in replicas),
+            sent=sum(stats.sent for stats in replicas),
+            dropped=sum(stats.dropped for stats in replicas),
+            overflow_policy=replicas[0].overflow_policy if replicas else "",
+            log_depth=sum(stats.log_depth for stats in replicas),
+            log_sent=sum(stats.log_sent for stats in replicas),
+            log_dropped=sum(stats.log_dropped for stats in replicas),
+        )
@@ -0,0 +1,508 @@
+import asyncio
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Set
+
+from utils.enums import RegistryBackend
+
+
+class ConnectionRegistry(ABC):
+    """
+    Shared mapping of connected clients to the router nodes that hold their sockets.
+
+    Every router node of a cluster registers itself (node ID -> internal link URL)
+    and claims the clients that are connected to it. Other nodes use the registry
+    to find out where a message for a non-local client must be forwarded. Claims
+    are per node, an agent with replicas on several nodes is held by each of them
+    until the last one releases it.
+
+    Nodes re-register on every heartbeat. A node that hasn't done so within the
+    node TTL is considered dead: it is not listed and its claims are treated as
+    absent until the node is pruned.
+    """
+
+    def __init__(self, node_ttl: float):
+        """
+        Initializes the registry.
+
+        Args:
+            node_ttl (float): Seconds a node stays live after its last heartbeat.
+        """
+        self.node_ttl = node_ttl
+
+    @abstractmethod
+    async def register_node(self, node_id: str, node_url: str) -> bool:
+        """
+        Registers a router node and the URL of its internal link endpoint, or
+        refreshes its heartbeat.
+
+        Args:
+            node_id (str): Unique ID of the router node.
+            node_url (str): WebSocket URL other nodes use to forward messages.
+
+        Returns:
+            bool: True if the node was live already, False if it (re)joined.
+        """
+
+    @abstractmethod
+    async def unregister_node(self, node_id: str) -> None:
+        """
+        Removes a router node together with its claims.
+
+        Args:
+            node_id (str): Unique ID of the router node.
+        """
+
+    @abstractmethod
+    async def nodes(self) -> Dict[str, str]:
+        """
+        Returns the live router nodes.
+
+        Returns:
+            Dict[str, str]: Mapping of node ID to its internal link URL.
+        """
+
+    @abstractmethod
+    async def prune(self) -> List[str]:
+        """
+        Removes the nodes whose heartbeat expired together with their claims.
+        When several nodes prune at once, every claim is removed by one of them.
+
+        Returns:
+            List[str]: The clients of the removed claims no live node holds any more.
+        """
+
+    @abstractmethod
+    async def claim(self, client_id: str, node_id: str) -> None:
+        """
+        Adds the given node to the nodes holding the client.
+
+        Args:
+            client_id (str): The ID of the connected client.
+            node_id (str): The ID of the node holding the socket.
+        """
+
+    @abstractmethod
+    async def release(self, client_id: str, node_id: str) -> bool:
+        """
+        Removes the claim of the given node on the client, claims of other nodes stay.
+
+        Args:
+            client_id (str): The ID of the disconnected client.
+            node_id (str): The ID of the node that held the socket.
+
+        Returns:
+            bool: True if another live node still holds the client.
+        """
+
+    @abstractmethod
+    async def owner(self, client_id: str) -> Optional[str]:
+        """
+        Resolves a live node that currently holds the client's socket.
+
+        Args:
+            client_id (str): The ID of the client.
+
+        Returns:
+            Optional[str]: One of the live nodes holding the client or None if the
+                client is not connected to a live node.
+        """
+
+    async def node_url(self, node_id: str) -> Optional[str]:
+        """
+        Resolves the internal link URL of a live router node.
+
+        Args:
+            node_id (str): Unique ID of the router node.
+
+        Returns:
+            Optional[str]: The URL or None if the node is not registered or expired.
+        """
+        return (await self.nodes()).get(node_id)
+
+    async def close(self) -> None:
+        """
+        Releases resources held by the registry backend.
+        """
+
+
+class InMemoryRegistry(ConnectionRegistry):
+    """
+    Process-local registry, used when the router runs as a single node.
+    """
+
+    def __init__(self, node_ttl: float):
+        super().__init__(node_ttl)
+        self._nodes: Dict[str, str] = {}
+        # client ID -> nodes holding it
+        self._owners: Dict[str, Set[str]] = {}
+        # node ID -> monotonic time of its last heartbeat
+        self._heartbeats: Dict[str, float] = {}
+
+    def _is_live(self, node_id: str) -> bool:
+        heartbeat = self._heartbeats.get(node_id)
+        return heartbeat is not None and time.monotonic() - heartbeat <= self.node_ttl
+
+    async def register_node(self, node_id: str, node_url: str) -> bool:
+        was_live = self._is_live(node_id)
+        self._nodes[node_id] = node_url
+        self._heartbeats[node_id] = time.monotonic()
+        return was_live
+
+    async def unregister_node(self, node_id: str) -> None:
+        self._nodes.pop(node_id, None)
+        self._heartbeats.pop(node_id, None)
+        for client_id in list(self._owners):
+            self._discard(client_id, node_id)
+
+    async def nodes(self) -> Dict[str, str]:
+        return {
+            node_id: node_url
+            for node_id, node_url in self._nodes.items()
+            if self._is_live(node_id)
+        }
+
+    async def prune(self) -> List[str]:
+        for node_id in [n for n in self._nodes if not self._is_live(n)]:
+            del self._nodes[node_id]
+            del self._heartbeats[node_id]
+        lost = []
+        for client_id, owners in list(self._owners.items()):
+            if dead := owners - self._nodes.keys():
+                owners -= dead
+                if not any(self._is_live(node_id) for node_id in owners):
+                    lost.append(client_id)
+                if not owners:
+                    del self._owners[client_id]
+        return lost
+
+    def _discard(self, client_id: str, node_id: str) -> None:
+        if owners := self._owners.get(client_id):
+            owners.discard(node_id)
+            if not owners:
+                del self._owners[client_id]
+
+    async def claim(self, client_id: str, node_id: str) -> None:
+        self._owners.setdefault(client_id, set()).add(node_id)
+
+    async def release(self, client_id: str, node_id: str) -> bool:
+        self._discard(client_id, node_id)
+        return await self.owner(client_id) is not None
+
+    async def owner(self, client_id: str) -> Optional[str]:
+        for node_id in self._owners.get(client_id, ()):
+            if self._is_live(node_id):
+                return node_id
+        return None
+
+
+class SQLiteRegistry(ConnectionRegistry):
+    """
+    Local stand-in for a shared registry, backed by an SQLite file.
+
+    Several router processes on one machine can point to the same file to form
+    a cluster without any external service. Not meant for multi-host setups.
+    """
+
+    def __init__(self, path: str, node_ttl: float):
+        super().__init__(node_ttl)
+        self._path = path
+        self._lock = asyncio.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=10, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS router_nodes "
+            "(node_id TEXT PRIMARY KEY, node_url TEXT NOT NULL, updated_at REAL)"
+        )
+        # one row per client and node holding it
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS router_claims "
+            "(client_id TEXT NOT NULL, node_id TEXT NOT NULL, updated_at REAL, "
+            "PRIMARY KEY (client_id, node_id))"
+        )
+
+    async def _execute(self, query: str, params: tuple = ()) -> list:
+        async with self._lock:
+            return await asyncio.to_thread(
+                lambda: self._conn.execute(query, params).fetchall()
+            )
+
+    def _cutoff(self) -> float:
+        # heartbeats older than this belong to dead nodes
+        return time.time() - self.node_ttl
+
+    async def register_node(self, node_id: str, node_url: str) -> bool:
+        rows = await self._execute(
+            "SELECT 1 FROM router_nodes WHERE node_id = ? AND updated_at >= ?",
+            (node_id, self._cutoff()),
+        )
+        await self._execute(
+            "INSERT OR REPLACE INTO router_nodes VALUES (?, ?, ?)",
+            (node_id, node_url, time.time()),
+        )
+        return bool(rows)
+
+    async def unregister_node(self, node_id: str) -> None:
+        await self._execute("DELETE FROM router_claims WHERE node_id = ?", (node_id,))
+        await self._execute("DELETE FROM router_nodes WHERE node_id = ?", (node_id,))
+
+    async def nodes(self) -> Dict[str, str]:
+        rows = await self._execute(
+            "SELECT node_id, node_url FROM router_nodes WHERE updated_at >= ?",
+            (self._cutoff(),),
+        )
+        return dict(rows)
+
+    async def prune(self) -> List[str]:
+        await self._execute(
+            "DELETE FROM router_nodes WHERE updated_at < ?", (self._cutoff(),)
+        )
+        # every statement commits on its own, concurrent pruners never delete a row twice
+        rows = await self._execute(
+            "DELETE FROM router_claims "
+            "WHERE node_id NOT IN (SELECT node_id FROM router_nodes) "
+            "RETURNING client_id"
+        )
+        lost = []
+        for client_id in dict.fromkeys(client_id for (client_id,) in rows):
+            if await self.owner(client_id) is None:
+                lost.append(client_id)
+        return lost
+
+    async def claim(self, client_id: str, node_id: str) -> None:
+        await self._execute(
+            "INSERT OR REPLACE INTO router_claims VALUES (?, ?, ?)",
+            (client_id, node_id, time.time()),
+        )
+
+    async def release(self, client_id: str, node_id: str) -> bool:
+        await self._execute(
+            "DELETE FROM router_claims WHERE client_id = ? AND node_id = ?",
+            (client_id, node_id),
+        )
+        return await self.owner(client_id) is not None
+
+    async def owner(self, client_id: str) -> Optional[str]:
+        rows = await self._execute(
+            "SELECT c.node_id FROM router_claims c "
+            "JOIN router_nodes n ON n.node_id = c.node_id "
+            "WHERE c.client_id = ? AND n.updated_at >= ? LIMIT 1",
+            (client_id, self._cutoff()),
+        )
+        return rows[0][0] if rows else None
+
+    async def close(self) -> None:
+        self._conn.close()
+
+
+class RedisRegistry(ConnectionRegistry):
+    """
+    Registry shared between router nodes on different hosts, backed by Redis.
+
+    Requires the optional `redis` dependency (`uv sync --extra cluster`).
+    Heartbeats are node deadlines in a sorted set, compared with the Redis clock.
+    All keys share the `{genai:router}` hash tag, so the scripts, which declare
+    every key they touch, also run on Redis Cluster.
+    """
+
+    NODES_KEY = "{genai:router}:nodes"
+    # node ID -> deadline of its heartbeat in ms of the Redis clock
+    HEARTBEATS_KEY = "{genai:router}:heartbeats"
+    # + client ID, set of the nodes holding the client
+    CLIENT_KEY_PREFIX = "{genai:router}:client:"
+    # + node ID, set of the clients claimed by the node
+    NODE_CLIENTS_KEY_PREFIX = "{genai:router}:node-clients:"
+
+    # current time of the Redis clock in ms as `now`
+    _NOW = """
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+    """
+
+    # Refreshes the heartbeat of node ARGV[1] at URL ARGV[2] for ARGV[3] ms,
+    # returns 1 if the node was live
+    REGISTER_SCRIPT = (
+        _NOW
+        + """
+    local deadline = redis.call('ZSCORE', KEYS[1], ARGV[1])
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[1])
+    redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+    if deadline and tonumber(deadline) >= now then
+        return 1
+    end
+    return 0
+    """
+    )
+
+    # Returns the live nodes and their URLs as a flat list
+    NODES_SCRIPT = (
+        _NOW
+        + """
+    local nodes = {}
+    for _, node_id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], now, '+inf')) do
+        local node_url = redis.call('HGET', KEYS[2], node_id)
+        if node_url then
+            table.insert(nodes, node_id)
+            table.insert(nodes, node_url)
+        end
+    end
+    return nodes
+    """
+    )
+
+    # Removes and returns the nodes whose heartbeat expired
+    PRUNE_SCRIPT = (
+        _NOW
+        + """
+    local dead = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. now)
+    for _, node_id in ipairs(dead) do
+        redis.call('ZREM', KEYS[1], node_id)
+        redis.call('HDEL', KEYS[2], node_id)
+    end
+    return dead
+    """
+    )
+
+    # Returns a live node holding the client of key KEYS[2]
+    OWNER_SCRIPT = (
+        _NOW
+        + """
+    for _, node_id in ipairs(redis.call('SMEMBERS', KEYS[2])) do
+        local deadline = redis.call('ZSCORE', KEYS[1], node_id)
+        if deadline and tonumber(deadline) >= now then
+            return node_id
+        end
+    end
+    return false
+    """
+    )
+
+    # Removes the claims of node ARGV[1] on the clients ARGV[2..] with the keys
+    # KEYS[3..], returns the clients no live node holds any more
+    RELEASE_SCRIPT = (
+        _NOW
+        + """
+    local orphans = {}
+    for i = 3, #KEYS do
+        local client_id = ARGV[i - 1]
+        redis.call('SREM', KEYS[i], ARGV[1])
+        redis.call('SREM', KEYS[2], client_id)
+        local held = false
+        for _, node_id in ipairs(redis.call('SMEMBERS', KEYS[i])) do
+            local deadline = redis.call('ZSCORE', KEYS[1], node_id)
+            if deadline and tonumber(deadline) >= now then
+                held = true
+                break
+            end
+        end
+        if not held then
+            table.insert(orphans, client_id)
+        end
+    end
+    return orphans
+    """
+    )
+
+    def __init__(self, uri: str, node_ttl: float):
+        super().__init__(node_ttl)
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError(
+                "Redis registry requires the 'redis' package, install the 'cluster' extra"
+            ) from e
+
+        self._redis = aioredis.from_url(uri, decode_responses=True)
+
+    async def register_node(self, node_id: str, node_url: str) -> bool:
+        was_live = await self._redis.eval(
+            self.REGISTER_SCRIPT,
+            2,
+            self.HEARTBEATS_KEY,
+            self.NODES_KEY,
+            node_id,
+            node_url,
+            int(self.node_ttl * 1000),
+        )
+        return bool(was_live)
+
+    async def _release(self, node_id: str, *client_ids: str) -> List[str]:
+        return await self._redis.eval(
+            self.RELEASE_SCRIPT,
+            2 + len(client_ids),
+            self.HEARTBEATS_KEY,
+            self.NODE_CLIENTS_KEY_PREFIX + node_id,
+            *(self.CLIENT_KEY_PREFIX + client_id for client_id in client_ids),
+            node_id,
+            *client_ids,
+        )
+
+    async def _release_all(self, node_id: str) -> List[str]:
+        clients = await self._redis.smembers(self.NODE_CLIENTS_KEY_PREFIX + node_id)
+        return await self._release(node_id, *clients) if clients else []
+
+    async def unregister_node(self, node_id: str) -> None:
+        await self._release_all(node_id)
+        await self._redis.zrem(self.HEARTBEATS_KEY, node_id)
+        await self._redis.hdel(self.NODES_KEY, node_id)
+
+    async def nodes(self) -> Dict[str, str]:
+        flat = await self._redis.eval(
+            self.NODES_SCRIPT, 2, self.HEARTBEATS_KEY, self.NODES_KEY
+        )
+        return dict(zip(flat[::2], flat[1::2]))
+
+    async def prune(self) -> List[str]:
+        # only the node whose script removed a dead node releases its claims
+        dead = await self._redis.eval(
+            self.PRUNE_SCRIPT, 2, self.HEARTBEATS_KEY, self.NODES_KEY
+        )
+        lost = []
+        for node_id in dead:
+            lost.extend(await self._release_all(node_id))
+        return lost
+
+    async def claim(self, client_id: str, node_id: str) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.sadd(self.CLIENT_KEY_PREFIX + client_id, node_id)
+            pipe.sadd(self.NODE_CLIENTS_KEY_PREFIX + node_id, client_id)
+            await pipe.execute()
+
+    async def release(self, client_id: str, node_id: str) -> bool:
+        return not await self._release(node_id, client_id)
+
+    async def owner(self, client_id: str) -> Optional[str]:
+        return await self._redis.eval(
+            self.OWNER_SCRIPT,
+            2,
+            self.HEARTBEATS_KEY,
+            self.CLIENT_KEY_PREFIX + client_id,
+        )
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def build_registry(
+    backend: str, path: str, redis_uri: str, node_ttl: float
+) -> ConnectionRegistry:
+    """
+    Creates the registry implementation selected in the settings.
+
+    Args:
+        backend (str): One of the `RegistryBackend` values.
+        path (str): SQLite file path used by the local stand-in registry.
+        redis_uri (str): Redis URI used by the shared registry.
+        node_ttl (float): Seconds a node stays live after its last heartbeat.
+
+    Returns:
+        ConnectionRegistry: The registry instance.
+    """
+    if backend == RegistryBackend.LOCAL.value:
+        return SQLiteRegistry(path, node_ttl)
+    if backend == RegistryBackend.REDIS.value:
+        return RedisRegistry(redis_uri, node_ttl)
+    return InMemoryRegistry(node_ttl)
@@ -1,15 +1,88 @@
-import json
+import asyncio
 import logging
+import time
 import jwt
 
-from typing import Dict
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+from uuid import uuid4
 
 from fastapi import WebSocket
+from connectors.cluster import ClusterLink
+from connectors.connection import WSConnection
+from connectors.heartbeat import HeartbeatMonitor
+from connectors.invocations import Invocation, InvocationTable
+from connectors.log_batcher import LogBatcher
+from connectors.pool import ReplicaPool
 from settings import get_settings
-from utils.enums import WSMessageType, MasterServerName, ErrorType
+from utils import json_codec, msgpack_codec
+from utils.chunks import ChunkAssembler
+from utils.envelope import Envelope, extend_object, wrap
+from utils.enums import (
+    ClientType,
+    ClusterFrameType,
+    DeliveryStatus,
+    ErrorType,
+    MasterServerName,
+    MessageEncoding,
+    MessageLane,
+    MessageLogMode,
+    OverflowPolicy,
+    WSMessageType,
+)
+from utils.message_log import MessageLog, configure_logger
+from utils.metrics import RouterMetrics
+from utils.pydantic_models import (
+    ConnectionLiveness,
+    DeliveryResult,
+    InFlightInvocations,
+    Message,
+    MetricsSnapshot,
+    QueueStats,
+    ReplicaStats,
+)
 
 app_settings = get_settings()
 
+# top-level routing fields, the router never forwards them as they came in
+ENVELOPE_KEYS = ("message_type", "agent_uuid", "invoked_by")
+
+# session.send connections are keyed "<caller agent id>:<invoked agent id>"
+SESSION_KEY_SEPARATOR = ":"
+
+# close code of a replica that finished draining
+REPLICA_DRAINED_CLOSE_CODE = 1000
+
+# header a client sends to negotiate the wire encoding, echoed back on accept
+ENCODING_HEADER = "x-message-encoding"
+
+# header a client sends to opt in to heartbeats, answered with the ping interval
+HEARTBEAT_HEADER = "x-heartbeat"
+
+# header an agent process sends with the same ID on every reconnect, a new
+# connection of the session replaces the previous one instead of joining as a replica
+SESSION_HEADER = "x-agent-session"
+
+# close code of a connection that missed its heartbeats
+HEARTBEAT_TIMEOUT_CLOSE_CODE = 4408
+
+# close code of a connection whose socket could not be written to
+SEND_FAILED_CLOSE_CODE = 1011
+
+# batch invocations waiting for responses act as callers "router-batch-<batch id>-<index>"
+BATCH_CALLER_PREFIX = "router-batch-"
+
+# node of the local clients outside cluster mode
+LOCAL_NODE_ID = "local"
+
+
+def _request_id(envelope: Envelope) -> Optional[str]:
+    # genai_session sends the IDs of the caller's request along with an invocation
+    metadata = envelope.get("request_metadata")
+    if not isinstance(metadata, dict):
+        return None
+    return metadata.get("request_id") or metadata.get("session_id") or None
+
 
 class WSConnectionManager:
     """
@@ -23,28 +96,286 @@ class WSConnectionManager:
         app_settings.MASTER_AGENT_API_KEY: MasterServerName.MASTER_SERVER_ML.value,
     }
 
-    def __init__(self):
+    def __init__(self, cluster: Optional[ClusterLink] = None):
         """
         Initializes the WebSocket connection manager with an empty active connections dictionary.
+
+        Args:
+            cluster (Optional[ClusterLink]): Link to the other router nodes when the router
+                runs in cluster mode. Messages for clients connected to another node are
+                forwarded over it.
+        """
+        # client ID -> its connections, several for agents running as replicas
+        self.active_connections: Dict[str, ReplicaPool] = {}
+        # agent ID -> IDs of the session.send connections derived from it
+        self.session_connections: Dict[str, Set[str]] = {}
+        self.cluster = cluster
+        self.send_queue_size = app_settings.SEND_QUEUE_SIZE
+        self.overflow_policy = OverflowPolicy(app_settings.SEND_QUEUE_OVERFLOW_POLICY)
+        self.log_queue_size = app_settings.LOG_QUEUE_SIZE
+        self.log_rate_limit = app_settings.LOG_RATE_LIMIT
+        self.log_overflow_policy = OverflowPolicy(app_settings.LOG_OVERFLOW_POLICY)
+        self.max_replicas = max(app_settings.AGENT_MAX_REPLICAS, 1)
+        self.metrics = RouterMetrics(rate_window=app_settings.METRICS_RATE_WINDOW)
+        self.invocations = InvocationTable(
+            on_expired=self._fail_expired_invocations,
+            default_timeout=app_settings.INVOKE_TIMEOUT,
+        )
+        self.message_log = MessageLog(
+            mode=MessageLogMode(app_settings.MESSAGE_LOG_MODE),
+            sample_rates=app_settings.MESSAGE_LOG_SAMPLE_RATES,
+            max_payload=app_settings.MESSAGE_LOG_MAX_PAYLOAD,
+            hash_payloads=app_settings.MESSAGE_LOG_HASH_PAYLOADS,
+            debug_clients=app_settings.MESSAGE_LOG_DEBUG_CLIENTS,
+            logger=configure_logger(app_settings.MESSAGE_LOG_LEVEL),
+        )
+        self.heartbeat = HeartbeatMonitor(
+            interval=app_settings.HEARTBEAT_INTERVAL,
+            idle_timeout=app_settings.HEARTBEAT_IDLE_TIMEOUT,
+            on_stale=self._reap_connections,
+        )
+        # sockets of reaped connections being closed in the background
+        self._closing: Set[asyncio.Task] = set()
+        self.log_batcher = (
+            LogBatcher(
+                send=self._send_log_batch,
+                window=app_settings.LOG_BATCH_WINDOW,
+                max_size=app_settings.LOG_BATCH_MAX_SIZE,
+            )
+            if app_settings.LOG_BATCH_WINDOW > 0
+            else None
+        )
+        # callers inside the router, e.g. batch invocations, waiting for a response
+        self.response_waiters: Dict[str, asyncio.Future] = {}
+        self._waiter_chunks = ChunkAssembler()
+        if cluster:
+            cluster.bind(
+                local_clients=lambda: [
+                    *self.active_connections,
+                    *self.response_waiters,
+                ],
+                on_clients_lost=self._release_lost_clients,
+            )
+
+    def start(self) -> None:
+        """
+        Starts the background tasks of the manager.
+        """
+        self.invocations.start()
+        self.heartbeat.start()
+        if self.log_batcher:
+            self.log_batcher.start()
+
+    async def stop(self) -> None:
+        """
+        Stops the background tasks of the manager.
+        """
+        await self.invocations.stop()
+        await self.heartbeat.stop()
+        if self.log_batcher:
+            await self.log_batcher.stop()
+
+    def queue_stats(self) -> Dict[str, QueueStats]:
+        """
+        Returns outbound queue statistics of every local connection.
+
+        Returns:
+            Dict[str, QueueStats]: Queue stats keyed by client ID.
+        """
+        return {
+            client_id: pool.stats()
+            for client_id, pool in self.active_connections.items()
+        }
+
+    def replica_stats(self, client_id: str) -> Optional[List[ReplicaStats]]:
+        """
+        Returns the replicas of a client connected to this node.
+
+        Args:
+            client_id (str): The ID of the client.
+
+        Returns:
+            Optional[List[ReplicaStats]]: The replicas or None if the client is not connected.
+        """
+        if not (pool := self.active_connections.get(client_id)):
+            return None
+        return [
+            ReplicaStats(
+                replica_id=connection.replica_id,
+                in_flight=self.invocations.in_flight_replica(connection.replica_id),
+                draining=connection.draining,
+                encoding=connection.encoding.value,
+                queue=connection.stats(),
+            )
+            for connection in pool
+        ]
+
+    def liveness(self, min_idle_seconds: float = 0) -> List[ConnectionLiveness]:
+        """
+        Returns how recently the local connections have been heard from.
+
+        Args:
+            min_idle_seconds (float): Only return connections idle for at least this long.
+
+        Returns:
+            List[ConnectionLiveness]: Liveness of the connections, most idle first.
+        """
+        now = time.monotonic()
+        liveness = [
+            ConnectionLiveness(
+                client_id=connection.client_id,
+                replica_id=connection.replica_id,
+                client_type=connection.client_type.value,
+                heartbeat=connection.heartbeat,
+                connected_seconds=now - connection.connected_at,
+                idle_seconds=now - connection.last_seen,
+            )
+            for pool in self.active_connections.values()
+            for connection in pool
+            if now - connection.last_seen >= min_idle_seconds
+        ]
+        return sorted(liveness, key=lambda item: item.idle_seconds, reverse=True)
+
+    def metrics_snapshot(self) -> MetricsSnapshot:
+        """
+        Returns the metrics of this router node.
+
+        Returns:
+            MetricsSnapshot: Connections, message rates, traffic, latencies and queues.
+        """
+        connections = Counter(
+            connection.client_type.value
+            for pool in self.active_connections.values()
+            for connection in pool
+        )
+        return self.metrics.snapshot(
+            connections={
+                client_type.value: connections[client_type.value]
+                for client_type in ClientType
+            },
+            send_queues=self.queue_stats(),
+            invocations_in_flight=self.invocations.in_flight_by_target(),
+        )
+
+    def in_flight_invocations(
+        self, agent_uuid: Optional[str] = None
+    ) -> InFlightInvocations:
+        """
+        Counts the invocations delivered to agents on this node that haven't been
+        answered yet.
+
+        Args:
+            agent_uuid (Optional[str]): Only count the invocations of this agent.
+
+        Returns:
+            InFlightInvocations: Total in-flight count and the counts per agent.
+        """
+        by_agent = self.invocations.in_flight_by_target()
+        if agent_uuid is not None:
+            by_agent = {agent_uuid: by_agent.get(agent_uuid, 0)}
+        return InFlightInvocations(total=sum(by_agent.values()), by_agent=by_agent)
+
+    async def is_connected(self, client_id: str) -> bool:
+        """
+        Checks whether the client is connected to this node or any other cluster node.
+
+        Args:
+            client_id (str): The ID of the client.
+
+        Returns:
+            bool: True if the client has an active connection.
         """
-        self.active_connections: Dict[str, WebSocket] = {}
+        return await self.locate(client_id) is not None
+
+    async def locate(self, client_id: str) -> Optional[str]:
+        """
+        Resolves the router node the client is connected to, a client of this node
+        is never looked up in the registry.
+
+        Args:
+            client_id (str): The ID of the client.
+
+        Returns:
+            Optional[str]: The node ID, LOCAL_NODE_ID for a client of this node
+                outside cluster mode, or None if the client is not connected.
+        """
+        if client_id in self.active_connections:
+            return self.cluster.node_id if self.cluster else LOCAL_NODE_ID
+        if self.cluster and client_id:
+            return await self.cluster.owner(client_id)
+        return None
+
+    def negotiate_encoding(self, websocket: WebSocket) -> MessageEncoding:
+        """
+        Picks the wire encoding requested by the client, JSON unless MessagePack is
+        requested, enabled and installed.
+
+        Args:
+            websocket (WebSocket): The WebSocket connection instance.
+
+        Returns:
+            MessageEncoding: The encoding used for the connection.
+        """
+        requested = websocket.headers.get(ENCODING_HEADER, "").strip().lower()
+        if (
+            requested == MessageEncoding.MSGPACK.value
+            and app_settings.MSGPACK_ENABLED
+            and msgpack_codec.is_available
+        ):
+            return MessageEncoding.MSGPACK
+        return MessageEncoding.JSON
+
+    def parse_message(self, connection: WSConnection, message: str | bytes) -> Envelope:
+        """
+        Builds the routing view of a frame in the encoding of the sending client.
+
+        Args:
+            connection (WSConnection): The connection the frame came from.
+            message (str | bytes): JSON text or a binary MessagePack frame.
+
+        Returns:
+            Envelope: The routing view of the frame.
+
+        Raises:
+            ValueError: If the frame is not a valid object.
+        """
+        if (
+            isinstance(message, bytes)
+            and connection.encoding == MessageEncoding.MSGPACK
+        ):
+            return Envelope.from_object(msgpack_codec.loads(message))
+        return Envelope.parse(
+            message, fast_path_min_size=app_settings.ENVELOPE_FAST_PATH_MIN_SIZE
+        )
 
     async def process_message(
-        self, client_id: str, message: str, agent_jwt: str
+        self, connection: WSConnection, message: str | bytes
     ) -> None:
         """
         Processes incoming messages from clients and routes them based on message type.
+        Only the top-level envelope is scanned, payloads are forwarded without being
+        decoded and re-encoded.
 
         Args:
-            client_id (str): The ID of the client sending the message.
-            message (str): The message content as a JSON string.
+            connection (WSConnection): The connection of the client sending the message.
+            message (str | bytes): The message content as a JSON string or a binary
+                MessagePack frame.
         """
+        client_id = connection.client_id
+        agent_jwt = connection.agent_jwt
+        connection.last_seen = time.monotonic()
         try:
-            data = json.loads(message)
-            logging.debug(f"Received message: {data}")
-        except json.JSONDecodeError:
-            await self.send_message(
-                client_id=client_id,
+            envelope = self.parse_message(connection, message)
+            message_type = envelope.get("message_type")
+            agent_uuid = envelope.get("agent_uuid")
+            self.metrics.record_received(message_type, len(message))
+            self.message_log.received(
+                client_id, message_type, message, agent_uuid=agent_uuid
+            )
+        except json_codec.JSONDecodeError:
+            self.metrics.record_received(None, len(message))
+            await self._reply(
+                connection,
                 message={
                     "error": {
                         "error_message": "Invalid JSON format",
@@ -53,42 +384,64 @@ class WSConnectionManager:
                 },
             )
         else:
-            message_type = data.pop("message_type", None)
-            agent_uuid = data.pop("agent_uuid", None)
-            payload = data.get("request_payload")
-
             if message_type == WSMessageType.AGENT_REGISTER.value:
                 if client_id not in self.MASTER_SERVERS_API_KEY_MAPPING.values():
-                    request_payload = {
-                        "request_payload": {
-                            **payload,
-                            "agent_uuid": client_id,
-                            "agent_jwt": agent_jwt,
-                            "message_type": message_type,
-                        }
-                    }
+                    request_payload = wrap(
+                        "request_payload",
+                        extend_object(
+                            envelope.raw("request_payload"),
+                            {
+                                "agent_uuid": client_id,
+                                "agent_jwt": agent_jwt,
+                                "message_type": message_type,
+                            },
+                        ),
+                    )
 
                     # Register the agent in SQL Database
                     await self.send_message(
                         client_id=MasterServerName.MASTER_SERVER_BE.value,
                         message=request_payload,
+                        message_type=message_type,
                     )
 
             elif message_type in (
                 WSMessageType.AGENT_RESPONSE.value,
                 WSMessageType.AGENT_ERROR.value,
             ):
-                invoked_by = data.pop("invoked_by", None)
-                data["message_type"] = message_type
-                logging.info(
-                    f"Got response: {data}, from: {client_id}, invoked_by: {invoked_by}"
+                invoked_by = envelope.get("invoked_by")
+                self._complete_invocation(connection, invoked_by, _request_id(envelope))
+                await self.send_message(
+                    invoked_by,
+                    envelope.rewrite(
+                        drop=ENVELOPE_KEYS, extra={"message_type": message_type}
+                    ),
+                    message_type=message_type,
+                )
+                await self._close_if_drained(connection)
+
+            elif message_type == WSMessageType.AGENT_RESPONSE_CHUNK.value:
+                # chunks are forwarded as they arrive, the receiver reassembles them
+                invoked_by = envelope.get("invoked_by")
+                final = envelope.get("final", False)
+                if final:
+                    self._complete_invocation(
+                        connection, invoked_by, _request_id(envelope)
+                    )
+                await self.send_message(
+                    invoked_by,
+                    envelope.rewrite(
+                        drop=ENVELOPE_KEYS, extra={"message_type": message_type}
+                    ),
+                    message_type=message_type,
                 )
-                await self.send_message(invoked_by, data)
+                if final:
+                    await self._close_if_drained(connection)
 
             elif message_type == WSMessageType.AGENT_INVOKE.value:
-                if not payload and not agent_uuid:
-                    await self.send_message(
-                        client_id=client_id,
+                if envelope.is_empty("request_payload") and not agent_uuid:
+                    await self._reply(
+                        connection,
                         message={
                             "error": {
                                 "error_message": "Missing request payload or agent UUID",
@@ -97,9 +450,12 @@ class WSConnectionManager:
                         },
                     )
 
-                if agent_uuid not in self.active_connections:
-                    await self.send_message(
-                        client_id=client_id,
+                # resolved once, delivering the invocation doesn't look it up again
+                node_id = await self.locate(agent_uuid)
+                is_active = node_id is not None
+                if not is_active:
+                    await self._reply(
+                        connection,
                         message={
                             "message_type": WSMessageType.AGENT_ERROR.value,
                             "error": {
@@ -113,8 +469,8 @@ class WSConnectionManager:
                     agent_uuid == MasterServerName.MASTER_SERVER_ML.value
                     and not client_id.startswith(app_settings.MASTER_BE_API_KEY)
                 ):
-                    await self.send_message(
-                        client_id=client_id,
+                    await self._reply(
+                        connection,
                         message={
                             "error": {
                                 "error_message": "Agent is NOT active",
@@ -123,32 +479,61 @@ class WSConnectionManager:
                         },
                     )
                 else:
-                    if (
-                        client_id.startswith(app_settings.MASTER_BE_API_KEY)
-                        and "error_message" in payload
-                    ):
+                    # only master BE errors need the payload decoded, they are small
+                    payload = (
+                        envelope.get("request_payload")
+                        if client_id.startswith(app_settings.MASTER_BE_API_KEY)
+                        else None
+                    )
+                    if payload and "error_message" in payload:
                         payload["message_type"] = WSMessageType.AGENT_ERROR.value
                         payload = {"error": payload}
                         await self.send_message(agent_uuid, payload)
-                    else:
-                        data["invoked_by"] = client_id
-                        await self.send_message(agent_uuid, data)
+                    elif is_active:
+                        status = await self.deliver_invocation(
+                            agent_uuid,
+                            caller=client_id,
+                            message=envelope.rewrite(
+                                drop=ENVELOPE_KEYS, extra={"invoked_by": client_id}
+                            ),
+                            node_id=node_id,
+                            request_id=_request_id(envelope),
+                        )
+                        await self._report_undelivered(agent_uuid, client_id, status)
 
             elif message_type == WSMessageType.AGENT_LOG.value:
-                await self.send_message(
-                    client_id=MasterServerName.MASTER_SERVER_BE.value,
-                    message={
-                        "request_payload": {
-                            "message_type": message_type,
-                            "agent_uuid": client_id,
-                            **data,
-                        },
+                log = envelope.rewrite(
+                    drop=("message_type", "agent_uuid"),
+                    extra={
+                        "message_type": message_type,
+                        "agent_uuid": client_id,
                     },
                 )
+                if self.log_batcher:
+                    await self.log_batcher.add(log)
+                else:
+                    await self.send_message(
+                        client_id=MasterServerName.MASTER_SERVER_BE.value,
+                        message=wrap("request_payload", log),
+                        message_type=message_type,
+                        lane=MessageLane.LOG,
+                    )
+
+            elif message_type == WSMessageType.AGENT_DRAIN.value:
+                await self.drain_replica(connection)
+
+            elif message_type == WSMessageType.PING.value:
+                await self._reply(
+                    connection, message={"message_type": WSMessageType.PONG.value}
+                )
+
+            elif message_type == WSMessageType.PONG.value:
+                # receiving the frame already refreshed the liveness of the connection
+                pass
 
             else:
-                await self.send_message(
-                    client_id=client_id,
+                await self._reply(
+                    connection,
                     message={
                         "error": {
                             "error_message": f"Unexpected exception: {message}",
@@ -157,28 +542,359 @@ class WSConnectionManager:
                     },
                 )
 
-    async def send_message(self, client_id: str, message: str | dict):
+    async def send_message(
+        self,
+        client_id: str,
+        message: str | dict,
+        message_type: Optional[str] = None,
+        lane: MessageLane = MessageLane.CONTROL,
+    ) -> DeliveryStatus:
         """
         Sends a message to the specified client if the connection exists.
+        Dictionaries are serialized once, in the encoding of the receiving client.
 
         Args:
             client_id (str): The client ID to which the message should be sent.
             message (str | dict): The message content, can be a string or a dictionary.
+            message_type (Optional[str]): The type of the message for logging, taken
+                from the dictionary if not given.
+            lane (MessageLane): The outbound queue of the message, LOG for agent logs.
+
+        Returns:
+            DeliveryStatus: Whether the message was queued, forwarded or dropped.
+        """
+        if message_type is None and isinstance(message, dict):
+            message_type = message.get("message_type")
+        self.message_log.sent(client_id, message_type, message)
+        if client_id in self.response_waiters:
+            return self._resolve_waiter(client_id, message)
+        if pool := self.active_connections.get(client_id):
+            if await pool.primary().send(message, lane=lane):
+                return DeliveryStatus.DELIVERED
+            return DeliveryStatus.DROPPED
+        elif self.cluster and client_id:
+            node_id = await self.cluster.owner(client_id)
+            if node_id and node_id != self.cluster.node_id:
+                if isinstance(message, dict):
+                    message = json_codec.dumps(message)
+                if await self.cluster.forward(node_id, client_id, message, lane=lane):
+                    return DeliveryStatus.FORWARDED
+                return DeliveryStatus.DROPPED
+        return DeliveryStatus.NOT_CONNECTED
+
+    async def _reply(self, connection: WSConnection, message: dict) -> None:
+        # errors go back to the connection that sent the message, not to any replica
+        self.message_log.sent(
+            connection.client_id, message.get("message_type"), message
+        )
+        await connection.send(message)
+
+    async def deliver_invocation(
+        self,
+        agent_uuid: str,
+        caller: str,
+        message: str | dict,
+        wait: bool = True,
+        node_id: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> DeliveryStatus:
+        """
+        Sends an invocation to the replica of the agent with the fewest in-flight
+        invocations and records it until the replica responds.
+
+        Args:
+            agent_uuid (str): The invoked agent.
+            caller (str): The client waiting for the response.
+            message (str | dict): The invocation as forwarded to the agent.
+            wait (bool): Whether to wait for a free slot in a full queue of the replica.
+            node_id (Optional[str]): The node of the agent if it was located already.
+            request_id (Optional[str]): The request ID sent with the invocation.
+
+        Returns:
+            DeliveryStatus: Whether the invocation was queued, forwarded or dropped,
+                FAILED if the caller has been sent an error already.
+        """
+        if pool := self.active_connections.get(agent_uuid):
+            replica = pool.pick(
+                load=lambda connection: self.invocations.in_flight_replica(
+                    connection.replica_id
+                )
+            )
+            if not replica:
+                await self.send_message(
+                    client_id=caller,
+                    message={
+                        "message_type": WSMessageType.AGENT_ERROR.value,
+                        "error": {
+                            "error_message": "All replicas of the agent are draining",
+                            "error_type": ErrorType.AGENT_DRAINING.value,
+                            "agent_uuid": agent_uuid,
+                        },
+                    },
+                )
+                return DeliveryStatus.FAILED
+
+            self.message_log.sent(agent_uuid, WSMessageType.AGENT_INVOKE.value, message)
+            invocation = self.invocations.track(
+                caller=caller,
+                target=agent_uuid,
+                replica=replica.replica_id,
+                request_id=request_id,
+            )
+            if await replica.send(message, wait=wait):
+                return DeliveryStatus.DELIVERED
+            self.invocations.discard(invocation)
+            return DeliveryStatus.DROPPED
+
+        elif self.cluster and agent_uuid:
+            node_id = node_id or await self.cluster.owner(agent_uuid)
+            if node_id and node_id != self.cluster.node_id:
+                if isinstance(message, dict):
+                    message = json_codec.dumps(message)
+                # the invocation is tracked by the node the agent is connected to
+                if await self.cluster.forward(
+                    node_id,
+                    agent_uuid,
+                    message,
+                    invoked_by=caller,
+                    request_id=request_id,
+                ):
+                    return DeliveryStatus.FORWARDED
+                return DeliveryStatus.DROPPED
+        return DeliveryStatus.NOT_CONNECTED
+
+    async def _report_undelivered(
+        self, agent_uuid: str, caller: str, status: DeliveryStatus
+    ) -> None:
+        """
+        Sends an AGENT_ERROR to the caller of an invocation that was not delivered,
+        it would otherwise wait for a response that never comes.
+
+        Args:
+            agent_uuid (str): The invoked agent.
+            caller (str): The client waiting for the response.
+            status (DeliveryStatus): The outcome of `deliver_invocation`.
+        """
+        if status == DeliveryStatus.NOT_CONNECTED:
+            error_message = "Agent is NOT active"
+            error_type = ErrorType.AGENT_NOT_ACTIVE
+        elif status == DeliveryStatus.DROPPED:
+            error_message = "Invocation could not be delivered to the agent"
+            error_type = ErrorType.AGENT_DISCONNECTED
+        else:
+            return
+        await self.send_message(
+            client_id=caller,
+            message={
+                "message_type": WSMessageType.AGENT_ERROR.value,
+                "error": {
+                    "error_message": error_message,
+                    "error_type": error_type.value,
+                    "agent_uuid": agent_uuid,
+                },
+            },
+        )
+
+    async def invoke_batch(
+        self,
+        messages: List[Message],
+        wait_for_responses: bool = False,
+        timeout: float = 30,
+    ) -> List[DeliveryResult]:
+        """
+        Sends messages to many clients concurrently.
+
+        When waiting for responses, every message is delivered as an invocation from a
+        caller inside the router, so the agent's `agent_response` or `agent_error`
+        comes back to the batch, also from agents connected to other router nodes.
+
+        Args:
+            messages (List[Message]): The client IDs and their messages.
+            wait_for_responses (bool): Whether to wait for the responses.
+            timeout (float): Seconds to wait for all responses, shared by the batch.
+
+        Returns:
+            List[DeliveryResult]: Delivery status and response per message, in order.
         """
-        message = json.dumps(message) if isinstance(message, dict) else message
-        logging.info(f"Sending message: {message}, to: {client_id}")
-        if websocket := self.active_connections.get(client_id):
-            await websocket.send_text(message)
+        if not wait_for_responses:
+            statuses = await asyncio.gather(
+                *(self.send_message(item.client_id, item.message) for item in messages)
+            )
+            return [
+                DeliveryResult(client_id=item.client_id, status=status.value)
+                for item, status in zip(messages, statuses)
+            ]
+
+        deadline = time.monotonic() + timeout
+        batch_id = uuid4().hex
+        callers = [
+            f"{BATCH_CALLER_PREFIX}{batch_id}-{index}" for index in range(len(messages))
+        ]
+        loop = asyncio.get_running_loop()
+        waiters = {caller: loop.create_future() for caller in callers}
+        self.response_waiters.update(waiters)
+        try:
+            if self.cluster:
+                # responses of remote agents are routed back to this node
+                await asyncio.gather(
+                    *(
+                        self.cluster.registry.claim(caller, self.cluster.node_id)
+                        for caller in callers
+                    )
+                )
+            statuses = await asyncio.gather(
+                *(
+                    self.deliver_invocation(
+                        item.client_id,
+                        caller=caller,
+                        message={**item.message, "invoked_by": caller},
+                        request_id=_request_id(Envelope.from_object(item.message)),
+                    )
+                    for item, caller in zip(messages, callers)
+                )
+            )
+            pending = [
+                waiters[caller]
+                for caller, status in zip(callers, statuses)
+                if status in (DeliveryStatus.DELIVERED, DeliveryStatus.FORWARDED)
+            ]
+            if pending:
+                await asyncio.wait(pending, timeout=max(deadline - time.monotonic(), 0))
 
-    async def connect(self, websocket: WebSocket) -> str:
+            results = []
+            for item, caller, status in zip(messages, callers, statuses):
+                waiter = waiters[caller]
+                if waiter.done():
+                    response = waiter.result()
+                    failed = (
+                        response.get("message_type") == WSMessageType.AGENT_ERROR.value
+                    )
+                    results.append(
+                        DeliveryResult(
+                            client_id=item.client_id,
+                            status=(
+                                DeliveryStatus.FAILED
+                                if failed
+                                else DeliveryStatus.RESPONDED
+                            ).value,
+                            response=response,
+                        )
+                    )
+                elif waiter in pending:
+                    results.append(
+                        DeliveryResult(
+                            client_id=item.client_id,
+                            status=DeliveryStatus.TIMEOUT.value,
+                        )
+                    )
+                else:
+                    results.append(
+                        DeliveryResult(client_id=item.client_id, status=status.value)
+                    )
+            return results
+        finally:
+            for caller in callers:
+                self.response_waiters.pop(caller, None)
+                # late responses of expired invocations are dropped
+                self.invocations.pop_caller(caller)
+            if self.cluster:
+                await asyncio.gather(
+                    *(
+                        self.cluster.registry.release(caller, self.cluster.node_id)
+                        for caller in callers
+                    )
+                )
+
+    def _resolve_waiter(self, caller: str, message: str | dict) -> DeliveryStatus:
+        response = message if isinstance(message, dict) else json_codec.loads(message)
+        if ChunkAssembler.is_chunk(response):
+            try:
+                response = self._waiter_chunks.feed(response)
+            except ValueError as e:
+                response = {
+                    "message_type": WSMessageType.AGENT_ERROR.value,
+                    "error": {
+                        "error_message": str(e),
+                        "error_type": ErrorType.AGENT_GENERAL_ERROR.value,
+                    },
+                }
+            if response is None:
+                return DeliveryStatus.DELIVERED
+
+        waiter = self.response_waiters.pop(caller)
+        if not waiter.done():
+            waiter.set_result(response)
+        return DeliveryStatus.DELIVERED
+
+    async def drain_replica(self, connection: WSConnection) -> None:
+        """
+        Stops sending new invocations to a replica. The replica is closed once its
+        in-flight invocations are answered or expired.
+
+        Args:
+            connection (WSConnection): The replica to drain.
+        """
+        if not connection.draining:
+            logging.info(
+                f"Draining replica {connection.replica_id} of {connection.client_id}"
+            )
+            connection.draining = True
+        await self._close_if_drained(connection)
+
+    async def process_cluster_frame(self, frame: str) -> None:
+        """
+        Handles a frame received from another router node over the internal link.
+        Frames are queued without waiting, a full local queue must not stall the
+        link that carries the traffic of every other client.
+
+        Args:
+            frame (str): The raw internal link frame.
+        """
+        frame_type, client_id, message, invoked_by, request_id, lane = (
+            ClusterLink.decode_frame(frame)
+        )
+
+        if frame_type == ClusterFrameType.DELIVER.value:
+            if invoked_by:
+                # the registry entry may be stale, the caller gets an error then
+                status = (
+                    await self.deliver_invocation(
+                        client_id,
+                        invoked_by,
+                        message,
+                        wait=False,
+                        request_id=request_id,
+                    )
+                    if client_id in self.active_connections
+                    else DeliveryStatus.NOT_CONNECTED
+                )
+                await self._report_undelivered(client_id, invoked_by, status)
+            elif client_id in self.response_waiters:
+                self._resolve_waiter(client_id, message)
+            elif pool := self.active_connections.get(client_id):
+                await pool.primary().send(message, lane=lane, wait=False)
+
+        elif frame_type == ClusterFrameType.CLIENT_DISCONNECTED.value:
+            self.invocations.pop_caller(client_id)
+            notified = await self._fail_invocations(
+                self.invocations.pop_target(client_id),
+                error_message="Agent has been unregistered",
+                error_type=ErrorType.AGENT_DISCONNECTED,
+            )
+            await self._cleanup_session_connections(client_id, skip=notified)
+
+    async def connect(self, websocket: WebSocket) -> Optional[WSConnection]:
         """
         Accepts a new WebSocket connection and assigns a client ID based on headers.
+        A connection of an agent that is already connected joins it as a replica,
+        other clients replace their previous connection. A reconnect of the same
+        agent session and replicas that are no longer alive are replaced too.
 
         Args:
             websocket (WebSocket): The WebSocket connection instance.
 
         Returns:
-            str: The resolved client ID.
+            Optional[WSConnection]: The connection or None if no client ID was resolved.
         """
         client_id = None
         agent_jwt = None
@@ -196,23 +912,129 @@ class WSConnectionManager:
                 client_id = agent_jwt
         elif invoke_key := websocket.headers.get("x-custom-invoke-key"):
             client_id = invoke_key
+        client_type = self._client_type(websocket, client_id)
 
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
-        return client_id, agent_jwt
+        encoding = self.negotiate_encoding(websocket)
+        headers = [(ENCODING_HEADER.encode(), encoding.value.encode())]
+        heartbeat = self.heartbeat.enabled and websocket.headers.get(
+            HEARTBEAT_HEADER, ""
+        ).strip().lower() in ("1", "true")
+        if heartbeat:
+            headers.append(
+                (HEARTBEAT_HEADER.encode(), f"{self.heartbeat.interval:g}".encode())
+            )
+        await websocket.accept(headers=headers)
+        if not client_id:
+            return None
+
+        connection = WSConnection(
+            websocket=websocket,
+            client_id=client_id,
+            max_queue_size=self.send_queue_size,
+            overflow_policy=self.overflow_policy,
+            encoding=encoding,
+            client_type=client_type,
+            metrics=self.metrics,
+            agent_jwt=agent_jwt,
+            heartbeat=heartbeat,
+            log_queue_size=self.log_queue_size,
+            log_rate_limit=self.log_rate_limit,
+            log_overflow_policy=self.log_overflow_policy,
+            on_failed=self._drop_failed_connection,
+            session=websocket.headers.get(SESSION_HEADER) or None,
+        )
+        connection.start()
+        if heartbeat:
+            self.heartbeat.watch(connection)
+
+        if pool := self.active_connections.get(client_id):
+            replaced = pool.replaced_by(connection, self.heartbeat.idle_timeout)
+            kept = [previous for previous in pool if previous not in replaced]
+            max_replicas = self.max_replicas if client_type == ClientType.AGENT else 1
+            # above the limit the oldest replicas are replaced
+            replaced += kept[: max(len(kept) - max_replicas + 1, 0)]
+            for previous in replaced:
+                pool.remove(previous)
+                self.heartbeat.unwatch(previous)
+                is_alive = previous.is_alive(self.heartbeat.idle_timeout)
+                await previous.close()
+                # a live replaced socket stays open until its client leaves
+                if not is_alive:
+                    self._close_socket_later(
+                        previous,
+                        code=HEARTBEAT_TIMEOUT_CLOSE_CODE,
+                        reason="Heartbeat timeout",
+                    )
+                await self._fail_invocations(
+                    self.invocations.pop_replica(previous.replica_id),
+                    error_message="Agent connection has been replaced",
+                    error_type=ErrorType.AGENT_DISCONNECTED,
+                )
+        else:
+            pool = self.active_connections[client_id] = ReplicaPool(client_id)
+            if client_type == ClientType.INVOKE_KEY:
+                self._index_session_connection(client_id)
+            if self.cluster:
+                await self.cluster.registry.claim(client_id, self.cluster.node_id)
+        pool.add(connection)
+        return connection
 
-    async def disconnect(self, client_id: str):
+    async def disconnect(self, connection: WSConnection):
         """
         Disconnects a client and notifies relevant parties about the unregistration.
+        While other replicas of the agent stay connected, to this or another node,
+        only the invocations of the leaving replicas fail and the agent is not
+        unregistered.
 
         Args:
-            client_id (str): The ID of the client to disconnect.
+            connection (WSConnection): The connection of the client to disconnect.
         """
-        if client_id not in self.active_connections:
+        await connection.close()
+        self.heartbeat.unwatch(connection)
+        client_id = connection.client_id
+        pool = self.active_connections.get(client_id)
+        if not pool or not pool.remove(connection):
+            # the connection has been replaced already
+            return
+
+        if len(pool):
+            await self._fail_invocations(
+                self.invocations.pop_replica(connection.replica_id),
+                error_message="Agent replica has disconnected",
+                error_type=ErrorType.AGENT_DISCONNECTED,
+            )
             return
 
         del self.active_connections[client_id]
+        if connection.client_type == ClientType.INVOKE_KEY:
+            self._unindex_session_connection(client_id)
+        if self.cluster and await self.cluster.registry.release(
+            client_id, self.cluster.node_id
+        ):
+            # replicas on other nodes keep serving the agent
+            self.invocations.pop_caller(client_id)
+            await self._fail_invocations(
+                self.invocations.pop_target(client_id),
+                error_message="Agent replica has disconnected",
+                error_type=ErrorType.AGENT_DISCONNECTED,
+            )
+            return
+        await self._client_left(client_id)
+
+    async def _release_lost_clients(self, client_ids: List[str]) -> None:
+        # clients of a dead node, this node pruned their claims and announces them
+        for client_id in client_ids:
+            if not client_id.startswith(BATCH_CALLER_PREFIX):
+                await self._client_left(client_id)
 
+    async def _client_left(self, client_id: str) -> None:
+        """
+        Unregisters a client that is no longer connected to the cluster and fails
+        everything that waits for it.
+
+        Args:
+            client_id (str): The ID of the client that left.
+        """
         if not client_id.startswith(
             app_settings.MASTER_BE_API_KEY
         ):  # Ignore sockets from Master BE
@@ -224,12 +1046,173 @@ class WSConnectionManager:
                         "message_type": WSMessageType.AGENT_UNREGISTER.value,
                     }
                 },
+                message_type=WSMessageType.AGENT_UNREGISTER.value,
             )
 
-        for connection_id in (
-            self.active_connections
+        # callers waiting for the agent get an error right away
+        self.invocations.pop_caller(client_id)
+        notified = await self._fail_invocations(
+            self.invocations.pop_target(client_id),
+            error_message="Agent has been unregistered",
+            error_type=ErrorType.AGENT_DISCONNECTED,
+        )
+        await self._cleanup_session_connections(client_id, skip=notified)
+        if self.cluster:
+            await self.cluster.broadcast_disconnect(client_id)
+
+    def _client_type(
+        self, websocket: WebSocket, client_id: Optional[str]
+    ) -> ClientType:
+        if client_id == MasterServerName.MASTER_SERVER_BE.value:
+            return ClientType.MASTER_SERVER_BE
+        if client_id == MasterServerName.MASTER_SERVER_ML.value:
+            return ClientType.MASTER_SERVER_ML
+        if "x-custom-authorization" not in websocket.headers and websocket.headers.get(
+            "x-custom-invoke-key"
+        ):
+            return ClientType.INVOKE_KEY
+        return ClientType.AGENT
+
+    async def _reap_connections(self, connections: List[WSConnection]) -> None:
+        for connection in connections:
+            logging.warning(
+                f"Connection {connection.replica_id} of {connection.client_id} missed "
+                f"its heartbeats for {self.heartbeat.idle_timeout:g}s, reaping it"
+            )
+            self.metrics.record_reaped()
+            await self.disconnect(connection)
+            self._close_socket_later(
+                connection,
+                code=HEARTBEAT_TIMEOUT_CLOSE_CODE,
+                reason="Heartbeat timeout",
+            )
+
+    async def _drop_failed_connection(self, connection: WSConnection) -> None:
+        # a dead writer must not leave the connection in its pool to queue up messages
+        await self.disconnect(connection)
+        self._close_socket_later(
+            connection, code=SEND_FAILED_CLOSE_CODE, reason="Send failed"
+        )
+
+    def _close_socket_later(
+        self, connection: WSConnection, code: int, reason: str
+    ) -> None:
+        # closing a half-open socket waits for the close handshake to time out
+        task = asyncio.create_task(connection.close_socket(code=code, reason=reason))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _send_log_batch(self, batch: str) -> None:
+        await self.send_message(
+            client_id=MasterServerName.MASTER_SERVER_BE.value,
+            message=batch,
+            message_type=WSMessageType.AGENT_LOG_BATCH.value,
+            lane=MessageLane.LOG,
+        )
+
+    def _complete_invocation(
+        self, connection: WSConnection, invoked_by: str, request_id: Optional[str]
+    ) -> None:
+        invocation = self.invocations.complete(
+            target=connection.client_id,
+            caller=invoked_by,
+            replica=connection.replica_id,
+            request_id=request_id,
+        )
+        if invocation:
+            self.metrics.observe_invoke_latency(
+                connection.client_id, time.monotonic() - invocation.started_at
+            )
+
+    async def _close_if_drained(self, connection: WSConnection) -> None:
+        if (
+            connection.draining
+            and not connection.closed
+            and not self.invocations.in_flight_replica(connection.replica_id)
+        ):
+            logging.info(
+                f"Replica {connection.replica_id} of {connection.client_id} is drained"
+            )
+            await connection.close_socket(
+                code=REPLICA_DRAINED_CLOSE_CODE, reason="Replica drained"
+            )
+
+    async def _fail_expired_invocations(self, invocations: List[Invocation]) -> None:
+        await self._fail_invocations(
+            invocations,
+            error_message=f"Agent did not respond within {app_settings.INVOKE_TIMEOUT:g} seconds",
+            error_type=ErrorType.AGENT_TIMEOUT,
+        )
+        for invocation in invocations:
+            pool = self.active_connections.get(invocation.target)
+            if pool and (replica := pool.get(invocation.replica)):
+                await self._close_if_drained(replica)
+
+    async def _fail_invocations(
+        self,
+        invocations: Iterable[Invocation],
+        error_message: str,
+        error_type: ErrorType,
+    ) -> Set[str]:
+        """
+        Sends an AGENT_ERROR to the callers of invocations that won't be answered.
+
+        Args:
+            invocations (Iterable[Invocation]): The failed invocations.
+            error_message (str): Description of the failure.
+            error_type (ErrorType): Type of the failure.
+
+        Returns:
+            Set[str]: IDs of the notified callers.
+        """
+        notified = set()
+        for invocation in invocations:
+            logging.warning(
+                f"Invocation {invocation.invocation_id} of {invocation.target} "
+                f"by {invocation.caller} failed: {error_message}"
+            )
+            await self.send_message(
+                client_id=invocation.caller,
+                message={
+                    "message_type": WSMessageType.AGENT_ERROR.value,
+                    "error": {
+                        "error_message": error_message,
+                        "error_type": error_type.value,
+                        "agent_uuid": invocation.target,
+                        "invocation_id": invocation.invocation_id,
+                    },
+                },
+            )
+            notified.add(invocation.caller)
+        return notified
+
+    def _index_session_connection(self, connection_id: str) -> None:
+        for agent_id in set(connection_id.split(SESSION_KEY_SEPARATOR)):
+            if agent_id:
+                self.session_connections.setdefault(agent_id, set()).add(connection_id)
+
+    def _unindex_session_connection(self, connection_id: str) -> None:
+        for agent_id in set(connection_id.split(SESSION_KEY_SEPARATOR)):
+            if connections := self.session_connections.get(agent_id):
+                connections.discard(connection_id)
+                if not connections:
+                    del self.session_connections[agent_id]
+
+    async def _cleanup_session_connections(
+        self, client_id: str, skip: Set[str] = frozenset()
+    ) -> None:
+        """
+        Notifies local connections created via session.send that their agent is gone.
+        The connections are looked up in the session index, not by scanning all of them.
+
+        Args:
+            client_id (str): The ID of the disconnected agent.
+            skip (Set[str]): Connections that have already been notified.
+        """
+        for connection_id in list(
+            self.session_connections.get(client_id, ())
         ):  # Clean up all connections created via session.send
-            if client_id in connection_id:
+            if connection_id not in skip:
                 await self.send_message(
                     client_id=connection_id,
                     message={
@@ -1,8 +1,68 @@
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
 import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
 
+from connectors.cluster import ClusterLink
+from connectors.connection import receive_frame
+from connectors.registry import build_registry
 from connectors.ws_connector_manager import WSConnectionManager
-from utils.pydantic_models import Message, MessageResponse
+from settings import get_settings
+from utils.pydantic_models import (
+    BatchMessage,
+    BatchMessageResponse,
+    ConnectionLiveness,
+    InFlightInvocations,
+    Message,
+    MessageResponse,
+    MetricsSnapshot,
+    QueueStats,
+    ReplicaStats,
+)
+
+app_settings = get_settings()
+
+cluster = (
+    ClusterLink(
+        node_id=app_settings.NODE_ID,
+        node_url=app_settings.NODE_URL,
+        registry=build_registry(
+            backend=app_settings.REGISTRY_BACKEND,
+            path=app_settings.REGISTRY_PATH,
+            redis_uri=app_settings.REGISTRY_REDIS_URI,
+            node_ttl=app_settings.NODE_TTL,
+        ),
+        secret=app_settings.CLUSTER_SECRET,
+        heartbeat_interval=app_settings.NODE_HEARTBEAT_INTERVAL,
+    )
+    if app_settings.CLUSTER_MODE
+    else None
+)
+
+# Manages WebSocket connections and routes messages
+ws_connection_manager = WSConnectionManager(cluster=cluster)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Lifespan context manager, starts the connection manager tasks and joins and leaves
+    the router cluster if it is enabled.
+
+    Args:
+        app (FastAPI): The FastAPI application instance.
+    """
+    ws_connection_manager.start()
+    if cluster:
+        await cluster.start()
+    yield
+    if cluster:
+        await cluster.stop()
+    await ws_connection_manager.stop()
+
 
 app = FastAPI(
     title="Agent WebSocket API",
@@ -10,11 +70,9 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
-# Manages WebSocket connections and routes messages
-ws_connection_manager = WSConnectionManager()
-
 
 @app.websocket(path="/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -27,22 +85,43 @@ async def websocket_endpoint(websocket: WebSocket):
     Args:
         websocket (WebSocket): The incoming WebSocket connection.
     """
-    client_id, agent_jwt = await ws_connection_manager.connect(websocket)
+    connection = await ws_connection_manager.connect(websocket)
 
-    if not client_id:
+    if not connection:
         # Reject connection if no valid authorization header
         await websocket.close(code=4000, reason="Missing Authorization header")
     else:
         try:
             # Continuously listen for messages
             while True:
-                data = await websocket.receive_text()
-                await ws_connection_manager.process_message(
-                    client_id, data, agent_jwt=agent_jwt
-                )
+                data = await receive_frame(websocket)
+                await ws_connection_manager.process_message(connection, data)
         except WebSocketDisconnect:
             # Handle client disconnection
-            await ws_connection_manager.disconnect(client_id)
+            await ws_connection_manager.disconnect(connection)
+
+
+@app.websocket(path="/internal/ws")
+async def cluster_endpoint(websocket: WebSocket):
+    """
+    Internal link endpoint, receives messages forwarded by other router nodes.
+
+    Args:
+        websocket (WebSocket): The incoming WebSocket connection of a peer node.
+    """
+    if not cluster or not cluster.is_authorized(
+        websocket.headers.get(ClusterLink.SECRET_HEADER)
+    ):
+        await websocket.close(code=4003, reason="Cluster link is not allowed")
+        return
+
+    await websocket.accept()
+    try:
+        while True:
+            frame = await websocket.receive_text()
+            await ws_connection_manager.process_cluster_frame(frame)
+    except WebSocketDisconnect:
+        pass
 
 
 @app.post(
@@ -55,6 +134,144 @@ async def invoke_agent(message: Message) -> MessageResponse:
     return MessageResponse(detail=f"Message sent to client {message.client_id}")
 
 
+@app.post(
+    path="/invoke-agent/batch",
+    response_model=BatchMessageResponse,
+    summary="Send messages to many connected agents at once",
+)
+async def invoke_agents_batch(batch: BatchMessage) -> BatchMessageResponse:
+    if len(batch.messages) > app_settings.INVOKE_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch takes at most {app_settings.INVOKE_BATCH_MAX_SIZE} messages",
+        )
+    started = time.monotonic()
+    results = await ws_connection_manager.invoke_batch(
+        batch.messages,
+        wait_for_responses=batch.wait_for_responses,
+        timeout=batch.timeout_seconds,
+    )
+    return BatchMessageResponse(
+        results=results, elapsed_seconds=time.monotonic() - started
+    )
+
+
+@app.get(
+    path="/connections/queues",
+    response_model=Dict[str, QueueStats],
+    summary="Outbound queue depth per connected client",
+)
+async def connection_queues() -> Dict[str, QueueStats]:
+    return ws_connection_manager.queue_stats()
+
+
+@app.get(
+    path="/connections/liveness",
+    response_model=List[ConnectionLiveness],
+    summary="Time since the last frame from every connected client",
+)
+async def connection_liveness(min_idle_seconds: float = 0) -> List[ConnectionLiveness]:
+    return ws_connection_manager.liveness(min_idle_seconds=min_idle_seconds)
+
+
+@app.get(
+    path="/agents/{agent_id}/replicas",
+    response_model=List[ReplicaStats],
+    summary="Replicas of an agent connected to this router node",
+)
+async def agent_replicas(agent_id: str) -> List[ReplicaStats]:
+    replicas = ws_connection_manager.replica_stats(agent_id)
+    if replicas is None:
+        raise HTTPException(
+            status_code=404, detail=f"Agent {agent_id} is not connected"
+        )
+    return replicas
+
+
+@app.post(
+    path="/agents/{agent_id}/replicas/{replica_id}/drain",
+    response_model=MessageResponse,
+    summary="Stop sending invocations to a replica and close it once it is idle",
+)
+async def drain_agent_replica(agent_id: str, replica_id: str) -> MessageResponse:
+    pool = ws_connection_manager.active_connections.get(agent_id)
+    if not pool or not (replica := pool.get(replica_id)):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Replica {replica_id} of {agent_id} is not connected",
+        )
+    await ws_connection_manager.drain_replica(replica)
+    return MessageResponse(detail=f"Replica {replica_id} of {agent_id} is draining")
+
+
+@app.get(
+    path="/logging/debug-clients",
+    response_model=List[str],
+    summary="Clients whose messages are always logged in full",
+)
+async def message_log_debug_clients() -> List[str]:
+    return sorted(ws_connection_manager.message_log.debug_clients)
+
+
+@app.put(
+    path="/logging/debug-clients/{client_id}",
+    response_model=MessageResponse,
+    summary="Log every message of a client in full",
+)
+async def enable_client_debug_logging(client_id: str) -> MessageResponse:
+    ws_connection_manager.message_log.set_debug(client_id, enabled=True)
+    return MessageResponse(detail=f"Debug logging enabled for client {client_id}")
+
+
+@app.delete(
+    path="/logging/debug-clients/{client_id}",
+    response_model=MessageResponse,
+    summary="Return a client to the sampled message logging",
+)
+async def disable_client_debug_logging(client_id: str) -> MessageResponse:
+    ws_connection_manager.message_log.set_debug(client_id, enabled=False)
+    return MessageResponse(detail=f"Debug logging disabled for client {client_id}")
+
+
+@app.get(
+    path="/invocations/in-flight",
+    response_model=InFlightInvocations,
+    summary="Invocations forwarded to agents and not answered yet",
+)
+async def in_flight_invocations(
+    agent_uuid: Optional[str] = None,
+) -> InFlightInvocations:
+    return ws_connection_manager.in_flight_invocations(agent_uuid)
+
+
+@app.get(
+    path="/metrics",
+    response_class=PlainTextResponse,
+    summary="Router metrics in the Prometheus text format",
+)
+async def prometheus_metrics() -> PlainTextResponse:
+    snapshot = ws_connection_manager.metrics_snapshot()
+    return PlainTextResponse(
+        ws_connection_manager.metrics.render_prometheus(snapshot),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@app.get(
+    path="/metrics/json",
+    response_model=MetricsSnapshot,
+    summary="Router metrics snapshot",
+)
+async def metrics_snapshot() -> MetricsSnapshot:
+    return ws_connection_manager.metrics_snapshot()
+
+
 if __name__ == "__main__":
     # Run the FastAPI app using Uvicorn on port 8080 with auto-reload
-    uvicorn.run("main:app", port=8080, reload=True)
+    uvicorn.run(
+        "main:app",
+        port=8080,
+        reload=True,
+        ws_ping_interval=app_settings.WS_PING_INTERVAL,
+        ws_ping_timeout=app_settings.WS_PING_TIMEOUT,
+    )
@@ -1,6 +1,8 @@
 from functools import lru_cache
+from typing import Dict, List
+from uuid import uuid4
 
-from pydantic import Field
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -20,6 +22,107 @@ class Settings(BaseSettings):
         alias="MASTER_BE_API_KEY",
     )
 
+    # Outbound queue per connection, policy: disconnect | drop_oldest | drop_newest | block,
+    # block makes the sender wait and stalls its receive loop while the queue is full
+    SEND_QUEUE_SIZE: int = Field(default=1024, alias="ROUTER_SEND_QUEUE_SIZE")
+    SEND_QUEUE_OVERFLOW_POLICY: str = Field(
+        default="disconnect", alias="ROUTER_SEND_QUEUE_OVERFLOW_POLICY"
+    )
+
+    # Lower-priority lane for agent logs, written only while no other message is queued,
+    # capped at a rate in messages per second (0 = no cap), policy: drop_oldest | drop_newest
+    LOG_QUEUE_SIZE: int = Field(default=4096, alias="ROUTER_LOG_QUEUE_SIZE")
+    LOG_RATE_LIMIT: float = Field(default=500, alias="ROUTER_LOG_RATE_LIMIT")
+    LOG_OVERFLOW_POLICY: str = Field(
+        default="drop_oldest", alias="ROUTER_LOG_OVERFLOW_POLICY"
+    )
+
+    # Agent logs to master_server_be are coalesced into one message per window (seconds)
+    # or per LOG_BATCH_MAX_SIZE logs, 0 sends every log as its own message
+    LOG_BATCH_WINDOW: float = Field(default=0.05, alias="ROUTER_LOG_BATCH_WINDOW")
+    LOG_BATCH_MAX_SIZE: int = Field(default=200, alias="ROUTER_LOG_BATCH_MAX_SIZE")
+
+    # Frames of this size and bigger are routed without decoding the payload
+    ENVELOPE_FAST_PATH_MIN_SIZE: int = Field(
+        default=16 * 1024, alias="ROUTER_ENVELOPE_FAST_PATH_MIN_SIZE"
+    )
+
+    # Lets clients negotiate binary MessagePack frames with the `x-message-encoding` header
+    MSGPACK_ENABLED: bool = Field(default=True, alias="ROUTER_MSGPACK_ENABLED")
+
+    # Connections of one agent served as replicas, the oldest is replaced above the limit
+    AGENT_MAX_REPLICAS: int = Field(default=16, alias="ROUTER_AGENT_MAX_REPLICAS")
+
+    # Seconds an agent has to answer an invocation before the caller gets an error, 0 disables
+    INVOKE_TIMEOUT: float = Field(default=600, alias="ROUTER_INVOKE_TIMEOUT")
+
+    # Every WebSocket gets a protocol-level ping every interval and is closed without a
+    # pong within the timeout, WebSocket clients answer pings on their own
+    WS_PING_INTERVAL: float = Field(default=20, gt=0, alias="ROUTER_WS_PING_INTERVAL")
+    WS_PING_TIMEOUT: float = Field(default=20, gt=0, alias="ROUTER_WS_PING_TIMEOUT")
+
+    # On top of that, clients that opt in with the `x-heartbeat` header get application
+    # pings every interval and are reaped after the idle timeout without a frame, 0 disables
+    HEARTBEAT_INTERVAL: float = Field(default=15, alias="ROUTER_HEARTBEAT_INTERVAL")
+    HEARTBEAT_IDLE_TIMEOUT: float = Field(
+        default=45, alias="ROUTER_HEARTBEAT_IDLE_TIMEOUT"
+    )
+
+    # Most messages accepted by one batch invoke request
+    INVOKE_BATCH_MAX_SIZE: int = Field(
+        default=1000, alias="ROUTER_INVOKE_BATCH_MAX_SIZE"
+    )
+
+    # Window of the per-second message rates reported by the metrics endpoints
+    METRICS_RATE_WINDOW: int = Field(default=60, alias="ROUTER_METRICS_RATE_WINDOW")
+
+    # Logging of routed messages: structured (one sampled, truncated line) | full
+    MESSAGE_LOG_MODE: str = Field(default="structured", alias="ROUTER_MESSAGE_LOG_MODE")
+    MESSAGE_LOG_LEVEL: str = Field(default="INFO", alias="ROUTER_MESSAGE_LOG_LEVEL")
+    # share of logged messages per message_type as JSON, "*" applies to unlisted types
+    MESSAGE_LOG_SAMPLE_RATES: Dict[str, float] = Field(
+        default={"agent_log": 0.1}, alias="ROUTER_MESSAGE_LOG_SAMPLE_RATES"
+    )
+    MESSAGE_LOG_MAX_PAYLOAD: int = Field(
+        default=256, alias="ROUTER_MESSAGE_LOG_MAX_PAYLOAD"
+    )
+    MESSAGE_LOG_HASH_PAYLOADS: bool = Field(
+        default=False, alias="ROUTER_MESSAGE_LOG_HASH_PAYLOADS"
+    )
+    # client IDs whose messages are always logged in full, as a JSON list
+    MESSAGE_LOG_DEBUG_CLIENTS: List[str] = Field(
+        default=[], alias="ROUTER_MESSAGE_LOG_DEBUG_CLIENTS"
+    )
+
+    # Cluster mode: several router nodes share a registry of connected clients
+    CLUSTER_MODE: bool = Field(default=False, alias="ROUTER_CLUSTER_MODE")
+    NODE_ID: str = Field(default_factory=lambda: uuid4().hex, alias="ROUTER_NODE_ID")
+    # internal link URL other nodes use to reach this node
+    NODE_URL: str = Field(
+        default="ws://localhost:8080/internal/ws", alias="ROUTER_NODE_URL"
+    )
+    # required in cluster mode, peers must present it on the internal link
+    CLUSTER_SECRET: str = Field(default="", alias="ROUTER_CLUSTER_SECRET")
+    # nodes without a heartbeat for NODE_TTL seconds are dead, their claims are pruned
+    NODE_HEARTBEAT_INTERVAL: float = Field(
+        default=5, alias="ROUTER_NODE_HEARTBEAT_INTERVAL"
+    )
+    NODE_TTL: float = Field(default=15, alias="ROUTER_NODE_TTL")
+    # memory | local (SQLite file shared by processes on one host) | redis
+    REGISTRY_BACKEND: str = Field(default="local", alias="ROUTER_REGISTRY_BACKEND")
+    REGISTRY_PATH: str = Field(
+        default="/tmp/genai_router_registry.sqlite3", alias="ROUTER_REGISTRY_PATH"
+    )
+    REGISTRY_REDIS_URI: str = Field(
+        default="redis://genai-redis:6379/1", alias="ROUTER_REGISTRY_REDIS_URI"
+    )
+
+    @model_validator(mode="after")
+    def require_cluster_secret(self) -> "Settings":
+        if self.CLUSTER_MODE and not self.CLUSTER_SECRET:
+            raise ValueError("ROUTER_CLUSTER_SECRET must be set in cluster mode")
+        return self
+
 
 @lru_cache
 def get_settings() -> Settings:
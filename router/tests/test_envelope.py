@@ -0,0 +1,174 @@
+import json
+
+import pytest
+
+from utils.envelope import Envelope, extend_object
+
+ENVELOPE_KEYS = ("message_type", "agent_uuid", "invoked_by")
+
+
+def parse(data: dict, **dumps_options) -> Envelope:
+    # every frame goes through the splicer, whatever its size
+    return Envelope.parse(json.dumps(data, **dumps_options), fast_path_min_size=0)
+
+
+def route(envelope: Envelope) -> dict:
+    message_type = envelope.get("message_type")
+    message = envelope.rewrite(drop=ENVELOPE_KEYS, extra={"message_type": message_type})
+    return json.loads(message) if isinstance(message, str) else message
+
+
+def test_large_object_payload_is_not_decoded():
+    payload = {"text": "x" * 200_000, "items": [{"id": i} for i in range(10)]}
+    envelope = Envelope.parse(
+        json.dumps(
+            {
+                "message_type": "agent_invoke",
+                "agent_uuid": "agent",
+                "request_payload": payload,
+            }
+        )
+    )
+
+    assert not envelope.is_empty("request_payload")
+    assert envelope.get("agent_uuid") == "agent"
+    assert json.loads(envelope.raw("request_payload")) == payload
+    assert json.loads(envelope.rewrite(drop=ENVELOPE_KEYS)) == {
+        "request_payload": payload
+    }
+    assert not envelope.decoded
+
+
+def test_response_first_key_order():
+    response = {"nested": {"message_type": "inner", "list": [1, [2, {"a": "}"}]]}}
+    envelope = parse(
+        {
+            "response": response,
+            "invoked_by": "caller",
+            "message_type": "agent_response",
+            "execution_time": 1.5,
+        }
+    )
+
+    assert envelope.get("message_type") == "agent_response"
+    assert envelope.get("invoked_by") == "caller"
+    assert route(envelope) == {
+        "response": response,
+        "execution_time": 1.5,
+        "message_type": "agent_response",
+    }
+    assert not envelope.decoded
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        'quote \\" and brace { and bracket ]',
+        "ends with a backslash \\\\",
+        '"}, "message_type": "forged',
+    ],
+)
+def test_escaped_quotes_and_braces_inside_strings(value):
+    payload = {"text": value, "list": ["[", "{", "\\"]}
+    envelope = parse(
+        {"request_payload": payload, "message_type": "agent_invoke"}, indent=2
+    )
+
+    assert envelope.get("message_type") == "agent_invoke"
+    assert json.loads(envelope.raw("request_payload")) == payload
+    assert not envelope.decoded
+
+
+def test_escaped_key():
+    frame = json.dumps({"message_type": "agent_invoke", 'a"b': 1})
+    envelope = Envelope.parse(
+        frame.replace("message_type", "message\\u005ftype"), fast_path_min_size=0
+    )
+
+    assert envelope.get("message_type") == "agent_invoke"
+    assert envelope.get('a"b') == 1
+
+
+def test_duplicate_keys_decode_the_frame():
+    frame = '{"message_type": "first", "payload": {"a": 1}, "message_type": "last"}'
+    envelope = Envelope.parse(frame, fast_path_min_size=0)
+
+    assert envelope.get("message_type") == "last"
+    assert envelope.decoded
+
+
+def test_nested_duplicate_keys_are_ignored():
+    envelope = parse(
+        {
+            "payload": {"message_type": "nested", "payload": {"message_type": 1}},
+            "message_type": "top",
+        }
+    )
+
+    assert envelope.get("message_type") == "top"
+    assert not envelope.decoded
+
+
+@pytest.mark.parametrize(
+    "value, empty",
+    [
+        ({}, True),
+        ([], True),
+        ("", True),
+        (None, True),
+        (0, True),
+        (False, True),
+        ({"a": 1}, False),
+        ([0], False),
+        (" ", False),
+        (0.5, False),
+    ],
+)
+def test_is_empty(value, empty):
+    envelope = parse({"request_payload": value}, indent=4)
+
+    assert envelope.is_empty("request_payload") is empty
+    assert envelope.is_empty("missing")
+    assert not envelope.decoded
+
+
+def test_dense_payload_falls_back_to_decoding():
+    payload = [{"id": i} for i in range(5_000)]
+    envelope = Envelope.parse(
+        json.dumps({"response": payload, "message_type": "agent_response"})
+    )
+
+    assert envelope.get("message_type") == "agent_response"
+    assert envelope.decoded
+    assert route(envelope) == {"response": payload, "message_type": "agent_response"}
+
+
+def test_rewrite_keeps_unchanged_members_in_place():
+    envelope = parse({"message_type": "agent_response", "response": {"a": [1]}})
+
+    assert envelope.rewrite(extra={"message_type": "agent_response"}) == envelope.frame
+
+
+def test_rewrite_removes_every_member():
+    envelope = parse({"message_type": "x", "agent_uuid": "y"})
+
+    assert json.loads(envelope.rewrite(drop=ENVELOPE_KEYS)) == {}
+    assert json.loads(envelope.rewrite(drop=["agent_uuid"], extra={"a": 1})) == {
+        "message_type": "x",
+        "a": 1,
+    }
+
+
+@pytest.mark.parametrize("frame", ["[1, 2]", '"text"', "  null"])
+def test_parse_rejects_non_objects(frame):
+    with pytest.raises(ValueError):
+        Envelope.parse(frame, fast_path_min_size=0)
+
+
+def test_extend_object():
+    assert json.loads(extend_object("{ }", {"a": 1})) == {"a": 1}
+    assert json.loads(extend_object('{"b": {"c": 2}}', {"a": 1})) == {
+        "b": {"c": 2},
+        "a": 1,
+    }
+    assert extend_object({"b": 2}, {"a": 1}) == {"b": 2, "a": 1}
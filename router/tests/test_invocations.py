@@ -0,0 +1,124 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from connectors.invocations import Invocation, InvocationTable
+
+
+async def ignore(invocations: List[Invocation]) -> None:
+    pass
+
+
+def make_table(default_timeout: float = 0) -> InvocationTable:
+    return InvocationTable(on_expired=ignore, default_timeout=default_timeout)
+
+
+def test_complete_oldest_invocation_without_request_id():
+    table = make_table()
+    first = table.track(caller="caller", target="agent", replica="r1")
+    second = table.track(caller="caller", target="agent", replica="r1")
+
+    assert table.complete(target="agent", caller="caller", replica="r1") is first
+    assert table.complete(target="agent", caller="caller", replica="r1") is second
+    assert table.complete(target="agent", caller="caller", replica="r1") is None
+    assert table.in_flight() == 0
+
+
+def test_complete_by_request_id():
+    table = make_table()
+    first = table.track(caller="caller", target="agent", request_id="a")
+    second = table.track(caller="caller", target="agent", request_id="b")
+
+    assert table.complete(target="agent", caller="caller", request_id="b") is second
+    assert table.complete(target="agent", caller="caller", request_id="a") is first
+    assert table.in_flight() == 0
+
+
+def test_complete_unknown_request_id_falls_back_to_oldest():
+    table = make_table()
+    first = table.track(caller="caller", target="agent", request_id="a")
+    second = table.track(caller="caller", target="agent")
+
+    assert table.complete(target="agent", caller="caller", request_id="x") is first
+    assert table.complete(target="agent", caller="caller", request_id="a") is second
+
+
+def test_complete_only_the_responding_replica():
+    table = make_table()
+    table.track(caller="caller", target="agent", replica="r1", request_id="a")
+    on_r2 = table.track(caller="caller", target="agent", replica="r2", request_id="a")
+
+    assert table.complete(target="agent", caller="caller", replica="r2") is on_r2
+    assert table.complete(target="agent", caller="other", replica="r1") is None
+    assert table.in_flight_replica("r1") == 1
+    assert table.in_flight_replica("r2") == 0
+
+
+def test_discard():
+    table = make_table()
+    invocation = table.track(caller="caller", target="agent", request_id="a")
+
+    table.discard(invocation)
+    table.discard(invocation)
+
+    assert table.in_flight() == 0
+    assert table.complete(target="agent", caller="caller", request_id="a") is None
+
+
+def test_expire():
+    table = make_table(default_timeout=10)
+    expiring = table.track(caller="caller", target="agent", timeout=1)
+    completed = table.track(caller="caller", target="agent", timeout=2)
+    without_deadline = table.track(caller="caller", target="agent", timeout=0)
+    later = table.track(caller="caller", target="agent")
+    table.discard(completed)
+
+    assert without_deadline.deadline is None
+    assert table.expire(now=expiring.started_at + 0.5) == []
+    assert table.expire(now=expiring.started_at + 5) == [expiring]
+    assert table.expire(now=later.started_at + 10) == [later]
+    assert table.in_flight() == 1
+
+
+def test_pop_replica():
+    table = make_table()
+    first = table.track(caller="c1", target="agent", replica="r1", request_id="a")
+    second = table.track(caller="c2", target="agent", replica="r1")
+    other = table.track(caller="c1", target="agent", replica="r2")
+
+    assert table.pop_replica("r1") == [first, second]
+    assert table.pop_replica("r1") == []
+    assert table.in_flight("agent") == 1
+    assert table.complete(target="agent", caller="c1", request_id="a") is other
+
+
+def test_pop_caller():
+    table = make_table()
+    first = table.track(caller="caller", target="a1", replica="r1")
+    second = table.track(caller="caller", target="a2", request_id="b")
+    other = table.track(caller="other", target="a1", replica="r1")
+
+    assert table.pop_caller("caller") == [first, second]
+    assert table.in_flight_by_target() == {"a1": 1}
+    assert table.pop_target("a1") == [other]
+    assert table.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_reaper_reports_expired_invocations():
+    expired = asyncio.Queue()
+
+    async def on_expired(invocations: List[Invocation]) -> None:
+        await expired.put(invocations)
+
+    table = InvocationTable(on_expired=on_expired, default_timeout=60)
+    table.start()
+    try:
+        table.track(caller="caller", target="agent")
+        invocation = table.track(caller="caller", target="agent", timeout=0.01)
+
+        assert await asyncio.wait_for(expired.get(), timeout=1) == [invocation]
+        assert table.in_flight() == 1
+    finally:
+        await table.stop()
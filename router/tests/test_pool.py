@@ -0,0 +1,101 @@
+from collections import Counter
+from typing import Optional
+
+from connectors.connection import WSConnection
+from connectors.pool import ReplicaPool
+from utils.enums import OverflowPolicy
+
+
+def make_replica(
+    session: Optional[str] = None, heartbeat: bool = False, draining: bool = False
+) -> WSConnection:
+    connection = WSConnection(
+        websocket=None,
+        client_id="agent",
+        max_queue_size=8,
+        overflow_policy=OverflowPolicy.DISCONNECT,
+        heartbeat=heartbeat,
+        session=session,
+    )
+    connection.draining = draining
+    return connection
+
+
+def make_pool(*replicas: WSConnection) -> ReplicaPool:
+    pool = ReplicaPool("agent")
+    for replica in replicas:
+        pool.add(replica)
+    return pool
+
+
+def test_pick_least_loaded_replica():
+    busy, idle = make_replica(), make_replica()
+    pool = make_pool(busy, idle)
+    load = {busy.replica_id: 3, idle.replica_id: 1}
+
+    for _ in range(4):
+        assert pool.pick(load=lambda replica: load[replica.replica_id]) is idle
+
+
+def test_pick_breaks_ties_round_robin():
+    replicas = [make_replica() for _ in range(3)]
+    pool = make_pool(*replicas)
+
+    picked = Counter(pool.pick(load=lambda replica: 0) for _ in range(30))
+
+    assert picked == {replica: 10 for replica in replicas}
+
+
+def test_draining_replicas_get_no_invocations():
+    draining = make_replica(draining=True)
+    serving = make_replica()
+    pool = make_pool(serving, draining)
+
+    assert {pool.pick(load=lambda replica: 0) for _ in range(4)} == {serving}
+    assert pool.primary() is serving
+
+    serving.draining = True
+    assert pool.pick(load=lambda replica: 0) is None
+    # other messages still reach the newest replica
+    assert pool.primary() is draining
+
+
+def test_remove():
+    first, second = make_replica(), make_replica()
+    pool = make_pool(first, second)
+
+    assert pool.remove(first)
+    assert not pool.remove(first)
+    assert list(pool) == [second]
+    assert pool.get(first.replica_id) is None
+    assert pool.primary() is second
+
+    pool.remove(second)
+    assert len(pool) == 0
+    assert pool.pick(load=lambda replica: 0) is None
+    assert pool.primary() is None
+
+
+def test_reconnect_of_the_same_session_replaces_its_replica():
+    previous = make_replica(session="process-1")
+    other = make_replica(session="process-2")
+    anonymous = make_replica()
+    pool = make_pool(previous, other, anonymous)
+
+    assert pool.replaced_by(make_replica(session="process-1"), idle_timeout=30) == [
+        previous
+    ]
+    assert pool.replaced_by(make_replica(), idle_timeout=30) == []
+
+
+def test_replicas_that_are_not_alive_are_replaced():
+    failed = make_replica()
+    failed.closed = True
+    stale = make_replica(heartbeat=True)
+    stale.last_seen -= 60
+    quiet = make_replica()
+    quiet.last_seen -= 60
+    alive = make_replica(heartbeat=True)
+    pool = make_pool(failed, stale, quiet, alive)
+
+    assert pool.replaced_by(make_replica(), idle_timeout=30) == [failed, stale]
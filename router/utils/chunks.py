@@ -0,0 +1,183 @@
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+from uuid import uuid4
+
+from utils import json_codec
+from utils.enums import WSMessageType
+
+# chunks of this size are spliced by the router without being decoded
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def split_response(
+    response: dict,
+    invoked_by: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    stream_id: Optional[str] = None,
+) -> Iterator[dict]:
+    """
+    Splits an agent response into ordered `agent_response_chunk` frames.
+
+    The response is serialized once, every chunk carries the next slice of the JSON
+    text in `data`. The last chunk has `final` set.
+
+    Args:
+        response (dict): The response as it would be sent in one `agent_response`,
+            without the routing fields.
+        invoked_by (str): The client the response is routed to.
+        chunk_size (int): Characters of the serialized response per chunk.
+        stream_id (Optional[str]): ID shared by the chunks, generated if None.
+
+    Yields:
+        dict: The chunk frames in order.
+
+    Raises:
+        ValueError: If chunk_size is not positive.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+
+    text = json_codec.dumps(response)
+    stream_id = stream_id or uuid4().hex
+    count = max((len(text) + chunk_size - 1) // chunk_size, 1)
+    for seq in range(count):
+        yield {
+            "message_type": WSMessageType.AGENT_RESPONSE_CHUNK.value,
+            "invoked_by": invoked_by,
+            "stream_id": stream_id,
+            "seq": seq,
+            "final": seq == count - 1,
+            "data": text[seq * chunk_size : (seq + 1) * chunk_size],
+        }
+
+
+class _Stream:
+    __slots__ = ("parts", "size", "next_seq")
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.size = 0
+        self.next_seq = 0
+
+
+class ChunkAssembler:
+    """
+    Receiver side of chunked agent responses.
+
+    Chunks of several streams may arrive interleaved, chunks of one stream arrive
+    in order since the router forwards them as they come. `feed` reassembles whole
+    responses, `stream` yields the slices of one response as they arrive.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        """
+        Initializes an assembler without open streams.
+
+        Args:
+            max_size (Optional[int]): Maximum characters buffered per stream, unlimited if None.
+        """
+        self.max_size = max_size
+        self._streams: Dict[str, _Stream] = {}
+
+    @staticmethod
+    def is_chunk(message: dict) -> bool:
+        """
+        Checks whether a received message is a response chunk.
+
+        Args:
+            message (dict): The decoded message.
+
+        Returns:
+            bool: True for `agent_response_chunk` messages.
+        """
+        return message.get("message_type") == WSMessageType.AGENT_RESPONSE_CHUNK.value
+
+    def feed(self, chunk: dict) -> Optional[dict]:
+        """
+        Adds a chunk to its stream.
+
+        Args:
+            chunk (dict): The decoded `agent_response_chunk` message.
+
+        Returns:
+            Optional[dict]: The whole response as an `agent_response` message once the
+                final chunk arrived, None before.
+
+        Raises:
+            ValueError: If a chunk is missing or out of order, or the stream is too big.
+        """
+        stream_id = chunk["stream_id"]
+        stream = self._streams.get(stream_id)
+        if stream is None:
+            stream = self._streams[stream_id] = _Stream()
+
+        try:
+            self._append(stream, chunk)
+        except ValueError:
+            self.discard(stream_id)
+            raise
+
+        if not chunk.get("final"):
+            return None
+
+        del self._streams[stream_id]
+        response = json_codec.loads("".join(stream.parts))
+        response["message_type"] = WSMessageType.AGENT_RESPONSE.value
+        return response
+
+    async def stream(self, chunks: AsyncIterator[dict]) -> AsyncIterator[str]:
+        """
+        Yields the slices of the serialized response of one stream without buffering them.
+
+        Args:
+            chunks (AsyncIterator[dict]): The `agent_response_chunk` messages of the stream.
+
+        Yields:
+            str: The next slice of the JSON text of the response.
+
+        Raises:
+            ValueError: If a chunk is missing or out of order.
+        """
+        next_seq = 0
+        async for chunk in chunks:
+            if chunk["seq"] != next_seq:
+                raise ValueError(
+                    f"Chunk {chunk['seq']} of stream {chunk['stream_id']} "
+                    f"arrived, expected {next_seq}"
+                )
+            next_seq += 1
+            yield chunk["data"]
+            if chunk.get("final"):
+                return
+
+    def discard(self, stream_id: str) -> None:
+        """
+        Drops the chunks buffered for a stream, e.g. when the agent failed mid-stream.
+
+        Args:
+            stream_id (str): The ID of the stream.
+        """
+        self._streams.pop(stream_id, None)
+
+    def pending(self) -> int:
+        """
+        Counts the streams waiting for their final chunk.
+
+        Returns:
+            int: Number of open streams.
+        """
+        return len(self._streams)
+
+    def _append(self, stream: _Stream, chunk: dict) -> None:
+        if chunk["seq"] != stream.next_seq:
+            raise ValueError(
+                f"Chunk {chunk['seq']} of stream {chunk['stream_id']} "
+                f"arrived, expected {stream.next_seq}"
+            )
+        data = chunk["data"]
+        stream.size += len(data)
+        if self.max_size is not None and stream.size > self.max_size:
+            raise ValueError(
+                f"Stream {chunk['stream_id']} exceeds {self.max_size} characters"
+            )
+        stream.parts.append(data)
+        stream.next_seq += 1
@@ -6,8 +6,13 @@ class WSMessageType(Enum):
     AGENT_UNREGISTER = "agent_unregister"
     AGENT_INVOKE = "agent_invoke"
     AGENT_RESPONSE = "agent_response"
+    AGENT_RESPONSE_CHUNK = "agent_response_chunk"
     AGENT_ERROR = "agent_error"
     AGENT_LOG = "agent_log"
+    AGENT_LOG_BATCH = "agent_log_batch"
+    AGENT_DRAIN = "agent_drain"
+    PING = "ping"
+    PONG = "pong"
     ML_INVOKE = "ml_invoke"
 
 
@@ -22,3 +27,56 @@ class ErrorType(Enum):
     AGENT_NOT_ACTIVE = "AgentNotActive"
     INVALID_JSON_REQUEST_FORMAT = "InvalidJSONRequestFormat"
     NO_REQUEST_PAYLOAD = "NoRequestPayload"
+    AGENT_DISCONNECTED = "AgentDisconnected"
+    AGENT_TIMEOUT = "AgentTimeout"
+    AGENT_DRAINING = "AgentDraining"
+
+
+class RegistryBackend(Enum):
+    MEMORY = "memory"
+    LOCAL = "local"
+    REDIS = "redis"
+
+
+class ClusterFrameType(Enum):
+    DELIVER = "deliver"
+    CLIENT_DISCONNECTED = "client_disconnected"
+
+
+class OverflowPolicy(Enum):
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    DISCONNECT = "disconnect"
+
+
+class MessageLane(Enum):
+    CONTROL = "control"
+    LOG = "log"
+
+
+class MessageEncoding(Enum):
+    JSON = "json"
+    MSGPACK = "msgpack"
+
+
+class ClientType(Enum):
+    AGENT = "agent"
+    MASTER_SERVER_BE = "master_server_be"
+    MASTER_SERVER_ML = "master_server_ml"
+    INVOKE_KEY = "invoke_key"
+
+
+class DeliveryStatus(Enum):
+    DELIVERED = "delivered"
+    FORWARDED = "forwarded"
+    NOT_CONNECTED = "not_connected"
+    DROPPED = "dropped"
+    RESPONDED = "responded"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+
+
+class MessageLogMode(Enum):
+    STRUCTURED = "structured"
+    FULL = "full"
@@ -0,0 +1,435 @@
+import re
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from utils import json_codec
+
+_PRIMITIVE = re.compile(r"[^\s,}\]]+")
+_WHITESPACE = re.compile(r"\s*")
+_DELIMITERS = re.compile(r"[\s,]*")
+# characters that open or close a string or a container
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+
+# frames below this size are decoded completely, it is cheaper than locating members
+FAST_PATH_MIN_SIZE = 16 * 1024
+
+# strings and brackets skipped per byte of frame at most: a token costs about as much
+# to skip in Python as decoding a few hundred bytes, denser payloads are decoded
+MAX_TOKENS_PER_BYTE = 1 / 1024
+MIN_TOKEN_BUDGET = 16
+
+
+class _Span(NamedTuple):
+    start: int  # position of the key
+    value_start: int
+    end: int  # position right after the value
+
+
+class _Ambiguous(Exception):
+    """
+    The member can't be located without decoding the whole frame.
+    """
+
+
+class Envelope:
+    """
+    Routing view of a JSON object frame.
+
+    The router only needs a few top-level fields (`message_type`, `agent_uuid`,
+    `invoked_by`) to route a message. Small frames are decoded with the fast JSON
+    codec. Large frames are not decoded at all: the requested top-level members
+    are located by scanning the top level of the text, nested containers are
+    skipped by matching brackets and strings, and the frame is forwarded with
+    members spliced out or appended, so the payload is copied as is. When the
+    members can't be located cheaply and unambiguously (duplicated keys, a payload
+    made of many small tokens, etc.) the frame falls back to a complete decode.
+
+    Payloads of large frames are not validated, the receiving side parses them.
+    """
+
+    __slots__ = ("frame", "_data", "_spans")
+
+    def __init__(self, frame: str, data: Optional[dict] = None):
+        self.frame = frame
+        self._data = data
+        self._spans: Optional[Dict[str, _Span]] = None
+
+    @classmethod
+    def parse(
+        cls, frame: str | bytes, fast_path_min_size: int = FAST_PATH_MIN_SIZE
+    ) -> "Envelope":
+        """
+        Prepares a frame for routing.
+
+        Args:
+            frame (str | bytes): The raw frame received from a client.
+            fast_path_min_size (int): Frames of this size and bigger are not decoded.
+
+        Returns:
+            Envelope: The routing view of the frame.
+
+        Raises:
+            ValueError: If the frame is not a JSON object.
+        """
+        if isinstance(frame, bytes):
+            frame = frame.decode()
+        if len(frame) < fast_path_min_size:
+            return cls(frame, data=_decode_object(frame))
+
+        start = _WHITESPACE.match(frame).end()
+        # only the tail is checked so the frame isn't copied
+        if frame[start : start + 1] != "{" or frame[-256:].rstrip()[-1:] != "}":
+            raise ValueError("Frame is not a JSON object")
+        return cls(frame)
+
+    @property
+    def decoded(self) -> bool:
+        """
+        Whether the whole frame has been decoded.
+        """
+        return self._data is not None
+
+    @classmethod
+    def from_object(cls, data: Any) -> "Envelope":
+        """
+        Wraps a frame that was already decoded, e.g. from a binary MessagePack frame.
+
+        Args:
+            data (Any): The decoded frame.
+
+        Returns:
+            Envelope: The routing view of the frame.
+
+        Raises:
+            ValueError: If the frame is not an object.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Frame is not an object")
+        return cls("", data=data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Decodes a top-level value. Meant for small envelope fields.
+
+        Args:
+            key (str): The member key.
+            default (Any): Returned if the key is missing.
+
+        Returns:
+            Any: The decoded value.
+        """
+        if self._data is None:
+            raw = self.raw(key)
+            if self._data is None:
+                return default if raw is None else json_codec.loads(raw)
+        return self._data.get(key, default)
+
+    def raw(self, key: str) -> Optional[str]:
+        """
+        Returns the JSON text of a top-level value.
+
+        Args:
+            key (str): The member key.
+
+        Returns:
+            Optional[str]: The JSON value or None if the key is missing.
+        """
+        value = self.member(key)
+        if self._data is None or value is None:
+            return value
+        return json_codec.dumps(value)
+
+    def member(self, key: str) -> Any:
+        """
+        Returns a top-level value in the cheapest form to forward: the JSON text for
+        frames that are not decoded, the decoded value otherwise.
+
+        Args:
+            key (str): The member key.
+
+        Returns:
+            Any: The value or None if the key is missing.
+        """
+        if self._data is None:
+            try:
+                span = self._locate(key)
+            except _Ambiguous:
+                self._decode()
+            else:
+                if span is None:
+                    return None
+                return self.frame[span.value_start : span.end]
+
+        return self._data.get(key)
+
+    def is_empty(self, key: str) -> bool:
+        """
+        Checks whether a top-level value is missing or falsy without decoding large values.
+
+        Args:
+            key (str): The member key.
+
+        Returns:
+            bool: True if the value is missing, null, false, zero or an empty container.
+        """
+        if self._data is not None:
+            return not self._data.get(key)
+
+        try:
+            span = self._locate(key)
+        except _Ambiguous:
+            self._decode()
+            return not self._data.get(key)
+
+        if span is None:
+            return True
+        frame = self.frame
+        first = frame[span.value_start]
+        if first in "{[":
+            # only the first characters are read, not the whole container
+            return frame[_skip_whitespace(frame, span.value_start + 1)] in "}]"
+        if first == '"':
+            return span.end - span.value_start == 2
+        return not json_codec.loads(frame[span.value_start : span.end])
+
+    def rewrite(
+        self, drop: Iterable[str] = (), extra: Optional[Dict[str, Any]] = None
+    ) -> str | dict:
+        """
+        Builds the frame with some top-level members removed or added.
+
+        Args:
+            drop (Iterable[str]): Keys of the members to remove.
+            extra (Optional[Dict[str, Any]]): Members to append, they override kept members.
+
+        Returns:
+            str | dict: The JSON text for frames that are not decoded, a new dict otherwise.
+                Decoded frames are serialized once, in the encoding of the receiver.
+        """
+        extra = extra or {}
+        drop = set(drop) | set(extra)
+
+        if self._data is None:
+            try:
+                spans = {key: self._locate(key) for key in drop}
+            except _Ambiguous:
+                self._decode()
+            else:
+                return self._splice(spans, extra)
+
+        data = {key: value for key, value in self._data.items() if key not in drop}
+        data.update(extra)
+        return data
+
+    def _decode(self) -> None:
+        self._data = _decode_object(self.frame)
+
+    def _splice(self, spans: Dict[str, Optional[_Span]], extra: Dict[str, Any]) -> str:
+        frame = self.frame
+        appended = {}
+        for key, value in extra.items():
+            encoded = json_codec.dumps(value)
+            span = spans.get(key)
+            # a member re-added with the same value stays where it is
+            if span and frame[span.value_start : span.end] == encoded:
+                spans[key] = None
+            else:
+                appended[key] = encoded
+
+        removals = []
+        for span in sorted(filter(None, spans.values())):
+            # adjacent members are removed together with the comma between them
+            if (
+                removals
+                and _DELIMITERS.match(frame, removals[-1][1]).end() == span.start
+            ):
+                removals[-1][1] = span.end
+            else:
+                removals.append([span.start, span.end])
+
+        closing = frame.rindex("}")
+        pieces = []
+        position = 0
+        for start, end in removals:
+            # drop exactly one of the commas around the removed members
+            left = start - 1
+            while frame[left].isspace():
+                left -= 1
+            right = _skip_whitespace(frame, end)
+            if frame[left] == "," and frame[right] in ",}":
+                start = left
+            elif frame[left] == "{" and frame[right] == ",":
+                end = right + 1
+            pieces.append(frame[position:start])
+            position = end
+
+        if not appended:
+            if not pieces:
+                return frame
+            pieces.append(frame[position:])
+            return "".join(pieces)
+
+        pieces.append(frame[position:closing])
+        # the object is empty if nothing but whitespace follows the opening brace
+        opening = frame.index("{")
+        is_empty = all(
+            _skip_whitespace(piece, opening + 1 if i == 0 else 0) == len(piece)
+            for i, piece in enumerate(pieces)
+        )
+        if not is_empty:
+            pieces.append(",")
+        pieces.append(
+            ",".join(
+                f"{json_codec.dumps(key)}:{value}" for key, value in appended.items()
+            )
+        )
+        pieces.append("}")
+        return "".join(pieces)
+
+    def _locate(self, key: str) -> Optional[_Span]:
+        if self._spans is None:
+            try:
+                self._spans = _scan_members(self.frame)
+            except IndexError as error:
+                raise _Ambiguous("truncated frame") from error
+        return self._spans.get(key)
+
+
+def extend_object(value: Optional[str | dict], extra: Dict[str, Any]) -> str | dict:
+    """
+    Appends members to an object without decoding it.
+
+    Appended members come last, so they win over duplicates when decoded, the same
+    way as `{**payload, **extra}`.
+
+    Args:
+        value (Optional[str | dict]): The object as JSON text or a dict, None is `{}`.
+        extra (Dict[str, Any]): Members to append.
+
+    Returns:
+        str | dict: The extended object, in the same form as the given one.
+    """
+    if value is None or isinstance(value, dict):
+        return {**(value or {}), **extra}
+    if not extra:
+        return value
+
+    value = value.rstrip()
+    if not value.endswith("}"):
+        raise ValueError("Value is not a JSON object")
+
+    members = ",".join(
+        json_codec.dumps(key) + ":" + json_codec.dumps(member)
+        for key, member in extra.items()
+    )
+    body_end = len(value) - 1
+    # only the whitespace after the opening brace is scanned, not the whole body
+    is_empty = _skip_whitespace(value, value.find("{") + 1) == body_end
+    return value[:body_end] + ("" if is_empty else ",") + members + "}"
+
+
+def wrap(key: str, value: str | dict) -> str | dict:
+    """
+    Wraps a value into a single-member object.
+
+    Args:
+        key (str): The member key.
+        value (str | dict): The value as JSON text or a dict.
+
+    Returns:
+        str | dict: The resulting object, in the same form as the given value.
+    """
+    if isinstance(value, dict):
+        return {key: value}
+    return "{" + json_codec.dumps(key) + ":" + value + "}"
+
+
+def _decode_object(frame: str) -> dict:
+    data = json_codec.loads(frame)
+    if not isinstance(data, dict):
+        raise ValueError("Frame is not a JSON object")
+    return data
+
+
+def _skip_whitespace(frame: str, position: int) -> int:
+    return _WHITESPACE.match(frame, position).end()
+
+
+def _scan_members(frame: str) -> Dict[str, _Span]:
+    spans = {}
+    budget = max(int(len(frame) * MAX_TOKENS_PER_BYTE), MIN_TOKEN_BUDGET)
+    position = _skip_whitespace(frame, frame.index("{") + 1)
+    if frame[position] == "}":
+        return spans
+
+    while True:
+        if frame[position] != '"':
+            raise _Ambiguous(frame[position : position + 16])
+        key_end = _skip_string(frame, position)
+        key = frame[position + 1 : key_end - 1]
+        if "\\" in key:
+            key = json_codec.loads(frame[position:key_end])
+        # the decoder keeps the last duplicate, the frame is decoded to do the same
+        if key in spans:
+            raise _Ambiguous(key)
+
+        colon = _skip_whitespace(frame, key_end)
+        if frame[colon] != ":":
+            raise _Ambiguous(frame[colon : colon + 16])
+        value_start = _skip_whitespace(frame, colon + 1)
+        end, budget = _skip_value(frame, value_start, budget)
+        spans[key] = _Span(position, value_start, end)
+
+        position = _skip_whitespace(frame, end)
+        if frame[position] == "}":
+            return spans
+        if frame[position] != ",":
+            raise _Ambiguous(frame[position : position + 16])
+        position = _skip_whitespace(frame, position + 1)
+
+
+def _skip_value(frame: str, position: int, budget: int) -> Tuple[int, int]:
+    # returns the end of the value and the tokens left to skip
+    first = frame[position]
+    if first == '"':
+        return _skip_string(frame, position), budget
+    if first not in "{[":
+        match = _PRIMITIVE.match(frame, position)
+        if not match:
+            raise _Ambiguous(frame[position : position + 16])
+        return match.end(), budget
+
+    # strings are jumped over, so brackets inside them are not counted
+    depth = 0
+    while True:
+        budget -= 1
+        if budget < 0:
+            raise _Ambiguous("payload is too dense to scan")
+        match = _STRUCTURAL.search(frame, position)
+        if match is None:
+            raise _Ambiguous("unbalanced container")
+        position = match.start()
+        char = frame[position]
+        if char == '"':
+            position = _skip_string(frame, position)
+            continue
+        position += 1
+        if char in "{[":
+            depth += 1
+        else:
+            depth -= 1
+            if not depth:
+                return position, budget
+
+
+def _skip_string(frame: str, position: int) -> int:
+    # str.find runs in C, the regex engine is slower than decoding for long strings
+    while True:
+        position = frame.find('"', position + 1)
+        if position == -1:
+            raise _Ambiguous("unterminated string")
+        backslash = position - 1
+        while frame[backslash] == "\\":
+            backslash -= 1
+        # the quote is escaped by an odd number of backslashes
+        if (position - 1 - backslash) % 2 == 0:
+            return position + 1
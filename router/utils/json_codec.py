@@ -0,0 +1,37 @@
+import base64
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# orjson.JSONDecodeError and json.JSONDecodeError both subclass ValueError
+JSONDecodeError = ValueError
+
+
+def _default(obj: Any) -> Any:
+    # binary values sent by MessagePack clients reach JSON clients as base64 strings
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return base64.b64encode(obj).decode()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# JSON codec used by the router: orjson when installed, the standard library otherwise.
+# Both variants take `str` or `bytes` and serialize to `str`, ready for `send_text`.
+if orjson:
+
+    def loads(data: str | bytes) -> Any:
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj, default=_default).decode()
+
+else:
+
+    def loads(data: str | bytes) -> Any:
+        return json.loads(data)
+
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"), default=_default)
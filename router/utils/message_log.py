@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import sys
+from typing import Any, Dict, Iterable, Optional, Set
+
+from utils import json_codec
+from utils.enums import MessageLogMode
+
+DEFAULT_SAMPLE_RATE_KEY = "*"
+
+
+class _StructuredRecord:
+    """
+    Log message built only when a handler formats the record.
+    """
+
+    __slots__ = ("fields", "message", "max_payload", "hash_payload")
+
+    def __init__(
+        self,
+        fields: Dict[str, Any],
+        message: str | bytes | dict,
+        max_payload: Optional[int],
+        hash_payload: bool,
+    ):
+        self.fields = fields
+        self.message = message
+        self.max_payload = max_payload
+        self.hash_payload = hash_payload
+
+    def __str__(self) -> str:
+        message = self.message
+        if isinstance(message, dict):
+            message = json_codec.dumps(message)
+
+        fields = dict(self.fields)
+        fields["size"] = len(message)
+        if self.max_payload is None or len(message) <= self.max_payload:
+            payload = message
+        else:
+            payload = message[: self.max_payload]
+            fields["truncated"] = True
+        fields["payload"] = (
+            payload.decode(errors="replace") if isinstance(payload, bytes) else payload
+        )
+        if self.hash_payload:
+            data = message if isinstance(message, bytes) else message.encode()
+            fields["payload_hash"] = hashlib.blake2b(data, digest_size=8).hexdigest()
+        return json_codec.dumps(fields)
+
+
+class MessageLog:
+    """
+    Logging of the messages routed by the router.
+
+    In the structured mode every routed message is reduced to one JSON line with
+    its envelope fields, size and a truncated (optionally hashed) payload.
+    Messages are sampled per `message_type` and nothing is formatted unless the
+    record is going to be emitted. Messages from and to debug clients are always
+    logged with the whole payload. The full mode logs whole messages, as the
+    router did before, but formats them lazily as well.
+    """
+
+    def __init__(
+        self,
+        mode: MessageLogMode = MessageLogMode.STRUCTURED,
+        sample_rates: Optional[Dict[str, float]] = None,
+        max_payload: int = 256,
+        hash_payloads: bool = False,
+        debug_clients: Iterable[str] = (),
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Initializes the message log.
+
+        Args:
+            mode (MessageLogMode): Structured one-line records or whole messages.
+            sample_rates (Optional[Dict[str, float]]): Share of the messages of each
+                `message_type` that is logged, `*` sets the rate of unlisted types.
+            max_payload (int): Characters of the payload kept in structured records.
+            hash_payloads (bool): Adds a hash of the whole payload to structured records.
+            debug_clients (Iterable[str]): Clients whose messages are always logged in full.
+            logger (Optional[logging.Logger]): Logger the records are written to.
+        """
+        self.mode = mode
+        self.sample_rates = dict(sample_rates or {})
+        self.default_rate = self.sample_rates.pop(DEFAULT_SAMPLE_RATE_KEY, 1.0)
+        self.max_payload = max_payload
+        self.hash_payloads = hash_payloads
+        self.debug_clients: Set[str] = set(debug_clients)
+        self.logger = logger or logging.getLogger("router.messages")
+        # sampling keeps a fractional credit per type, so 0.1 logs every 10th message
+        self._credits: Dict[Optional[str], float] = {}
+
+    def received(
+        self,
+        client_id: str,
+        message_type: Optional[str],
+        message: str | bytes | dict,
+        **fields: Any,
+    ) -> None:
+        """
+        Logs a message received from a client.
+
+        Args:
+            client_id (str): The sending client.
+            message_type (Optional[str]): The `message_type` of the message.
+            message (str | bytes | dict): The message as received.
+            **fields (Any): Additional envelope fields, e.g. `invoked_by`.
+        """
+        self._log("received", client_id, message_type, message, fields)
+
+    def sent(
+        self,
+        client_id: str,
+        message_type: Optional[str],
+        message: str | bytes | dict,
+    ) -> None:
+        """
+        Logs a message sent to a client.
+
+        Args:
+            client_id (str): The receiving client.
+            message_type (Optional[str]): The `message_type` of the routed message.
+            message (str | bytes | dict): The message as sent.
+        """
+        self._log("sent", client_id, message_type, message, {})
+
+    def set_debug(self, client_id: str, enabled: bool) -> None:
+        """
+        Turns full logging of a client's messages on or off.
+
+        Args:
+            client_id (str): The ID of the client.
+            enabled (bool): Whether the messages are always logged in full.
+        """
+        if enabled:
+            self.debug_clients.add(client_id)
+        else:
+            self.debug_clients.discard(client_id)
+
+    def _log(
+        self,
+        event: str,
+        client_id: str,
+        message_type: Optional[str],
+        message: str | bytes | dict,
+        fields: Dict[str, Any],
+    ) -> None:
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+
+        debug = client_id in self.debug_clients or (
+            fields.get("invoked_by") in self.debug_clients
+        )
+        if not debug and not self._sampled(message_type):
+            return
+
+        if self.mode == MessageLogMode.FULL:
+            if event == "sent":
+                self.logger.info("Sending message: %s, to: %s", message, client_id)
+            else:
+                self.logger.info("Received message: %s, from: %s", message, client_id)
+            return
+
+        self.logger.info(
+            "%s",
+            _StructuredRecord(
+                fields={
+                    "event": event,
+                    "client_id": client_id,
+                    "message_type": message_type,
+                    **fields,
+                },
+                message=message,
+                max_payload=None if debug else self.max_payload,
+                hash_payload=self.hash_payloads,
+            ),
+        )
+
+    def _sampled(self, message_type: Optional[str]) -> bool:
+        rate = self.sample_rates.get(message_type, self.default_rate)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+
+        credit = self._credits.get(message_type, 0.0) + rate
+        if credit >= 1:
+            self._credits[message_type] = credit - 1
+            return True
+        self._credits[message_type] = credit
+        return False
+
+
+def configure_logger(level: str) -> logging.Logger:
+    """
+    Sets up the logger of routed messages, the root logger is left to uvicorn.
+
+    Args:
+        level (str): Level name, messages are logged at INFO.
+
+    Returns:
+        logging.Logger: The configured logger.
+    """
+    logger = logging.getLogger("router.messages")
+    logger.setLevel(level.upper())
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+        )
+        logger.addHandler(handler)
+    logger.propagate = False
+    return logger
@@ -0,0 +1,369 @@
+import bisect
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from utils.enums import WSMessageType
+from utils.pydantic_models import LatencyHistogram, MetricsSnapshot, QueueStats
+
+# upper bounds of the invoke -> response latency buckets, in seconds
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+UNKNOWN_MESSAGE_TYPE = "unknown"
+_MESSAGE_TYPES = {message_type.value for message_type in WSMessageType}
+
+
+class RateCounter:
+    """
+    Event counter over a sliding window of one-second buckets.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.started_at = time.monotonic()
+        self._counts = [0] * window
+        self._seconds = [0] * window
+
+    def add(self, count: int = 1, now: Optional[float] = None) -> None:
+        second = int(now if now is not None else time.monotonic())
+        index = second % self.window
+        if self._seconds[index] != second:
+            self._seconds[index] = second
+            self._counts[index] = 0
+        self._counts[index] += count
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """
+        Returns the average number of events per second over the window.
+        """
+        now = now if now is not None else time.monotonic()
+        second = int(now)
+        total = sum(
+            count
+            for count, bucket_second in zip(self._counts, self._seconds)
+            if second - bucket_second < self.window
+        )
+        # a counter younger than the window is averaged over its own lifetime
+        return total / max(min(self.window, now - self.started_at), 1.0)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with fixed buckets.
+    """
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        # the last bucket counts the observations above the highest bound
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """
+        Returns the cumulative bucket counts keyed by the upper bound label.
+        """
+        buckets = []
+        total = 0
+        for bound, count in zip((*self.bounds, "+Inf"), self.counts):
+            total += count
+            buckets.append((str(bound), total))
+        return buckets
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimates a quantile by linear interpolation inside its bucket.
+        """
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        total = 0
+        for i, count in enumerate(self.counts):
+            if total + count >= rank and count:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - total) / count
+            total += count
+        return self.bounds[-1]
+
+    def to_model(self) -> LatencyHistogram:
+        return LatencyHistogram(
+            count=self.count,
+            sum_seconds=self.sum,
+            buckets=dict(self.cumulative()),
+            p50_seconds=self.quantile(0.5),
+            p95_seconds=self.quantile(0.95),
+            p99_seconds=self.quantile(0.99),
+        )
+
+
+class RouterMetrics:
+    """
+    In-process metrics of a router node.
+
+    Counters are updated on the routing path with O(1) work per message; rates,
+    quantiles and the Prometheus text are computed only when metrics are read.
+    """
+
+    def __init__(self, rate_window: int = 60):
+        """
+        Initializes empty counters.
+
+        Args:
+            rate_window (int): Window of the per-second message rates, in seconds.
+        """
+        self.started_at = time.monotonic()
+        self.rate_window = rate_window
+        self.messages_total: Dict[str, int] = defaultdict(int)
+        self.message_rates: Dict[str, RateCounter] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.invoke_latency: Dict[str, Histogram] = {}
+        self.connections_reaped = 0
+
+    def record_received(self, message_type: Optional[str], size: int) -> None:
+        """
+        Counts a frame received from a client.
+
+        Args:
+            message_type (Optional[str]): The `message_type` of the frame.
+            size (int): Frame size, characters for text frames and bytes for binary ones.
+        """
+        if message_type not in _MESSAGE_TYPES:
+            message_type = UNKNOWN_MESSAGE_TYPE
+        self.messages_total[message_type] += 1
+        if not (rate := self.message_rates.get(message_type)):
+            rate = self.message_rates[message_type] = RateCounter(self.rate_window)
+        rate.add()
+        self.bytes_in += size
+
+    def record_sent(self, size: int) -> None:
+        """
+        Counts a frame written to a client socket.
+
+        Args:
+            size (int): Frame size, characters for text frames and bytes for binary ones.
+        """
+        self.bytes_out += size
+
+    def observe_invoke_latency(self, agent_uuid: str, seconds: float) -> None:
+        """
+        Records the time an agent took to answer an invocation.
+
+        Args:
+            agent_uuid (str): The agent that responded.
+            seconds (float): Time from forwarding the invocation to routing the response.
+        """
+        if not (histogram := self.invoke_latency.get(agent_uuid)):
+            histogram = self.invoke_latency[agent_uuid] = Histogram()
+        histogram.observe(seconds)
+
+    def record_reaped(self) -> None:
+        """
+        Counts a connection closed for missing heartbeats.
+        """
+        self.connections_reaped += 1
+
+    def snapshot(
+        self,
+        connections: Dict[str, int],
+        send_queues: Dict[str, QueueStats],
+        invocations_in_flight: Dict[str, int],
+    ) -> MetricsSnapshot:
+        """
+        Builds a point-in-time view of the metrics.
+
+        Args:
+            connections (Dict[str, int]): Number of local connections per client type.
+            send_queues (Dict[str, QueueStats]): Outbound queue stats per client.
+            invocations_in_flight (Dict[str, int]): In-flight invocations per agent.
+
+        Returns:
+            MetricsSnapshot: The metrics snapshot.
+        """
+        now = time.monotonic()
+        return MetricsSnapshot(
+            uptime_seconds=now - self.started_at,
+            rate_window_seconds=self.rate_window,
+            connections=connections,
+            messages_total=dict(self.messages_total),
+            messages_per_second={
+                message_type: rate.rate(now)
+                for message_type, rate in self.message_rates.items()
+            },
+            bytes_in=self.bytes_in,
+            bytes_out=self.bytes_out,
+            invoke_latency={
+                agent_uuid: histogram.to_model()
+                for agent_uuid, histogram in self.invoke_latency.items()
+            },
+            send_queues=send_queues,
+            invocations_in_flight=invocations_in_flight,
+            connections_reaped=self.connections_reaped,
+        )
+
+    def render_prometheus(self, snapshot: MetricsSnapshot) -> str:
+        """
+        Renders a snapshot in the Prometheus text exposition format.
+
+        Args:
+            snapshot (MetricsSnapshot): The snapshot to render.
+
+        Returns:
+            str: The metrics text.
+        """
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[tuple]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(
+                    f'{key}="{_escape_label(label)}"' for key, label in labels.items()
+                )
+                lines.append(
+                    f"{name}{suffix}{{{label_text}}} {value}"
+                    if label_text
+                    else f"{name}{suffix} {value}"
+                )
+
+        metric(
+            "router_uptime_seconds",
+            "gauge",
+            "Seconds since the router node started.",
+            [("", {}, snapshot.uptime_seconds)],
+        )
+        metric(
+            "router_connections",
+            "gauge",
+            "Active local connections by client type.",
+            [
+                ("", {"client_type": client_type}, count)
+                for client_type, count in snapshot.connections.items()
+            ],
+        )
+        metric(
+            "router_connections_reaped_total",
+            "counter",
+            "Connections closed after the heartbeat idle timeout.",
+            [("", {}, snapshot.connections_reaped)],
+        )
+        metric(
+            "router_messages_received_total",
+            "counter",
+            "Frames received from clients by message type.",
+            [
+                ("", {"message_type": message_type}, count)
+                for message_type, count in snapshot.messages_total.items()
+            ],
+        )
+        metric(
+            "router_messages_per_second",
+            "gauge",
+            f"Received frames per second over the last {snapshot.rate_window_seconds}s.",
+            [
+                ("", {"message_type": message_type}, rate)
+                for message_type, rate in snapshot.messages_per_second.items()
+            ],
+        )
+        metric(
+            "router_received_bytes_total",
+            "counter",
+            "Size of the frames received from clients.",
+            [("", {}, snapshot.bytes_in)],
+        )
+        metric(
+            "router_sent_bytes_total",
+            "counter",
+            "Size of the frames written to client sockets.",
+            [("", {}, snapshot.bytes_out)],
+        )
+
+        latency_samples = []
+        for agent_uuid, histogram in snapshot.invoke_latency.items():
+            labels = {"agent_uuid": agent_uuid}
+            for bound, count in histogram.buckets.items():
+                latency_samples.append(("_bucket", {**labels, "le": bound}, count))
+            latency_samples.append(("_sum", labels, histogram.sum_seconds))
+            latency_samples.append(("_count", labels, histogram.count))
+        metric(
+            "router_invoke_latency_seconds",
+            "histogram",
+            "Time from forwarding an invocation to routing its response, per agent.",
+            latency_samples,
+        )
+
+        metric(
+            "router_invocations_in_flight",
+            "gauge",
+            "Invocations forwarded to an agent and not answered yet.",
+            [
+                ("", {"agent_uuid": agent_uuid}, count)
+                for agent_uuid, count in snapshot.invocations_in_flight.items()
+            ],
+        )
+        metric(
+            "router_send_queue_depth",
+            "gauge",
+            "Messages waiting in the outbound queue of a client.",
+            [
+                ("", {"client_id": client_id}, stats.depth)
+                for client_id, stats in snapshot.send_queues.items()
+            ],
+        )
+        metric(
+            "router_send_queue_dropped_total",
+            "counter",
+            "Messages dropped from the outbound queue of a client.",
+            [
+                ("", {"client_id": client_id}, stats.dropped)
+                for client_id, stats in snapshot.send_queues.items()
+            ],
+        )
+        metric(
+            "router_log_queue_depth",
+            "gauge",
+            "Agent logs waiting in the low-priority queue of a client.",
+            [
+                ("", {"client_id": client_id}, stats.log_depth)
+                for client_id, stats in snapshot.send_queues.items()
+                if stats.log_depth or stats.log_sent or stats.log_dropped
+            ],
+        )
+        metric(
+            "router_log_queue_dropped_total",
+            "counter",
+            "Agent logs dropped by the rate cap and drop policy of a client's log queue.",
+            [
+                ("", {"client_id": client_id}, stats.log_dropped)
+                for client_id, stats in snapshot.send_queues.items()
+                if stats.log_depth or stats.log_sent or stats.log_dropped
+            ],
+        )
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
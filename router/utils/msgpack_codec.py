@@ -0,0 +1,21 @@
+from typing import Any
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+# MessagePack codec for binary WebSocket frames, available with the `msgpack` package
+is_available = msgpack is not None
+
+
+def loads(data: bytes) -> Any:
+    try:
+        return msgpack.unpackb(data, raw=False)
+    except Exception as e:
+        # msgpack raises a family of unrelated errors for malformed input
+        raise ValueError(f"Invalid MessagePack frame: {e}") from e
+
+
+def dumps(obj: Any) -> bytes:
+    return msgpack.packb(obj, use_bin_type=True)
@@ -1,3 +1,5 @@
+from typing import Dict, List, Optional
+
 from pydantic import BaseModel
 
 
@@ -8,3 +10,80 @@ class Message(BaseModel):
 
 class MessageResponse(BaseModel):
     detail: str
+
+
+class BatchMessage(BaseModel):
+    messages: List[Message]
+    # waits for the agents to respond, until the shared deadline
+    wait_for_responses: bool = False
+    timeout_seconds: float = 30
+
+
+class DeliveryResult(BaseModel):
+    client_id: str
+    status: str
+    response: Optional[dict] = None
+
+
+class BatchMessageResponse(BaseModel):
+    results: List[DeliveryResult]
+    elapsed_seconds: float
+
+
+class QueueStats(BaseModel):
+    depth: int
+    max_depth: int
+    capacity: int
+    sent: int
+    dropped: int
+    overflow_policy: str
+    # lower-priority lane of agent logs
+    log_depth: int = 0
+    log_sent: int = 0
+    log_dropped: int = 0
+
+
+class LatencyHistogram(BaseModel):
+    count: int
+    sum_seconds: float
+    # cumulative counts keyed by the upper bound in seconds, "+Inf" included
+    buckets: Dict[str, int]
+    p50_seconds: Optional[float]
+    p95_seconds: Optional[float]
+    p99_seconds: Optional[float]
+
+
+class MetricsSnapshot(BaseModel):
+    uptime_seconds: float
+    rate_window_seconds: int
+    connections: Dict[str, int]
+    messages_total: Dict[str, int]
+    messages_per_second: Dict[str, float]
+    bytes_in: int
+    bytes_out: int
+    invoke_latency: Dict[str, LatencyHistogram]
+    send_queues: Dict[str, QueueStats]
+    invocations_in_flight: Dict[str, int]
+    connections_reaped: int
+
+
+class InFlightInvocations(BaseModel):
+    total: int
+    by_agent: Dict[str, int]
+
+
+class ReplicaStats(BaseModel):
+    replica_id: str
+    in_flight: int
+    draining: bool
+    encoding: str
+    queue: QueueStats
+
+
+class ConnectionLiveness(BaseModel):
+    client_id: str
+    replica_id: str
+    client_type: str
+    heartbeat: bool
+    connected_seconds: float
+    idle_seconds: float